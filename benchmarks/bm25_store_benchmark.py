@@ -0,0 +1,61 @@
+# mypy: disable-error-code=import-not-found
+"""Compare the latency of 10 keyword queries of SQLiteStore and CompiledBM25Store on a law database.
+
+Usage: PYTHONPATH=. python benchmarks/bm25_store_benchmark.py [DB/civil_law_sqlite.db] [runs]
+"""
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.sqlite_store import SQLiteStore
+
+from writeworld.core.store.compiled_bm25_store import CompiledBM25Store
+
+
+def measure(name: str, run: Callable[[], Any], runs: int) -> None:
+    latencies: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{name:<20} p50 {statistics.median(latencies):8.3f} ms   "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:8.3f} ms"
+    )
+
+
+def main() -> None:
+    source = sys.argv[1] if len(sys.argv) > 1 else "DB/civil_law_sqlite.db"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = shutil.copy(source, tmp_dir)
+        terms = [
+            row[0]
+            for row in sqlite3.connect(db_path).execute(
+                "SELECT term FROM inverted_index GROUP BY term ORDER BY COUNT(*) DESC LIMIT 30"
+            )
+        ]
+        queries = [Query(query_str="".join(terms[i : i + 3]), keywords=set(terms[i : i + 3])) for i in range(0, 30, 3)]
+
+        sqlite_store = SQLiteStore(db_path=db_path)
+        sqlite_store._new_client()
+        start = time.perf_counter()
+        compiled_store = CompiledBM25Store(db_path=db_path)
+        compiled_store._new_client()
+        print(f"compile index        {(time.perf_counter() - start) * 1000:8.1f} ms")
+        start = time.perf_counter()
+        CompiledBM25Store(db_path=db_path)._new_client()
+        print(f"load serialized      {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        measure("SQLiteStore", lambda: [sqlite_store.query(query) for query in queries], max(runs // 20, 1))
+        measure("CompiledBM25Store", lambda: [compiled_store.query(query) for query in queries], runs)
+
+
+if __name__ == "__main__":
+    main()
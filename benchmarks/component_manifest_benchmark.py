@@ -0,0 +1,73 @@
+# mypy: disable-error-code=import-not-found
+"""Component scanning of a start, with and without the component manifest.
+
+Runs the scans `AgentUniverse.start` does for the packages of `config.toml [CORE_PACKAGE]`, one per
+component type, first with `AgentUniverse.scan` (every yaml parsed again for every type), then with a
+manifest being built, then with the manifest loaded from its file as the next start would. The
+registration of the components, which imports and builds them, is the same in the three cases and
+is not measured.
+
+Usage: PYTHONPATH=. python benchmarks/component_manifest_benchmark.py [config/config.toml] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from agentuniverse.base.agentuniverse import AgentUniverse
+from agentuniverse.base.component.component_enum import ComponentEnum
+from agentuniverse.base.config.config_type_enum import ConfigTypeEnum
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.util.component_manifest import ComponentManifest
+
+
+def start_scans(config_path: str) -> Dict[ComponentEnum, List[str]]:
+    """The writeworld packages a start scans per component type."""
+    core_packages = Configer(path=config_path).load().value.get("CORE_PACKAGE", {})
+    return {
+        component_enum: core_packages.get(component_enum.value.lower()) or core_packages.get("default", [])
+        for component_enum in ComponentEnum
+    }
+
+
+def timed(scan: Callable, scans: Dict[ComponentEnum, List[str]]) -> float:
+    start = time.perf_counter()
+    for component_enum, package_list in scans.items():
+        scan(package_list, ConfigTypeEnum.YAML, component_enum)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config", nargs="?", default="config/config.toml")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    scans = start_scans(args.config)
+    agent_universe = AgentUniverse()
+
+    def agentuniverse_scan(*scan_args: object) -> list:
+        return type(agent_universe).scan(agent_universe, *scan_args)
+
+    path = os.path.join(tempfile.mkdtemp(), "component_manifest.json")
+    results = {"agentUniverse scan": [timed(agentuniverse_scan, scans) for _ in range(args.runs)]}
+    build = []
+    for _ in range(args.runs):
+        if os.path.exists(path):
+            os.remove(path)
+        manifest = ComponentManifest(path).load()
+        build.append(timed(manifest.scan, scans))
+        manifest.save()
+    results["manifest, built"] = build
+    results["manifest, loaded"] = [timed(ComponentManifest(path).load().scan, scans) for _ in range(args.runs)]
+
+    files = len(ComponentManifest(path).load().files)
+    print(f"{len(scans)} component types, {files} yaml files, median of {args.runs} runs:")
+    for name, times in results.items():
+        print(f"  {name:18} {statistics.median(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# mypy: disable-error-code=import-not-found
+"""Cold-start cost of the LangChain tools: the import-time report and the configuration time.
+
+Every measure runs in a fresh interpreter, so nothing is imported yet. The report runs
+`python -X importtime -c "import <module>"` for the tool modules and lists the imports with the
+largest cumulative time. The configuration time is the import of the tool class plus
+`initialize_by_component_configer` of its yaml, as the component scanning of a server start does,
+measured after the agentUniverse tool base class is imported: once with the yaml as it is (lazy
+tools) and once with `lazy: false` (the tool built at scanning).
+
+Usage: PYTHONPATH=. python benchmarks/import_time_report.py [--top 15] [--runs 3]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = [
+    "writeworld.core.tool.langchain_tool.langchain_tool",
+    "writeworld.core.tool.langchain_tool.wikipedia_query",
+    "writeworld.core.tool.langchain_tool.sql_langchain_tool",
+]
+YAMLS = [
+    "writeworld/core/tool/langchain_tool/duckduckgo_search.yaml",
+    "writeworld/core/tool/langchain_tool/wikipedia_query.yaml",
+]
+CONFIGURE = """
+import importlib, sys, time
+from agentuniverse.base.config.component_configer.configers.tool_configer import ToolConfiger
+from agentuniverse.base.config.configer import Configer
+import agentuniverse.agent.action.tool.tool  # imported by every server start anyway.
+base = time.perf_counter()
+for path in sys.argv[2:]:
+    configer = Configer(path=path).load()
+    if sys.argv[1] == "eager":
+        configer.value["lazy"] = False
+    tool_configer = ToolConfiger().load_by_configer(configer)
+    clz = getattr(importlib.import_module(tool_configer.metadata_module), tool_configer.metadata_class)
+    clz().initialize_by_component_configer(tool_configer)
+print(time.perf_counter() - base)
+"""
+
+
+def import_times(module: str) -> List[Tuple[int, int, str]]:
+    """(self us, cumulative us, module) of every import of a fresh `import module`."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def configure_seconds(mode: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CONFIGURE, mode, *YAMLS], capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        rows = import_times(module)
+        total = next(cumulative for _, cumulative, name in rows if name.strip() == module)
+        print(f"\n{module}: {total / 1000:.1f} ms cumulative, {len(rows)} modules imported")
+        print(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for self_us, cumulative_us, name in sorted(rows, key=lambda row: -row[1])[: args.top]:
+            print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+
+    results: Dict[str, float] = {mode: configure_seconds(mode, args.runs) for mode in ("eager", "lazy")}
+    print(f"\nconfiguration of {len(YAMLS)} LangChain tools after the agentUniverse imports, median of {args.runs}:")
+    for mode, seconds in results.items():
+        print(f"  {mode:5}: {seconds * 1000:8.1f} ms")
+    print(f"  saved: {(results['eager'] - results['lazy']) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
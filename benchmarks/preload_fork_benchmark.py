@@ -0,0 +1,162 @@
+# mypy: disable-error-code=import-not-found
+"""Memory and first-request latency of forked workers, with the shared state loaded before or after the fork.
+
+Builds a synthetic law corpus in a temporary directory, a `CompiledBM25Store` and a `NumpyVectorStore`
+over it, then forks `--workers` workers like gunicorn does, twice:
+
+- post-fork: the master only imports the modules, every worker loads jieba and the stores itself, as
+  the post-fork queue of agentUniverse does;
+- preload: the master loads them with `preload()` before the fork, the workers run the same post-fork
+  loads, which find the state current and keep it.
+
+Each worker then answers one request (a jieba cut, a BM25 query and a vector query) and reports its
+latency and its memory. `pss` splits every shared page between the processes mapping it, so the sum
+of the `pss` of the workers is the memory they take together, where their `rss` counts shared pages
+in each of them.
+
+Usage: PYTHONPATH=. python benchmarks/preload_fork_benchmark.py [--workers 5] [--docs 20000] [--dim 768]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import jieba
+import numpy as np
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.sqlite_store import SQLiteStore
+from agentuniverse.agent_serve.web.post_fork_queue import POST_FORK_QUEUE, add_post_fork
+
+from writeworld.core.doc_processor.warm_keyword_extractor import warm_jieba
+from writeworld.core.store.compiled_bm25_store import CompiledBM25Store
+from writeworld.core.store.numpy_vector_store import NumpyVectorStore
+from writeworld.util.prewarm import memory_usage, preload, register_preload
+
+WORDS = "当事人 合同 违约 责任 赔偿 损失 租赁 出租人 承租人 租金 民事 权利 义务 法人 自然人 债务 债权 担保 抵押 继承".split()
+
+
+def build_corpus(directory: str, docs: int, dim: int) -> None:
+    rng = random.Random(0)
+    texts = ["".join(rng.choices(WORDS, k=40)) + "。" for _ in range(docs)]
+    db_path = os.path.join(directory, "law.db")
+    sqlite_store = SQLiteStore(db_path=db_path)
+    sqlite_store._new_client()
+    documents = [Document(id=str(i), text=text) for i, text in enumerate(texts)]
+    for document in documents:
+        document.keywords = {word for word in WORDS if word in document.text}
+    with patch.object(SQLiteStore, "_get_document_keyword", lambda self, document: document.keywords):
+        sqlite_store.insert_document(documents)
+    sqlite_store.conn.close()
+    CompiledBM25Store(db_path=db_path)._new_client()
+
+    persist_path = os.path.join(directory, "vectors")
+    vector_store = NumpyVectorStore(persist_path=persist_path)
+    os.makedirs(persist_path)
+    matrix = np.random.default_rng(0).standard_normal((docs, dim), dtype=np.float32)
+    records = [{"id": str(i), "text": text, "metadata": {"article": i}} for i, text in enumerate(texts)]
+    vector_store.save(matrix, records)
+
+
+def worker(stores: List[Any], dim: int, report_fd: int, go_fd: int) -> None:
+    start = time.perf_counter()
+    for func, args, kwargs in POST_FORK_QUEUE:
+        func(*args, **kwargs)
+    post_fork = time.perf_counter() - start
+    bm25_store, vector_store = stores
+    start = time.perf_counter()
+    jieba.lcut("当事人一方不履行合同义务的，应当承担违约责任。")
+    bm25_store.query(Query(query_str="违约", keywords={"违约", "合同"}))
+    vector_store.query(Query(query_str="违约", embeddings=[np.ones(dim, dtype=np.float32).tolist()]))
+    first_request = time.perf_counter() - start
+    # the memory is measured once every worker served, while they all map the shared pages.
+    os.write(report_fd, b"ready")
+    os.read(go_fd, 1)
+    report = {"post_fork": post_fork, "first_request": first_request, **memory_usage()}
+    os.write(report_fd, json.dumps(report).encode())
+    os._exit(0)
+
+
+def run(mode: str, paths: Dict[str, str], workers: int, dim: int) -> List[Dict[str, Any]]:
+    """Fork the workers from a fresh master, so the two modes start from the same state."""
+    read_fd, write_fd = os.pipe()
+    master = os.fork()
+    if master:
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            reports = json.loads(f.read())
+        os.waitpid(master, 0)
+        return reports
+
+    os.close(read_fd)
+    bm25_store = CompiledBM25Store(db_path=paths["db_path"])
+    vector_store = NumpyVectorStore(persist_path=paths["persist_path"])
+    for store in (bm25_store, vector_store):
+        add_post_fork(store._new_client)
+    if mode == "preload":
+        register_preload("jieba", warm_jieba)
+        register_preload("CompiledBM25Store", bm25_store.preload)
+        register_preload("NumpyVectorStore", vector_store._new_client)
+        preload()
+    else:
+        add_post_fork(warm_jieba)
+    master_memory = memory_usage()
+    go_read, go_write = os.pipe()
+    pipes = []
+    for _ in range(workers):
+        report_read, report_write = os.pipe()
+        if os.fork() == 0:
+            worker([bm25_store, vector_store], dim, report_write, go_read)
+        os.close(report_write)
+        pipes.append(report_read)
+    for report_read in pipes:
+        os.read(report_read, len(b"ready"))
+    os.write(go_write, b"x" * workers)
+    reports = []
+    for report_read in pipes:
+        with os.fdopen(report_read) as f:
+            reports.append(json.loads(f.read()))
+    for _ in range(workers):
+        os.wait()
+    os.write(write_fd, json.dumps([{"master": master_memory}] + reports).encode())
+    os._exit(0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+    jieba.setLogLevel(60)
+    with tempfile.TemporaryDirectory() as directory:
+        # in a child, the masters must not inherit the jieba dictionary the index compilation loads.
+        builder = os.fork()
+        if builder == 0:
+            build_corpus(directory, args.docs, args.dim)
+            os._exit(0)
+        os.waitpid(builder, 0)
+        paths = {"db_path": os.path.join(directory, "law.db"), "persist_path": os.path.join(directory, "vectors")}
+        print(f"{args.workers} workers, {args.docs} documents, {args.dim} dimensions, memory in MB")
+        for mode in ("post-fork", "preload"):
+            master, *reports = run(mode, paths, args.workers, args.dim)
+            print(f"{mode}: master rss {master['master']['rss'] / 1024:.0f}")
+            for i, report in enumerate(reports):
+                print(
+                    f"  worker {i}: post-fork {report['post_fork'] * 1000:6.0f} ms, "
+                    f"first request {report['first_request'] * 1000:5.1f} ms, "
+                    f"rss {report['rss'] / 1024:6.0f}, pss {report.get('pss', 0) / 1024:6.0f}, "
+                    f"private {(report.get('private_dirty', 0) + report.get('private_clean', 0)) / 1024:6.0f}"
+                )
+            print(
+                f"  workers total: rss {sum(r['rss'] for r in reports) / 1024:.0f}, "
+                f"pss {sum(r.get('pss', 0) for r in reports) / 1024:.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
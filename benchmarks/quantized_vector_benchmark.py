@@ -0,0 +1,116 @@
+# mypy: disable-error-code=import-not-found
+"""Compare recall@k, resident memory and query latency of the NumpyVectorStore quantization options.
+
+The corpus is the civil and criminal law embeddings: a NumpyVectorStore directory or a Chroma persist
+directory per argument. When none of them holds embeddings (the repository ships the SQLite stores only),
+a clustered synthetic corpus of the same number of chunks and the DashScope dimension is used instead.
+Queries are corpus rows with noise, recall@k is measured against the float32 exact search.
+
+Usage: PYTHONPATH=. python benchmarks/quantized_vector_benchmark.py [DB/civil_law.db DB/criminal_law.db ...]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+
+from writeworld.core.store.numpy_vector_store import EMBEDDINGS_FILE, NumpyVectorStore, normalize_rows
+
+DIMENSION = 1536
+TOP_K = 10
+CONFIGS: Dict[str, Dict[str, object]] = {
+    "float32": {},
+    "int8": {"quantization": "int8"},
+    "int8 + rescore 50": {"quantization": "int8", "rescore": 50},
+    "pq m=96": {"quantization": "pq", "pq_m": 96},
+    "pq m=96 + rescore 100": {"quantization": "pq", "pq_m": 96, "rescore": 100},
+}
+
+
+def load_embeddings(paths: List[str]) -> np.ndarray:
+    matrices = []
+    for path in paths:
+        if os.path.exists(os.path.join(path, EMBEDDINGS_FILE)):
+            matrices.append(np.load(os.path.join(path, EMBEDDINGS_FILE)))
+        elif os.path.exists(os.path.join(path, "chroma.sqlite3")):
+            import chromadb
+
+            client = chromadb.PersistentClient(path=path)
+            for collection in client.list_collections():
+                embeddings = client.get_collection(collection.name).get(include=["embeddings"])["embeddings"]
+                if embeddings is not None and len(embeddings):
+                    matrices.append(np.asarray(embeddings, dtype=np.float32))
+    return np.vstack(matrices) if matrices else np.zeros((0, DIMENSION), dtype=np.float32)
+
+
+def synthetic_embeddings(rows: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(rows // 20, 1), DIMENSION))
+    noise = rng.normal(size=(rows, DIMENSION))
+    return (centers[rng.integers(0, len(centers), rows)] + 0.8 * noise).astype(np.float32)
+
+
+def corpus_size() -> int:
+    rows = 0
+    for db_path in ("DB/civil_law_sqlite.db", "DB/criminal_law_sqlite.db"):
+        if os.path.exists(db_path):
+            rows += sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    return rows or 5000
+
+
+def resident_bytes(store: NumpyVectorStore) -> int:
+    """Bytes a query scans: the codes and their parameters, or the float32 matrix."""
+    if store.quantized is None:
+        return store.embeddings.nbytes
+    return sum(array.nbytes for array in store.quantized.values())
+
+
+def main() -> None:
+    paths = sys.argv[1:] or ["DB/civil_law.db", "DB/criminal_law.db"]
+    matrix = load_embeddings(paths)
+    if len(matrix):
+        print(f"corpus: {len(matrix)} embeddings of {matrix.shape[1]} dimensions from {', '.join(paths)}")
+    else:
+        matrix = synthetic_embeddings(corpus_size())
+        print(f"corpus: no embeddings in {', '.join(paths)}, {len(matrix)} synthetic clustered vectors")
+    rng = np.random.default_rng(1)
+    queries = normalize_rows(matrix[rng.choice(len(matrix), 100)] + 0.3 * rng.normal(size=(100, matrix.shape[1])))
+    documents = [Document(id=str(i), text=str(i), embedding=row.tolist()) for i, row in enumerate(matrix)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        NumpyVectorStore(name="benchmark", persist_path=tmp_dir).upsert_document(documents)
+        expected: List[List[str]] = []
+        print(f"{'config':<24}{'recall@10':>10}{'memory MB':>12}{'build s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, options in CONFIGS.items():
+            for file_name in ("codes.npy", "quantizer.npz"):
+                if os.path.exists(os.path.join(tmp_dir, file_name)):
+                    os.remove(os.path.join(tmp_dir, file_name))
+            start = time.perf_counter()
+            store = NumpyVectorStore(name="benchmark", persist_path=tmp_dir, **options)
+            store._new_client()
+            build = time.perf_counter() - start
+
+            latencies, results = [], []
+            for query in queries:
+                start = time.perf_counter()
+                docs = store.query(Query(embeddings=[query.tolist()], similarity_top_k=TOP_K))
+                latencies.append((time.perf_counter() - start) * 1000)
+                results.append([doc.id for doc in docs])
+            if not expected:
+                expected = results
+            recall = statistics.mean(len(set(r) & set(e)) / TOP_K for r, e in zip(results, expected))
+            latencies.sort()
+            print(
+                f"{name:<24}{recall:>10.3f}{resident_bytes(store) / 2**20:>12.1f}{build:>10.2f}"
+                f"{statistics.median(latencies):>10.2f}{latencies[int(len(latencies) * 0.99) - 1]:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# mypy: disable-error-code=import-not-found
+"""A traffic spike from several worker processes through one shared `RateLimiter`.
+
+Every process runs `--threads` threads, each making calls as fast as the limiter lets it; a call holds
+its slot for `--hold` seconds, like an LLM answering. The report gives the rate and the peak
+concurrency the processes reached together, next to the configured limits, the time the calls queued,
+and the cost of an uncontended acquire and release.
+
+Usage: PYTHONPATH=. python benchmarks/rate_limiter_benchmark.py [--processes 5] [--threads 4] [--rpm 600]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from writeworld.util.rate_limiter import RateLimiter
+
+
+def worker(db_path: str, args: argparse.Namespace, concurrent: Any, peak: Any, queue: Any) -> None:
+    limiter = RateLimiter(db_path)
+    deadline = time.monotonic() + args.seconds
+
+    def calls() -> List[float]:
+        waits = []
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            try:
+                lease = limiter.acquire(
+                    "spike", max_wait=args.max_wait, requests_per_minute=args.rpm, max_concurrency=args.concurrency
+                )
+            except TimeoutError:
+                continue
+            waits.append(time.monotonic() - start)
+            with concurrent.get_lock():
+                concurrent.value += 1
+                peak.value = max(peak.value, concurrent.value)
+            time.sleep(args.hold)
+            with concurrent.get_lock():
+                concurrent.value -= 1
+            lease.release()
+        return waits
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(lambda _: calls(), range(args.threads)))
+    queue.put([wait for waits in results for wait in waits])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--hold", type=float, default=0.2)
+    parser.add_argument("--max-wait", type=float, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    db_path = os.path.join(tempfile.mkdtemp(), "limits.db")
+
+    limiter = RateLimiter(db_path)
+    start = time.perf_counter()
+    for _ in range(200):
+        limiter.acquire("uncontended", max_concurrency=1000, requests_per_minute=1e9).release()
+    overhead = (time.perf_counter() - start) / 200
+
+    context = multiprocessing.get_context("fork")
+    concurrent, peak, queue = context.Value("i", 0), context.Value("i", 0), context.Queue()
+    processes = [
+        context.Process(target=worker, args=(db_path, args, concurrent, peak, queue)) for _ in range(args.processes)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    waits = [wait for _ in processes for wait in queue.get()]
+    for process in processes:
+        process.join()
+    # the calls queued at the end of the spike run past `--seconds`.
+    elapsed = time.perf_counter() - start
+
+    stats = limiter.stats()["spike"]
+    print(f"{args.processes} processes x {args.threads} threads, {stats['acquired']} calls in {elapsed:.1f}s")
+    rate = args.rpm / 60
+    print(f"limits:   {rate:.1f} requests/s after a burst of {max(1, rate):.0f}, {args.concurrency} at once")
+    print(f"observed: {stats['acquired'] / elapsed:.1f} requests/s, peak {peak.value} at once")
+    p95 = sorted(waits)[int(len(waits) * 0.95)]
+    print(
+        f"queued:   p50 {statistics.median(waits) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+        f"{stats['throttled_seconds']:.1f}s throttled in total, {stats['timeouts']} timed out"
+    )
+    print(f"uncontended acquire and release: {overhead * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
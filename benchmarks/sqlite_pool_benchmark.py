@@ -0,0 +1,135 @@
+# mypy: disable-error-code=import-not-found
+"""Read latency of the SQLite stores while an ingestion writes to them.
+
+A copy of a store database is queried by reader threads (keyword lookups of the inverted index and
+document fetches, the queries of the BM25 stores) while a writer thread inserts documents in batches.
+Two setups are compared: one default sqlite3 connection shared behind a lock with the rollback
+journal, as the agentUniverse SQLiteStore opens it, and the writeworld SQLite pool (WAL, per-thread
+readers, one writer).
+
+Usage: PYTHONPATH=. python benchmarks/sqlite_pool_benchmark.py [DB/civil_law_sqlite.db] [--readers 8] [--seconds 5]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List
+
+from writeworld.util.sqlite_pool import SQLitePool
+
+BATCH = 200
+INSERT_DOCUMENT = "INSERT INTO documents (id, text, word_count, metadata) VALUES (?, ?, 10, '{}')"
+INSERT_TERM = "INSERT INTO inverted_index (term, doc_id) VALUES (?, ?)"
+
+
+class SharedConnection:
+    """The baseline: one connection with the default journal, serialized by a lock."""
+
+    def __init__(self, db_path: str) -> None:
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        with self.lock:
+            yield self.conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        with self.lock, self.conn:
+            yield self.conn
+
+
+def prepare(source: str, tmp_dir: str) -> str:
+    path = os.path.join(tmp_dir, "store.db")
+    if os.path.exists(source):
+        shutil.copy(source, path)
+    with sqlite3.connect(path) as conn:
+        # the tables of the agentUniverse SQLiteStore, filled with synthetic articles for a missing database.
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, text TEXT, word_count INT, metadata TEXT)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS inverted_index (term TEXT, doc_id TEXT)")
+        if conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 0:
+            for i in range(5000):
+                conn.execute(INSERT_DOCUMENT, (f"doc-{i}", f"第{i}条 " * 20))
+                conn.execute(INSERT_TERM, (f"term-{i % 500}", f"doc-{i}"))
+    return path
+
+
+def run(
+    name: str, read: Callable[[], ContextManager[Any]], write: Callable[[], ContextManager[Any]], args: Any
+) -> Dict[str, float]:
+    with read() as conn:
+        terms = [row[0] for row in conn.execute("SELECT DISTINCT term FROM inverted_index LIMIT 500")]
+    stop = threading.Event()
+    latencies: List[float] = []
+    written = [0]
+
+    def reader(offset: int) -> None:
+        i = offset
+        while not stop.is_set():
+            start = time.perf_counter()
+            with read() as conn:
+                ids = [row[0] for row in conn.execute("SELECT doc_id FROM inverted_index WHERE term = ?", (terms[i],))]
+                conn.execute(f"SELECT text FROM documents WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+            i = (i + 1) % len(terms)
+
+    def writer() -> None:
+        while not stop.is_set():
+            with write() as conn:
+                for _ in range(BATCH):
+                    doc_id = f"{name}-{written[0]}"
+                    conn.execute(INSERT_DOCUMENT, (doc_id, "新增条文 " * 50))
+                    conn.execute(INSERT_TERM, (terms[written[0] % len(terms)], doc_id))
+                    written[0] += 1
+
+    threads = [threading.Thread(target=reader, args=(i * 7,)) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "reads/s": len(latencies) / args.seconds,
+        "p50 ms": statistics.median(latencies),
+        "p99 ms": latencies[int(len(latencies) * 0.99) - 1],
+        "writes/s": written[0] / args.seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("database", nargs="?", default="DB/civil_law_sqlite.db")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("shared connection", "sqlite pool"):
+            directory = os.path.join(tmp_dir, name.replace(" ", "_"))
+            os.makedirs(directory)
+            path = prepare(args.database, directory)
+            if name == "shared connection":
+                store: Any = SharedConnection(path)
+            else:
+                store = SQLitePool(path)
+            results[name] = run(name.replace(" ", "_"), store.read, store.write, args)
+    print(f"{args.readers} readers and one writer for {args.seconds:g}s on {args.database}")
+    print(f"{'setup':<20}" + "".join(f"{column:>12}" for column in next(iter(results.values()))))
+    for name, row in results.items():
+        print(f"{name:<20}" + "".join(f"{value:>12.2f}" for value in row.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# mypy: disable-error-code=import-not-found
+"""Streaming through the OpenAI client against the local stub LLM, without network.
+
+Concurrent streamed completions of `StubOpenAILLM` on an in-process `StubLLMServer`. The report gives
+the time to first token and the token rate the client observes, next to the ones the stub models,
+so the overhead of the client, the SSE parsing and the threads of the server shows up. Agents,
+planners and workflows run offline the same way, with `llm_model: {name: stub_llm}` in their yaml
+and `stub_search_tool` in place of the search tools.
+
+Usage: PYTHONPATH=. python benchmarks/stub_llm_benchmark.py [--streams 32] [--calls 4] [--ttft 0.3] [--tps 60]
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from agentuniverse.base.config.component_configer.configers.llm_configer import LLMConfiger
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.core.llm.stub_llm import StubOpenAILLM
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def stream(llm: StubOpenAILLM, index: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    first, tokens = 0.0, 0
+    try:
+        for _ in llm.call(messages=[{"role": "user", "content": f"第{index}条的含义是什么？"}], streaming=True):
+            tokens += 1
+            if tokens == 1:
+                first = time.perf_counter() - start
+    except Exception:
+        # the simulated errors left after the retries of the client.
+        return {"error": 1}
+    return {"ttft": first, "total": time.perf_counter() - start, "tokens": tokens, "error": 0}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=32)
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tps", type=float, default=60)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    configer = Configer(path="writeworld/core/llm/stub_llm.yaml").load()
+    configer.value["stub"] = {
+        "ttft": args.ttft,
+        "tokens_per_second": args.tps,
+        "completion_tokens": args.tokens,
+        "error_rate": args.error_rate,
+    }
+    llm = StubOpenAILLM()
+    llm.initialize_by_component_configer(LLMConfiger().load_by_configer(configer))
+
+    # the OpenAI client of the LLM is created by its first call.
+    stream(llm, -1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.streams) as executor:
+        results = list(executor.map(lambda i: stream(llm, i), range(args.streams * args.calls)))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(result["error"] for result in results)
+    results = [result for result in results if not result["error"]]
+    ttfts = [result["ttft"] for result in results]
+    rates = [(result["tokens"] - 1) / (result["total"] - result["ttft"]) for result in results if result["tokens"] > 1]
+    tokens = sum(result["tokens"] for result in results)
+    streams = len(results) + errors
+    print(f"{streams} streams, {args.streams} at once, {errors} failed, {tokens} tokens in {elapsed:.2f}s")
+    print(f"modelled: ttft {args.ttft * 1000:.0f} ms, {args.tps:.0f} tokens/s per stream")
+    print(
+        f"observed: ttft p50 {statistics.median(ttfts) * 1000:.0f} ms, p95 {percentile(ttfts, 0.95) * 1000:.0f} ms, "
+        f"{statistics.median(rates):.1f} tokens/s per stream, {tokens / elapsed:.0f} tokens/s in total"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding:utf-8 -*-
 import os
+from functools import partial
 from pathlib import Path
 
+from agentuniverse.agent_serve.web.flask_server import app
 from agentuniverse.agent_serve.web.web_booster import start_web_server
 from agentuniverse.base.agentuniverse import AgentUniverse
+from agentuniverse.llm.llm_manager import LLMManager
+
+from writeworld.api.routes import readiness
+from writeworld.core.doc_processor.warm_keyword_extractor import warm_jieba
+from writeworld.util.component_manifest import default_manifest_path, install_manifest
+from writeworld.util.prewarm import preload, register_preload
 
 
 class ServerApplication:
@@ -16,9 +24,27 @@ class ServerApplication:
         # Get the project root directory (two levels up from this file)
         project_root = Path(__file__).parent.parent
         config_path = project_root / "config" / "config.toml"
+        # component scanning reads the yaml of unchanged packages from the manifest.
+        manifest = install_manifest(default_manifest_path(str(config_path)))
         AgentUniverse().start(config_path=str(config_path))
+        manifest.save()
+        readiness.register_routes(app)
+        cls.preload()
         start_web_server()
 
+    @classmethod
+    def preload(cls) -> None:
+        """Load the read-only state of the workers in the master, so they share it after the fork.
+
+        The component registry and the prompts are built by the start above, the stores with
+        `preload: true` registered their loaders when they were built.
+        """
+        register_preload("jieba", warm_jieba)
+        # tiktoken keeps the encodings it loaded in a module cache.
+        for llm in {id(llm): llm for llm in LLMManager().get_instance_obj_list()}.values():
+            register_preload(f"tokenizer of {llm.name}", partial(llm.get_num_tokens, ""))
+        preload()
+
 
 if __name__ == "__main__":
     # Change working directory to bootstrap to satisfy agentuniverse's requirement
@@ -0,0 +1,88 @@
+# mypy: disable-error-code=import-not-found
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+
+from writeworld.core.doc_processor.local_reranker import (
+    LocalReranker,
+    bm25_scores,
+    cosine_scores,
+)
+
+
+def docs(*texts: str) -> List[Document]:
+    return [Document(text=text, metadata={"file_name": "刑法.pdf"}) for text in texts]
+
+
+def test_bm25_prefers_rare_keyword_matches() -> None:
+    scores = bm25_scores(["防卫", "过当"], [["防卫", "过当"], ["防卫"], ["合同"]])
+
+    assert scores[0] > scores[1] > scores[2] == 0
+
+
+def test_cosine_scores() -> None:
+    scores = cosine_scores([1.0, 0.0], [[2.0, 0.0], [0.0, 3.0], [1.0, 1.0]])
+
+    np.testing.assert_allclose(scores, [1.0, 0.0, np.sqrt(0.5)], rtol=1e-6)
+
+
+def test_prunes_to_top_n_with_bm25_only() -> None:
+    reranker = LocalReranker(top_n=2)
+    candidates = docs("合同的订立", "正当防卫不负刑事责任", "防卫过当应当负刑事责任")
+
+    result = reranker.process_docs(candidates, Query(query_str="防卫过当", keywords={"防卫过当", "防卫"}))
+
+    assert [d.text for d in result] == ["防卫过当应当负刑事责任", "正当防卫不负刑事责任"]
+    assert result[0].metadata["relevance_score"] >= result[1].metadata["relevance_score"]
+
+
+def test_embedding_cosine_outweighs_bm25() -> None:
+    embedding = MagicMock()
+    embedding.get_embeddings.side_effect = lambda texts, **kwargs: (
+        [[1.0, 0.0]] if kwargs.get("text_type") == "query" else [[0.0, 1.0], [1.0, 0.1]]
+    )
+    reranker = LocalReranker(top_n=2, bm25_weight=0.2, embedding_model="fake_embedding")
+
+    with patch("writeworld.core.doc_processor.local_reranker.EmbeddingManager") as manager:
+        manager.return_value.get_instance_obj.return_value = embedding
+        result = reranker.process_docs(docs("盗窃罪", "盗窃公私财物"), Query(query_str="盗窃", keywords={"盗窃"}))
+
+    assert [d.text for d in result] == ["盗窃公私财物", "盗窃罪"]
+
+
+def test_embedding_failure_falls_back_to_bm25() -> None:
+    reranker = LocalReranker(top_n=1, embedding_model="broken_embedding")
+
+    with patch("writeworld.core.doc_processor.local_reranker.EmbeddingManager") as manager:
+        manager.return_value.get_instance_obj.return_value.get_embeddings.side_effect = RuntimeError("offline")
+        result = reranker.process_docs(docs("合同", "诈骗罪"), Query(query_str="诈骗", keywords={"诈骗"}))
+
+    assert [d.text for d in result] == ["诈骗罪"]
+
+
+def test_default_reranker_embeds_nothing() -> None:
+    reranker = LocalReranker(top_n=2, bm25_weight=0.2)
+    candidates = docs("盗窃罪", "盗窃公私财物")
+    candidates[0].embedding, candidates[1].embedding = [0.0, 1.0], [1.0, 0.1]
+
+    with patch("writeworld.core.doc_processor.local_reranker.EmbeddingManager") as manager:
+        result = reranker.process_docs(candidates, Query(query_str="盗窃", keywords={"盗窃"}, embeddings=[[1.0, 0.0]]))
+        bm25_only = LocalReranker(top_n=2).process_docs(docs("盗窃罪", "合同"), Query(query_str="盗窃"))
+
+    manager.assert_not_called()
+    assert [d.text for d in result] == ["盗窃公私财物", "盗窃罪"]
+    assert [d.text for d in bm25_only] == ["盗窃罪", "合同"]
+
+
+def test_candidates_without_embedding_rank_on_bm25() -> None:
+    reranker = LocalReranker(top_n=3, bm25_weight=0.2)
+    candidates = docs("盗窃罪", "盗窃公私财物", "盗窃")
+    candidates[0].embedding, candidates[1].embedding = [0.0, 1.0], [1.0, 0.1]
+
+    result = reranker.process_docs(candidates, Query(query_str="盗窃", keywords={"盗窃"}, embeddings=[[1.0, 0.0]]))
+
+    assert [d.text for d in result] == ["盗窃公私财物", "盗窃", "盗窃罪"]
+    assert all(np.isfinite(d.metadata["relevance_score"]) for d in result)
@@ -0,0 +1,63 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+import os
+from pathlib import Path
+
+import jieba
+import pytest
+from agentuniverse.agent.action.knowledge.doc_processor.jieba_keyword_extractor import (
+    JiebaKeywordExtractor,
+)
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+from writeworld.core.doc_processor.warm_keyword_extractor import (
+    WarmKeywordExtractor,
+    load_idf,
+    warm_jieba,
+)
+
+TEXTS = [
+    "当事人一方不履行合同义务，应当承担违约责任。",
+    "为了使本人免受正在进行的不法侵害，而采取的制止不法侵害的行为，属于正当防卫。",
+    "当事人一方不履行合同义务，应当承担违约责任。",
+]
+
+
+def test_extracts_like_the_jieba_keyword_extractor() -> None:
+    extractor = WarmKeywordExtractor(name="warm_keyword_extractor", top_k=3)
+    expected = JiebaKeywordExtractor(name="jieba_keyword_extractor", top_k=3).process_docs(
+        [Document(text=text) for text in TEXTS]
+    )
+
+    docs = extractor.process_docs([Document(text=text) for text in TEXTS])
+
+    assert [doc.keywords for doc in docs] == [doc.keywords for doc in expected]
+    assert extractor.extract_many(TEXTS) == [extractor.extract(text) for text in TEXTS]
+    assert extractor.extract_many([]) == []
+
+
+def test_dictionary_is_loaded_from_the_serialized_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache_path = tmp_path / "jieba.cache"
+    monkeypatch.setattr(jieba, "dt", jieba.Tokenizer())
+    warm_jieba(str(cache_path))
+    assert jieba.dt.initialized
+    assert cache_path.exists()
+
+    monkeypatch.setattr(jieba, "dt", jieba.Tokenizer())
+    warm_jieba(str(cache_path))
+    assert jieba.dt.initialized
+    assert jieba.dt.cache_file == str(cache_path)
+
+
+def test_custom_idf_table_is_serialized(tmp_path: Path) -> None:
+    idf_path = tmp_path / "idf.txt"
+    idf_path.write_text("合同 2.0\n违约 8.0\n防卫 5.0\n", encoding="utf-8")
+
+    assert load_idf(str(idf_path)) == ({"合同": 2.0, "违约": 8.0, "防卫": 5.0}, 5.0)
+    assert os.path.exists(str(idf_path) + ".pkl")
+    assert load_idf(str(idf_path)) == ({"合同": 2.0, "违约": 8.0, "防卫": 5.0}, 5.0)
+
+    extractor = WarmKeywordExtractor(name="law_keyword_extractor", top_k=1, idf_path=str(idf_path))
+    extractor.warm()
+    assert extractor.extract("当事人违约合同") == ["违约"]
+    assert extractor.tfidf is not None and jieba.analyse.default_tfidf.idf_freq is not extractor.tfidf.idf_freq
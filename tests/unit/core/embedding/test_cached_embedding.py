@@ -0,0 +1,79 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import patch
+
+from writeworld.core.embedding.cached_embedding import CachedEmbedding
+from writeworld.core.embedding.embedding_cache import RECORD, EmbeddingCache
+
+
+class FakeEmbedding:
+    embedding_model_name = "fake-model"
+    embedding_dims = None
+
+    def __init__(self) -> None:
+        self.calls: List[List[str]] = []
+
+    def get_embeddings(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        self.calls.append(texts)
+        offset = 100.0 if kwargs.get("text_type") == "query" else 0.0
+        return [[float(len(text)) + offset, 1.0] for text in texts]
+
+
+def test_cache_is_shared_between_instances(tmp_path: Path) -> None:
+    writer = EmbeddingCache(str(tmp_path), "model")
+    reader = EmbeddingCache(str(tmp_path), "model")
+    digest = EmbeddingCache.digest("盗窃罪")
+    assert reader.get_many([digest]) == [None]
+
+    writer.put_many([digest], [[0.5, 0.25, 0.125]])
+
+    vector = reader.get_many([digest])[0]
+    assert vector is not None and vector.tolist() == [0.5, 0.25, 0.125]
+    assert len(reader) == 1
+
+
+def test_torn_index_record_is_ignored(tmp_path: Path) -> None:
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many([EmbeddingCache.digest("a")], [[1.0]])
+    with open(cache.index_path, "ab") as index_file:
+        index_file.write(b"\0" * (RECORD.size // 2))
+
+    cache.put_many([EmbeddingCache.digest("b")], [[2.0, 3.0]])
+
+    reopened = EmbeddingCache(str(tmp_path), "model")
+    vectors = reopened.get_many([EmbeddingCache.digest("a"), EmbeddingCache.digest("b")])
+    assert [vector.tolist() for vector in vectors if vector is not None] == [[1.0], [2.0, 3.0]]
+
+
+def test_torn_data_write_is_dropped(tmp_path: Path) -> None:
+    cache = EmbeddingCache(str(tmp_path), "model")
+    cache.put_many([EmbeddingCache.digest("a")], [[1.0]])
+    with open(cache.data_path, "ab") as data_file:
+        # a crashed writer: one whole vector without its record, then half a float.
+        data_file.write(b"\0" * 10)
+
+    reader = EmbeddingCache(str(tmp_path), "model")
+    assert [vector.tolist() for vector in reader.get_many([EmbeddingCache.digest("a")]) if vector is not None] == [
+        [1.0]
+    ]
+    EmbeddingCache(str(tmp_path), "model").put_many([EmbeddingCache.digest("b")], [[2.0, 3.0]])
+
+    vectors = reader.get_many([EmbeddingCache.digest("a"), EmbeddingCache.digest("b")])
+    assert [vector.tolist() for vector in vectors if vector is not None] == [[1.0], [2.0, 3.0]]
+
+
+def test_only_missing_texts_are_embedded(tmp_path: Path) -> None:
+    inner = FakeEmbedding()
+    embedding = CachedEmbedding(name="cached", embedding="fake", cache_dir=str(tmp_path))
+
+    with patch("writeworld.core.embedding.cached_embedding.EmbeddingManager") as manager:
+        manager.return_value.get_instance_obj.return_value = inner
+        first = embedding.get_embeddings(["a", "bb", "a"])
+        second = embedding.get_embeddings(["bb", "ccc"])
+        query = embedding.get_embeddings(["a"], text_type="query")
+
+    assert inner.calls == [["a", "bb"], ["ccc"], ["a"]]
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0]]
+    assert query == [[101.0, 1.0]]
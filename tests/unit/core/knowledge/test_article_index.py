@@ -0,0 +1,111 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from writeworld.core.knowledge.article_index import ArticleIndex, parse_numeral
+from writeworld.core.knowledge.law_knowledge import LawKnowledge
+
+CODES = {"民法典": ["民法典", "民法"], "刑法": ["刑法"]}
+CRIMINAL_LAW = """中华人民共和国刑法
+第四章　侵犯公民人身权利、民主权利罪
+第二百三十二条　故意杀人的，处死刑、无期徒刑或者十年以上有期徒刑；
+情节较轻的，处三年以上十年以下有期徒刑。
+第二百三十三条　过失致人死亡的，处三年以上七年以下有期徒刑。
+第二百三十四条　故意伤害他人身体的，处三年以下有期徒刑、拘役或者管制。
+犯前款罪，致人重伤的，处三年以上十年以下有期徒刑；本法另有规定的，依照规定。
+"""
+CRIMINAL_LAW_NEXT_PAGE = """致人死亡的，处十年以上有期徒刑、无期徒刑或者死刑。
+第二百三十四条之一　组织他人出卖人体器官的，处五年以下有期徒刑。
+第二百三十二条　本款引用不是新的条文。
+第五章　侵犯财产罪
+第二百三十五条　过失伤害他人致人重伤的，处三年以下有期徒刑或者拘役。
+"""
+
+
+@pytest.fixture
+def index(tmp_path: Path) -> ArticleIndex:
+    index = ArticleIndex(str(tmp_path / "articles.json"), CODES)
+    index.add_text("刑法.pdf", CRIMINAL_LAW)
+    index.add_text("刑法.pdf", CRIMINAL_LAW_NEXT_PAGE)
+    return index
+
+
+@pytest.mark.parametrize(
+    "numeral, value",
+    [
+        ("234", 234),
+        ("十五", 15),
+        ("二十", 20),
+        ("一百零一", 101),
+        ("二百三十四", 234),
+        ("一千零四十三", 1043),
+        ("一千二百六十", 1260),
+        ("两万零一", 20001),
+    ],
+)
+def test_parse_numeral(numeral: str, value: int) -> None:
+    assert parse_numeral(numeral) == value
+
+
+def test_articles_continue_across_parts(index: ArticleIndex) -> None:
+    docs = index.lookup("刑法第234条")
+    assert docs is not None and len(docs) == 1
+    assert docs[0].text.startswith("第二百三十四条　故意伤害")
+    assert docs[0].text.endswith("处十年以上有期徒刑、无期徒刑或者死刑。")
+    assert docs[0].metadata == {"file_name": "刑法.pdf", "code": "刑法", "article": "234"}
+
+    sub_article = index.lookup("刑法第二百三十四条之一")
+    assert sub_article is not None
+    assert "本款引用不是新的条文" in sub_article[0].text
+    assert "第五章" not in sub_article[0].text
+
+
+@pytest.mark.parametrize(
+    "query_str, articles",
+    [
+        ("刑法第二百三十二条", ["232"]),
+        ("《中华人民共和国刑法》第233条的规定是什么？", ["233"]),
+        ("刑法第232条至第234条", ["232", "233", "234"]),
+        ("刑法第二百三十四条到第二百三十五条", ["234", "234-1", "235"]),
+        ("刑法第232条、第235条", ["232", "235"]),
+    ],
+)
+def test_lookup_exact_and_range_queries(index: ArticleIndex, query_str: str, articles: List[str]) -> None:
+    docs = index.lookup(query_str)
+    assert docs is not None
+    assert [doc.metadata["article"] for doc in docs] == articles
+
+
+@pytest.mark.parametrize(
+    "query_str", ["刑法第234条中的轻伤如何认定", "第234条", "刑法第999条", "民法典第一千零四十三条", "故意伤害怎么判"]
+)
+def test_other_queries_are_left_to_retrieval(index: ArticleIndex, query_str: str) -> None:
+    assert index.lookup(query_str) is None
+
+
+def test_saved_index_is_reloaded(index: ArticleIndex, tmp_path: Path) -> None:
+    index.save()
+    reloaded = ArticleIndex(str(tmp_path / "articles.json"), CODES)
+    assert reloaded.articles == index.articles
+    assert reloaded.last == {"刑法": (235, 0)}
+
+    reloaded.reset("刑法.pdf")
+    reloaded.add_text("刑法.pdf", "第一条　为了惩罚犯罪，保护人民，制定本法。")
+    reloaded.save()
+    docs = index.lookup("刑法第一条")
+    assert docs is not None and docs[0].text == "第一条　为了惩罚犯罪，保护人民，制定本法。"
+    assert index.lookup("刑法第232条") is None
+
+
+def test_law_knowledge_answers_article_queries_without_retrieval(index: ArticleIndex) -> None:
+    knowledge = LawKnowledge(name="law_knowledge", stores=["criminal_law_sqlite_store"], article_index=index)
+    with patch.object(LawKnowledge, "_default_query", side_effect=AssertionError("retrieval called")):
+        docs = knowledge.query_knowledge(query_str="刑法第233条")
+    assert [doc.metadata["article"] for doc in docs] == ["233"]
+
+    with patch.object(LawKnowledge, "_default_query", return_value=[]) as retrieval:
+        knowledge.query_knowledge(query_str="过失致人死亡怎么判")
+    retrieval.assert_called_once()
@@ -0,0 +1,45 @@
+# mypy: disable-error-code=import-not-found
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+from writeworld.core.knowledge.context_packer import ContextPacker, estimate_tokens
+
+ARTICLE = "第二十条 为了使国家、公共利益、本人或者他人的人身、财产和其他权利免受正在进行的不法侵害，而采取的制止不法侵害的行为，对不法侵害人造成损害的，属于正当防卫，不负刑事责任。"
+
+
+def doc(text: str, file_name: str = "刑法.pdf") -> Document:
+    return Document(text=text, metadata={"file_name": file_name})
+
+
+def test_drops_contained_and_near_duplicate_chunks() -> None:
+    packer = ContextPacker()
+
+    packed = packer.pack([doc(ARTICLE), doc(ARTICLE[10:60]), doc(ARTICLE[:-1] + "！"), doc(ARTICLE, "民法典.pdf")])
+
+    assert packed == f"[1] 刑法.pdf\n{ARTICLE}\n\n[2] 民法典.pdf\n{ARTICLE}"
+
+
+def test_merges_overlapping_chunks_of_the_same_article_in_either_order() -> None:
+    packer = ContextPacker(min_overlap=10)
+    head, tail = ARTICLE[:60], ARTICLE[45:]
+
+    assert packer.pack([doc(head), doc(tail)]) == f"[1] 刑法.pdf\n{ARTICLE}"
+    assert packer.pack([doc(tail), doc(head)]) == f"[1] 刑法.pdf\n{ARTICLE}"
+
+
+def test_merges_continuations_but_not_a_new_article() -> None:
+    packer = ContextPacker(min_overlap=2)
+    head = "第十九条 已满七十五周岁的人故意犯罪的，可以从轻或者减轻处罚。"
+
+    continuation = packer.passages([doc(head), doc("处罚。第二十条 为了使国家")])
+
+    assert [p.text for p in continuation] == [head + "第二十条 为了使国家"]
+    assert len(packer.passages([doc(head), doc("第二十条 处罚。为了使国家")])) == 2
+
+
+def test_fills_the_budget_in_rank_order() -> None:
+    first, second, third = "第一条 " + "甲" * 40, "第二条 " + "乙" * 80, "第三条 " + "丙" * 10
+    budget = estimate_tokens(f"[1] 刑法.pdf\n{first}") + estimate_tokens(f"[2] 刑法.pdf\n{third}") + 2
+
+    packed = ContextPacker(token_budget=budget).pack([doc(first), doc(second), doc(third)])
+
+    assert packed == f"[1] 刑法.pdf\n{first}\n\n[2] 刑法.pdf\n{third}"
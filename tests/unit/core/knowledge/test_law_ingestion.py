@@ -0,0 +1,160 @@
+# mypy: disable-error-code=import-not-found
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+from writeworld.core.knowledge.article_index import ArticleIndex
+from writeworld.core.knowledge.law_ingestion import (
+    ChunkManifest,
+    IngestionCheckpoint,
+    LawIngestion,
+    fingerprint,
+)
+
+
+class FakeStore:
+    def __init__(self, embedding_model: Any = None, fail_on_call: int = 0) -> None:
+        self.embedding_model = embedding_model
+        self.calls: List[List[Document]] = []
+        self.deleted: List[str] = []
+        self.fail_on_call = fail_on_call
+
+    def delete_document(self, document_id: str) -> None:
+        self.deleted.append(document_id)
+
+    def upsert_document(self, documents: List[Document]) -> None:
+        if len(self.calls) + 1 == self.fail_on_call:
+            self.fail_on_call = 0
+            raise RuntimeError("disk full")
+        self.calls.append(documents)
+
+
+def fake_extract(file_path: str, start: int, end: int) -> Tuple[int, int, List[Document], str]:
+    docs = [Document(text=f"page {page} chunk {i}") for page in range(start, end) for i in range(2)]
+    return start, end, docs, "\n".join(f"第{page + 1}条　page {page}" for page in range(start, end))
+
+
+@pytest.fixture
+def pdf(tmp_path: Path) -> str:
+    path = tmp_path / "民法典.pdf"
+    path.write_bytes(b"%PDF")
+    return str(path)
+
+
+def run(
+    pdf: str,
+    stores: Dict[str, Any],
+    checkpoint: IngestionCheckpoint,
+    embedding: MagicMock,
+    article_index: Optional[ArticleIndex] = None,
+    manifest: Optional[ChunkManifest] = None,
+    extract: Any = fake_extract,
+) -> LawIngestion:
+    knowledge = MagicMock(stores=list(stores), insert_processors=[], article_index=article_index)
+    with (
+        patch("writeworld.core.knowledge.law_ingestion.StoreManager") as store_manager,
+        patch("writeworld.core.knowledge.law_ingestion.EmbeddingManager") as embedding_manager,
+        patch("writeworld.core.knowledge.law_ingestion.count_pages", return_value=5),
+        patch("writeworld.core.knowledge.law_ingestion.extract_pages", side_effect=extract),
+    ):
+        store_manager.return_value.get_instance_obj.side_effect = stores.get
+        embedding_manager.return_value.get_instance_obj.return_value = embedding
+        ingestion = LawIngestion(
+            knowledge, checkpoint, batch_size=3, concurrency=2, workers=0, pages_per_task=2, manifest=manifest
+        )
+        ingestion.ingest([pdf])
+    return ingestion
+
+
+def test_batches_embeddings_and_writes_every_store(pdf: str, tmp_path: Path) -> None:
+    embedding = MagicMock()
+    embedding.get_embeddings.side_effect = lambda texts: [[float(len(text))] for text in texts]
+    stores = {"vector": FakeStore("embedding"), "keyword": FakeStore()}
+
+    ingestion = run(pdf, stores, IngestionCheckpoint(str(tmp_path / "checkpoint.json")), embedding)
+
+    assert (ingestion.pages, ingestion.chunks) == (5, 10)
+    assert [len(call.args[0]) for call in embedding.get_embeddings.call_args_list] == [3, 1, 3, 1, 2]
+    assert [len(docs) for docs in stores["vector"].calls] == [4, 4, 2]
+    assert all(doc.embedding for docs in stores["vector"].calls for doc in docs)
+    assert not any(doc.embedding for docs in stores["keyword"].calls for doc in docs)
+
+
+def test_resumes_from_the_last_checkpointed_page(pdf: str, tmp_path: Path) -> None:
+    embedding = MagicMock()
+    embedding.get_embeddings.side_effect = lambda texts: [[1.0] for _ in texts]
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    failing = {"vector": FakeStore("embedding", fail_on_call=2)}
+
+    with pytest.raises(RuntimeError):
+        run(pdf, failing, IngestionCheckpoint(checkpoint_path), embedding)
+    assert IngestionCheckpoint(checkpoint_path).pages_done(pdf) == 2
+
+    resumed = {"vector": FakeStore("embedding")}
+    article_index = ArticleIndex(str(tmp_path / "articles.json"), {"民法典": ["民法典"]})
+    ingestion = run(pdf, resumed, IngestionCheckpoint(checkpoint_path), embedding, article_index)
+
+    assert ingestion.pages == 3
+    assert resumed["vector"].calls[0][0].text == "page 2 chunk 0"
+    assert IngestionCheckpoint(checkpoint_path).pages_done(pdf) == 5
+    assert sorted(article_index.articles["民法典"]) == [(3, 0), (4, 0), (5, 0)]
+
+
+def test_builds_the_article_index(pdf: str, tmp_path: Path) -> None:
+    embedding = MagicMock()
+    embedding.get_embeddings.side_effect = lambda texts: [[1.0] for _ in texts]
+    index_path = str(tmp_path / "articles.json")
+    article_index = ArticleIndex(index_path, {"民法典": ["民法典"]})
+
+    run(pdf, {"keyword": FakeStore()}, IngestionCheckpoint(str(tmp_path / "checkpoint.json")), embedding, article_index)
+
+    docs = ArticleIndex(index_path, {"民法典": ["民法典"]}).lookup("民法典第2条至第4条")
+    assert docs is not None
+    assert [doc.text for doc in docs] == ["第2条　page 1", "第3条　page 2", "第4条　page 3"]
+
+
+def amended_extract(file_path: str, start: int, end: int) -> Tuple[int, int, List[Document], str]:
+    """The fake pdf with page 1 amended and the second chunk of page 4 repealed."""
+    start, end, docs, text = fake_extract(file_path, start, end)
+    amended = [Document(text=doc.text.replace("page 1 ", "page 1 amended ")) for doc in docs]
+    return start, end, [doc for doc in amended if doc.text != "page 4 chunk 1"], text
+
+
+def test_reingestion_only_writes_changed_chunks_and_removes_deleted_ones(pdf: str, tmp_path: Path) -> None:
+    embedding = MagicMock()
+    embedding.get_embeddings.side_effect = lambda texts: [[1.0] for _ in texts]
+    manifest = ChunkManifest(str(tmp_path / "manifest.db"))
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint.json"))
+    run(pdf, {"vector": FakeStore("embedding")}, checkpoint, embedding, manifest=manifest)
+
+    os.utime(pdf, ns=(0, 0))
+    stores = {"vector": FakeStore("embedding"), "keyword": FakeStore()}
+    embedding.reset_mock()
+    ingestion = run(pdf, stores, checkpoint, embedding, manifest=manifest, extract=amended_extract)
+
+    assert (ingestion.pages, ingestion.chunks, ingestion.written, ingestion.removed) == (5, 9, 2, 3)
+    assert [doc.text for docs in stores["vector"].calls for doc in docs] == [
+        "page 1 amended chunk 0",
+        "page 1 amended chunk 1",
+    ]
+    assert sum(len(call.args[0]) for call in embedding.get_embeddings.call_args_list) == 2
+    removed = {Document(text=text).id for text in ["page 1 chunk 0", "page 1 chunk 1", "page 4 chunk 1"]}
+    assert set(stores["vector"].deleted) == set(stores["keyword"].deleted) == removed
+    ingestion.knowledge.invalidate_retrieval_cache.assert_called_once()
+
+    os.utime(pdf, ns=(1, 1))
+    unchanged = run(pdf, stores, checkpoint, embedding, manifest=manifest, extract=amended_extract)
+    assert (unchanged.written, unchanged.removed) == (0, 0)
+    unchanged.knowledge.invalidate_retrieval_cache.assert_not_called()
+
+
+def test_fingerprint_ignores_the_page_of_a_chunk() -> None:
+    chunk = Document(text="第一条", metadata={"file_name": "民法典.pdf", "page_label": "1"})
+    moved = Document(text="第一条", metadata={"file_name": "民法典.pdf", "page_label": "2", "score": 0.5})
+
+    assert fingerprint(chunk) == fingerprint(moved)
+    assert fingerprint(chunk) != fingerprint(Document(text="第一条", metadata={"file_name": "刑法.pdf"}))
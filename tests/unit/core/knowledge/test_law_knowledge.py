@@ -0,0 +1,154 @@
+# mypy: disable-error-code=import-not-found
+import time
+from pathlib import Path
+from typing import Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+
+from writeworld.core.knowledge.law_knowledge import LawKnowledge, reciprocal_rank_fusion
+from writeworld.core.knowledge.retrieval_cache import RetrievalCache
+
+
+def doc(text: str, file_name: str = "民法典.pdf") -> Document:
+    return Document(text=text, metadata={"file_name": file_name})
+
+
+class FakeStore:
+    def __init__(self, docs: List[Document], delay: float = 0.0, error: bool = False) -> None:
+        self.docs = docs
+        self.delay = delay
+        self.error = error
+
+    def query(self, query: Query) -> List[Document]:
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError("store down")
+        return self.docs
+
+
+@pytest.fixture
+def knowledge() -> LawKnowledge:
+    knowledge = LawKnowledge()
+    knowledge.retrieval_mode = "fusion"
+    knowledge.store_timeout = 0.2
+    return knowledge
+
+
+def query_with_stores(knowledge: LawKnowledge, stores: Dict[str, FakeStore]) -> List[Document]:
+    tasks = [(Query(query_str="q"), name) for name in stores]
+    with (
+        patch.object(LawKnowledge, "_route_rag", return_value=tasks),
+        patch("writeworld.core.knowledge.law_knowledge.StoreManager") as store_manager,
+        patch("agentuniverse.base.annotation.trace.ConversationMemoryModule"),
+    ):
+        store_manager.return_value.get_instance_obj.side_effect = stores.get
+        return knowledge.query_knowledge(query_str="q")
+
+
+def test_reciprocal_rank_fusion_dedupes_by_text_and_file() -> None:
+    chroma = [doc("第一条"), doc("第二条"), doc("第三条")]
+    sqlite = [doc("第 二条"), doc("第一条", "刑法.pdf")]
+
+    fused = reciprocal_rank_fusion([chroma, sqlite], k=60)
+
+    assert [(d.text, d.metadata["file_name"]) for d in fused] == [
+        ("第二条", "民法典.pdf"),
+        ("第一条", "民法典.pdf"),
+        ("第一条", "刑法.pdf"),
+        ("第三条", "民法典.pdf"),
+    ]
+
+
+def test_fusion_query_merges_all_stores(knowledge: LawKnowledge) -> None:
+    stores = {"chroma": FakeStore([doc("a"), doc("b")]), "sqlite": FakeStore([doc("b"), doc("c")])}
+
+    result = query_with_stores(knowledge, stores)
+
+    assert [d.text for d in result] == ["b", "a", "c"]
+
+
+def test_slow_or_failing_store_degrades_to_partial_results(knowledge: LawKnowledge) -> None:
+    stores = {
+        "fast": FakeStore([doc("a")]),
+        "slow": FakeStore([doc("b")], delay=1.0),
+        "broken": FakeStore([doc("c")], error=True),
+    }
+
+    start = time.time()
+    result = query_with_stores(knowledge, stores)
+
+    assert time.time() - start < 1.0
+    assert [d.text for d in result] == ["a"]
+
+
+def test_store_stuck_past_its_timeout_is_skipped_until_it_finishes(knowledge: LawKnowledge) -> None:
+    stuck = FakeStore([doc("b")], delay=0.5)
+    stores = {"fast": FakeStore([doc("a")]), "stuck": stuck}
+
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a"]
+    stuck.delay = 0.0
+    start = time.time()
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a"]
+    assert time.time() - start < 0.2
+
+    time.sleep(0.5)
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a", "b"]
+
+
+def test_degraded_fusion_query_is_reported_and_not_cached(knowledge: LawKnowledge, tmp_path: Path) -> None:
+    knowledge.stores = ["fast", "broken"]
+    knowledge.retrieval_cache = RetrievalCache(str(tmp_path / "cache.db"))
+    stores = {"fast": FakeStore([doc("a")]), "broken": FakeStore([doc("c")], error=True)}
+
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a"]
+    assert knowledge.retrieval_cache.get("q", knowledge.stores, None) is None
+
+    stores["broken"].error = False
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a", "c"]
+    assert knowledge.retrieval_cache.get("q", knowledge.stores, None) is not None
+
+
+def test_default_mode_reports_failed_store_and_is_not_cached(tmp_path: Path) -> None:
+    knowledge = LawKnowledge(stores=["chroma", "broken"])
+    knowledge.retrieval_cache = RetrievalCache(str(tmp_path / "cache.db"))
+    shared = doc("a")
+    stores = {"chroma": FakeStore([shared, doc("b")]), "broken": FakeStore([shared], error=True)}
+
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a", "b"]
+    assert knowledge.retrieval_cache.get("q", knowledge.stores, None) is None
+
+    stores["broken"].error = False
+    assert [d.text for d in query_with_stores(knowledge, stores)] == ["a", "b"]
+    assert knowledge.retrieval_cache.get("q", knowledge.stores, None) is not None
+
+
+def test_failed_reranker_is_not_cached(knowledge: LawKnowledge, tmp_path: Path) -> None:
+    knowledge.stores = ["chroma"]
+    knowledge.post_processors = ["remote"]
+    knowledge.retrieval_cache = RetrievalCache(str(tmp_path / "cache.db"))
+    remote = MagicMock(top_n=1)
+    remote.process_docs.side_effect = RuntimeError("rerank service down")
+
+    with patch("writeworld.core.knowledge.law_knowledge.DocProcessorManager") as manager:
+        manager.return_value.get_instance_obj.return_value = remote
+        result = query_with_stores(knowledge, {"chroma": FakeStore([doc("a"), doc("b")])})
+
+    assert [d.text for d in result] == ["a"]
+    assert knowledge.retrieval_cache.get("q", knowledge.stores, None) is None
+
+
+def test_failed_reranker_keeps_previous_ranking_cut_to_top_n() -> None:
+    knowledge = LawKnowledge(post_processors=["local", "remote"])
+    local = MagicMock()
+    local.process_docs.side_effect = lambda docs, query: list(reversed(docs))
+    remote = MagicMock(top_n=2)
+    remote.process_docs.side_effect = RuntimeError("rerank service down")
+
+    with patch("writeworld.core.knowledge.law_knowledge.DocProcessorManager") as manager:
+        manager.return_value.get_instance_obj.side_effect = {"local": local, "remote": remote}.get
+        result = knowledge._rag_post_process([doc("a"), doc("b"), doc("c")], Query(query_str="q"))
+
+    assert [d.text for d in result] == ["c", "b"]
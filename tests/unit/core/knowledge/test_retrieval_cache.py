@@ -0,0 +1,71 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+from writeworld.core.knowledge.law_knowledge import LawKnowledge
+from writeworld.core.knowledge.retrieval_cache import RetrievalCache, normalize_query
+
+STORES = ["civil_law_sqlite_store", "criminal_law_sqlite_store"]
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> RetrievalCache:
+    return RetrievalCache(str(tmp_path / "cache.db"), max_entries=2)
+
+
+def test_normalize_query() -> None:
+    assert normalize_query("  什么是  正当防卫？") == normalize_query("什么是 正当防卫")
+    assert normalize_query("ＡＢＣ") == "abc"
+
+
+def test_hit_after_put_with_any_store_order(cache: RetrievalCache) -> None:
+    docs = [Document(text="第二十条", metadata={"file_name": "刑法.pdf"})]
+    assert cache.get("正当防卫", STORES, 3) is None
+
+    cache.put("正当防卫", STORES, 3, docs, cost=1.5)
+
+    hit = cache.get("正当防卫？", list(reversed(STORES)), 3)
+    assert hit is not None
+    assert [(d.id, d.text, d.metadata) for d in hit] == [(d.id, d.text, d.metadata) for d in docs]
+    assert cache.get("正当防卫", STORES, 5) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["saved_seconds"] > 1.0
+
+
+def test_disk_tier_is_shared_and_invalidated_by_reingestion(cache: RetrievalCache) -> None:
+    cache.put("q", STORES, None, [Document(text="a")], cost=0.1)
+
+    other_worker = RetrievalCache(cache.db_path)
+    assert other_worker.get("q", STORES, None) is not None
+
+    other_worker.invalidate_stores(["criminal_law_sqlite_store"])
+    assert cache.get("q", STORES, None) is None
+    assert cache.get("q", ["civil_law_sqlite_store"], None) is None
+
+
+def test_lru_evicts_oldest_entry(cache: RetrievalCache) -> None:
+    for query in ["a", "b", "c"]:
+        cache.put(query, STORES, None, [Document(text=query)], cost=0.1)
+
+    assert cache.get("a", STORES, None) is None
+    assert cache.get("c", STORES, None) is not None
+
+
+def test_law_knowledge_serves_repeated_query_from_cache(cache: RetrievalCache) -> None:
+    knowledge = LawKnowledge(stores=STORES, retrieval_cache=cache)
+    with (
+        patch.object(LawKnowledge, "_default_query") as base_query,
+        patch("agentuniverse.agent.action.knowledge.knowledge.Knowledge.insert_knowledge"),
+    ):
+        base_query.return_value = [Document(text="a")]
+        knowledge.query_knowledge(query_str="q")
+        knowledge.query_knowledge(query_str="q ")
+        assert base_query.call_count == 1
+
+        knowledge.insert_knowledge(source_path="law.pdf")
+        knowledge.query_knowledge(query_str="q")
+        assert base_query.call_count == 2
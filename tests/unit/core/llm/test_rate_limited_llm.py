@@ -0,0 +1,62 @@
+# mypy: disable-error-code=import-not-found
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import openai
+import pytest
+from agentuniverse.base.config.component_configer.configers.llm_configer import (
+    LLMConfiger,
+)
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.core.llm.rate_limited_llm import RateLimitedStubLLM
+
+MESSAGES = [{"role": "user", "content": "解释民法典第一条"}]
+
+
+def limited_llm(tmp_path: Path, stub: Any, **rate_limit: Any) -> RateLimitedStubLLM:
+    configer = Configer(path="writeworld/core/llm/stub_llm.yaml").load()
+    configer.value["stub"] = {"ttft": 0, "tokens_per_second": 0, "completion_tokens": 5, **stub}
+    configer.value["rate_limit"] = {"db_path": str(tmp_path / "limits.db"), "key": "stub", **rate_limit}
+    llm = RateLimitedStubLLM()
+    llm.initialize_by_component_configer(LLMConfiger().load_by_configer(configer))
+    llm.max_retries = 0
+    return llm
+
+
+def test_stream_holds_its_slot_until_consumed(tmp_path: Path) -> None:
+    llm = limited_llm(tmp_path, {}, max_concurrency=1, max_wait=0.1)
+    stream = llm.call(messages=MESSAGES, streaming=True)
+
+    with pytest.raises(TimeoutError):
+        llm.call(messages=MESSAGES)
+    assert len(list(stream)) == 5
+    assert llm.call(messages=MESSAGES).text
+    assert asyncio.run(llm.acall(messages=MESSAGES)).text
+
+    stats = llm.limiter().stats()["stub"]
+    assert stats == {**stats, "acquired": 3, "timeouts": 1, "in_flight": 0}
+
+
+def test_provider_429_holds_the_bucket(tmp_path: Path) -> None:
+    # the first attempt of this seed is answered with a 429.
+    llm = limited_llm(tmp_path, {"error_rate": 1.0, "seed": 7}, requests_per_minute=600, cooldown=0.5)
+
+    with pytest.raises(openai.RateLimitError):
+        llm.call(messages=MESSAGES)
+    lease, wait = llm.limiter().try_acquire("stub", requests_per_minute=600)
+    assert lease is None and wait > 0.4
+    assert llm.limiter().stats()["stub"]["penalties"] == 1
+
+
+def test_retries_take_a_new_token_each(tmp_path: Path) -> None:
+    llm = limited_llm(tmp_path, {"error_rate": 1.0}, requests_per_minute=600, cooldown=0.05, max_retries=2)
+    llm.max_retries = 5
+    assert llm._new_client().max_retries == 0
+
+    # every attempt fails with a 429 or a 500.
+    with pytest.raises(openai.APIStatusError):
+        llm.call(messages=MESSAGES)
+    stats = llm.limiter().stats()["stub"]
+    assert stats == {**stats, "acquired": 3, "in_flight": 0}
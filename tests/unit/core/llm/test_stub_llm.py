@@ -0,0 +1,96 @@
+# mypy: disable-error-code=import-not-found
+import time
+from typing import Any, Iterator
+
+import openai
+import pytest
+from agentuniverse.agent.action.tool.tool import ToolInput
+from agentuniverse.base.config.component_configer.configers.llm_configer import (
+    LLMConfiger,
+)
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.core.llm.stub_llm import (
+    StubLLMServer,
+    StubOpenAILLM,
+    _servers,
+    count_tokens,
+)
+from writeworld.core.tool.stub_search_tool import StubSearchTool
+
+MESSAGES = [{"role": "user", "content": "解释民法典第一条"}]
+
+
+def stub_llm(**stub: Any) -> StubOpenAILLM:
+    configer = Configer(path="writeworld/core/llm/stub_llm.yaml").load()
+    configer.value["stub"] = stub
+    llm = StubOpenAILLM()
+    llm.initialize_by_component_configer(LLMConfiger().load_by_configer(configer))
+    llm.max_retries = 0
+    return llm
+
+
+@pytest.fixture(scope="module")
+def server() -> Iterator[StubLLMServer]:
+    server = StubLLMServer(ttft=0.1, tokens_per_second=100, completion_tokens=20, jitter=0)
+    yield server
+    server.close()
+
+
+def test_streams_with_the_modelled_timing(server: StubLLMServer) -> None:
+    llm = stub_llm()
+    llm.api_base = server.url
+    start = time.perf_counter()
+    outputs = []
+    for output in llm.call(messages=MESSAGES, streaming=True):
+        outputs.append((time.perf_counter() - start, output.text))
+
+    assert len(outputs) == 20
+    assert 0.1 <= outputs[0][0] < 0.3
+    # 19 more tokens at 100 tokens/s.
+    assert 0.15 <= outputs[-1][0] - outputs[0][0] < 0.5
+    assert llm.call(messages=MESSAGES).text == "".join(text for _, text in outputs)
+
+
+def test_output_depends_only_on_the_seed_and_messages() -> None:
+    first, second = stub_llm(ttft=0, tokens_per_second=0, seed=1), stub_llm(ttft=0, tokens_per_second=0, seed=1)
+    other = stub_llm(ttft=0, tokens_per_second=0, seed=2)
+
+    assert first.base_url == second.base_url != other.base_url
+    text = first.call(messages=MESSAGES).text
+    assert other.call(messages=MESSAGES).text != text
+    assert first.call(messages=[{"role": "user", "content": "另一个问题"}]).text != text
+
+
+def test_server_starts_on_first_client() -> None:
+    llm = stub_llm(ttft=0, tokens_per_second=0, seed=3)
+    assert not any(("seed", "3") in key[1] for key in _servers)
+
+    llm.call(messages=MESSAGES)
+    assert any(("seed", "3") in key[1] for key in _servers)
+    assert llm.api_base is None
+
+
+def test_error_rate_fails_calls() -> None:
+    llm = stub_llm(ttft=0, error_rate=1.0)
+
+    with pytest.raises((openai.RateLimitError, openai.InternalServerError)):
+        llm.call(messages=MESSAGES)
+
+
+def test_counts_tokens_offline() -> None:
+    assert count_tokens("民法典 the civil code") == 6
+    assert stub_llm().get_num_tokens("第一条") == 3
+
+
+def test_search_stub_is_seeded_and_delayed() -> None:
+    tool = StubSearchTool(stub={"ttft": 0.05, "tokens_per_second": 0, "jitter": 0, "results": 3, "seed": 7})
+    start = time.perf_counter()
+    result = tool.execute(ToolInput({"input": "合同违约"}))
+
+    assert time.perf_counter() - start >= 0.05
+    assert len(result.splitlines()) == 3 and result.startswith("合同违约：")
+    assert tool.execute(ToolInput({"input": "合同违约"})) == result
+
+    with pytest.raises(Exception, match="Simulated"):
+        StubSearchTool(stub={"ttft": 0, "error_rate": 1.0}).execute(ToolInput({"input": "合同违约"}))
@@ -0,0 +1,195 @@
+# mypy: disable-error-code=import-not-found
+import threading
+import time
+from typing import Any, Dict, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agentuniverse.agent.input_object import InputObject
+from agentuniverse.agent.output_object import OutputObject
+from agentuniverse.base.config.component_configer.configers.agent_configer import (
+    AgentConfiger,
+)
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.core.agent.peer_agent_case.parallel_peer_agent import ParallelPeerAgent
+from writeworld.core.planner.parallel_peer_planner import ParallelPeerPlanner
+
+
+class FakeExecutingAgent:
+    """Answers one sub-question per run and records the concurrency it saw"""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.agent_model = MagicMock()
+        self.agent_model.info = {"name": "executing_agent"}
+        self.delay = delay
+        self.questions: List[str] = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def run(self, **kwargs: Any) -> OutputObject:
+        question = kwargs["planning_result"].get_data("framework")[0]
+        with self._lock:
+            self.questions.append(question)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return OutputObject(
+            {"executing_result": [{"index": 0, "input": f"Question 1: {question}", "output": f"Answer 1: {question}!"}]}
+        )
+
+
+def agent_returning(result: Dict[str, Any]) -> MagicMock:
+    agent = MagicMock()
+    agent.agent_model.info = {"name": "agent"}
+    agent.run.return_value = OutputObject(result)
+    return agent
+
+
+@pytest.fixture
+def planner() -> ParallelPeerPlanner:
+    return ParallelPeerPlanner()
+
+
+@pytest.fixture
+def input_object() -> InputObject:
+    return InputObject({"input": "question"})
+
+
+def run_planner(
+    planner: ParallelPeerPlanner, input_object: InputObject, agents: Dict[str, Any], config: Dict[str, Any]
+) -> Dict[str, Any]:
+    with (
+        patch.object(ParallelPeerPlanner, "handle_memory", return_value=None),
+        patch("writeworld.core.planner.parallel_peer_planner.assemble_memory_output"),
+        patch("agentuniverse.agent.plan.planner.peer_planner.peer_planner.assemble_memory_output"),
+    ):
+        return planner.agents_run(MagicMock(), agents, config, {"input": "question"}, input_object)
+
+
+def test_sub_questions_run_concurrently_with_cap(planner: ParallelPeerPlanner, input_object: InputObject) -> None:
+    executing = FakeExecutingAgent()
+    agents = {
+        "planning": agent_returning({"framework": ["a", "b", "c", "d"]}),
+        "executing": executing,
+        "expressing": agent_returning({"output": "final"}),
+        "reviewing": agent_returning({"score": 80, "suggestion": "ok"}),
+    }
+
+    result = run_planner(planner, input_object, agents, {"max_concurrency": 2})
+
+    assert sorted(executing.questions) == ["a", "b", "c", "d"]
+    assert executing.max_running == 2
+    executing_result = result["result"][0]["executing_result"].get_data("executing_result")
+    assert [item["input"] for item in executing_result] == [
+        "Question 1: a",
+        "Question 2: b",
+        "Question 3: c",
+        "Question 4: d",
+    ]
+    assert executing_result[3]["output"] == "Answer 4: d!"
+
+
+def test_review_reruns_only_rejected_sub_questions(planner: ParallelPeerPlanner, input_object: InputObject) -> None:
+    executing = FakeExecutingAgent(delay=0)
+    reviewing = MagicMock()
+    reviewing.agent_model.info = {"name": "reviewing_agent"}
+    reviewing.run.side_effect = [
+        OutputObject({"score": 0, "suggestion": "no", "output": {"rejected": [2]}}),
+        OutputObject({"score": 80, "suggestion": "ok", "output": {"rejected": []}}),
+    ]
+    agents: Dict[str, Any] = {
+        "planning": agent_returning({"framework": ["a", "b", "c"]}),
+        "executing": executing,
+        "expressing": agent_returning({"output": "final"}),
+        "reviewing": reviewing,
+    }
+
+    result = run_planner(planner, input_object, agents, {"retry_count": 2})
+
+    assert sorted(executing.questions) == ["a", "b", "b", "c"]
+    assert agents["planning"].run.call_count == 1
+    assert len(result["result"]) == 2
+
+
+def test_expressing_starts_before_stragglers_finish(planner: ParallelPeerPlanner, input_object: InputObject) -> None:
+    class SlowOnC(FakeExecutingAgent):
+        def run(self, **kwargs: Any) -> OutputObject:
+            if kwargs["planning_result"].get_data("framework")[0] == "c":
+                time.sleep(0.5)
+            return super().run(**kwargs)
+
+    executing = SlowOnC(delay=0)
+    agents = {
+        "planning": agent_returning({"framework": ["a", "b", "c"]}),
+        "executing": executing,
+        "expressing": agent_returning({"output": "final"}),
+        "reviewing": agent_returning({"score": 80, "suggestion": "ok"}),
+    }
+
+    start = time.time()
+    result = run_planner(planner, input_object, agents, {"express_ratio": 0.6, "straggler_timeout": 0})
+
+    assert time.time() - start < 0.5
+    executing_result = result["result"][0]["executing_result"].get_data("executing_result")
+    assert [item["index"] for item in executing_result] == [0, 1]
+
+
+def test_rerun_straggler_drops_its_earlier_answer(planner: ParallelPeerPlanner, input_object: InputObject) -> None:
+    class StaleFirstC(FakeExecutingAgent):
+        def run(self, **kwargs: Any) -> OutputObject:
+            if kwargs["planning_result"].get_data("framework")[0] == "c" and "c" not in self.questions:
+                self.questions.append("c")
+                time.sleep(0.4)
+                return OutputObject({"executing_result": [{"output": "Answer 1: stale"}]})
+            return super().run(**kwargs)
+
+    reviewing = MagicMock()
+    reviewing.agent_model.info = {"name": "reviewing_agent"}
+    reviewing.run.side_effect = [
+        OutputObject({"score": 0, "suggestion": "no", "output": {"rejected": [3]}}),
+        OutputObject({"score": 80, "suggestion": "ok", "output": {"rejected": []}}),
+    ]
+    agents: Dict[str, Any] = {
+        "planning": agent_returning({"framework": ["a", "b", "c"]}),
+        "executing": StaleFirstC(delay=0),
+        "expressing": agent_returning({"output": "final"}),
+        "reviewing": reviewing,
+    }
+
+    result = run_planner(
+        planner, input_object, agents, {"retry_count": 2, "express_ratio": 0.6, "straggler_timeout": 0.3}
+    )
+
+    executing_result = result["result"][1]["executing_result"].get_data("executing_result")
+    assert [item["output"] for item in executing_result] == ["Answer 1: a!", "Answer 2: b!", "Answer 3: c!"]
+
+
+def test_rejected_sub_questions_without_reviewer_list() -> None:
+    review = OutputObject({"score": 0, "output": {"suggestion": "no"}})
+
+    assert ParallelPeerPlanner.rejected_sub_questions(review, 3, "executing") == {0, 1, 2}
+    assert ParallelPeerPlanner.rejected_sub_questions(review, 3, "expressing") == set()
+
+
+def test_parallel_peer_agent_runs_the_planner_of_its_yaml() -> None:
+    configer = Configer(path="writeworld/core/agent/peer_agent_case/parallel_peer_agent.yaml").load()
+    agent = ParallelPeerAgent().initialize_by_component_configer(AgentConfiger().load_by_configer(configer))
+    planner = MagicMock()
+    planner.invoke.return_value = {
+        "result": [
+            {"expressing_result": OutputObject({"output": "draft"})},
+            {"expressing_result": OutputObject({"output": "final"})},
+        ]
+    }
+
+    with patch("agentuniverse.agent.agent.PlannerManager") as manager:
+        manager.return_value.get_instance_obj.return_value = planner
+        output = agent.execute(InputObject({"input": "question"}), {"input": "question"})
+
+    manager.return_value.get_instance_obj.assert_called_once_with("parallel_peer_planner")
+    assert agent.parse_result(output) == {"output": "final"}
+    assert agent.agent_model.plan["planner"]["reviewing"] == "parallel_reviewing_agent"
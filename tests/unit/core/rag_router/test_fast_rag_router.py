@@ -0,0 +1,111 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from typing import List, Tuple
+from unittest.mock import patch
+
+import pytest
+from agentuniverse.agent.action.knowledge.rag_router.nlu_rag_router import NluRagRouter
+from agentuniverse.agent.action.knowledge.store.query import Query
+
+from writeworld.core.rag_router.fast_rag_router import (
+    FastRagRouter,
+    RouterClassifier,
+    tokenize,
+)
+
+STORES = ["civil_law_chroma_store", "criminal_law_chroma_store", "civil_law_sqlite_store", "criminal_law_sqlite_store"]
+
+
+def make_router(db_path: str, **kwargs: object) -> FastRagRouter:
+    return FastRagRouter(
+        name="fast_rag_router",
+        domains={
+            "criminal": ["criminal_law_chroma_store", "criminal_law_sqlite_store"],
+            "civil": ["civil_law_chroma_store", "civil_law_sqlite_store"],
+        },
+        rules={"criminal": ["罪", "判处|有期徒刑"], "civil": ["合同|违约", "离婚|继承"]},
+        db_path=db_path,
+        **kwargs,
+    )
+
+
+def llm_route(stores: List[str]):  # type: ignore[no-untyped-def]
+    def route(self: NluRagRouter, query: Query, store_list: List[str]) -> List[Tuple[Query, str]]:
+        return [(query, store) for store in stores]
+
+    return route
+
+
+@pytest.fixture
+def router(tmp_path: Path) -> FastRagRouter:
+    return make_router(str(tmp_path / "router.db"))
+
+
+def test_rules_route_without_llm(router: FastRagRouter) -> None:
+    with patch.object(NluRagRouter, "_rag_route", side_effect=AssertionError("llm called")):
+        criminal = router.rag_route(Query(query_str="盗窃罪判处几年有期徒刑"), STORES)
+        civil = router.rag_route(Query(query_str="合同违约怎么办"), STORES)
+    assert [store for _, store in criminal] == ["criminal_law_chroma_store", "criminal_law_sqlite_store"]
+    assert [store for _, store in civil] == ["civil_law_chroma_store", "civil_law_sqlite_store"]
+
+
+def test_low_confidence_falls_back_to_llm_and_is_memoized(router: FastRagRouter) -> None:
+    stores = ["civil_law_sqlite_store", "criminal_law_sqlite_store"]
+    with patch.object(NluRagRouter, "_rag_route", autospec=True, side_effect=llm_route(stores)) as llm:
+        first = router.rag_route(Query(query_str="离婚时隐匿财产构成犯罪吗"), STORES)
+        second = router.rag_route(Query(query_str=" 离婚时隐匿财产构成犯罪吗？"), STORES)
+    assert llm.call_count == 1
+    assert [store for _, store in first] == [store for _, store in second] == stores
+
+
+def test_memo_persists_across_routers(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "router.db")
+    with patch.object(NluRagRouter, "_rag_route", autospec=True, side_effect=llm_route(["civil_law_sqlite_store"])):
+        make_router(db_path).rag_route(Query(query_str="邻居漏水怎么办"), STORES)
+    with patch.object(NluRagRouter, "_rag_route", side_effect=AssertionError("llm called")):
+        result = make_router(db_path).rag_route(Query(query_str="邻居漏水怎么办"), STORES)
+    assert [store for _, store in result] == ["civil_law_sqlite_store"]
+
+
+def test_classifier_learns_from_llm_decisions(tmp_path: Path) -> None:
+    router = make_router(str(tmp_path / "router.db"), min_samples=4, min_label_samples=2, classifier_confidence=0.8)
+    training = {
+        "邻居漏水淹了我家": ["civil_law_sqlite_store"],
+        "房东不退押金": ["civil_law_sqlite_store"],
+        "酒驾撞人逃逸": ["criminal_law_sqlite_store"],
+        "醉酒驾驶机动车": ["criminal_law_sqlite_store"],
+    }
+    for query_str, stores in training.items():
+        with patch.object(NluRagRouter, "_rag_route", autospec=True, side_effect=llm_route(stores)):
+            router.rag_route(Query(query_str=query_str), STORES)
+    assert router.classifier.samples == 4
+
+    with patch.object(NluRagRouter, "_rag_route", side_effect=AssertionError("llm called")):
+        result = router.rag_route(Query(query_str="酒驾逃逸"), STORES)
+    assert [store for _, store in result] == ["criminal_law_chroma_store", "criminal_law_sqlite_store"]
+
+    reopened = make_router(str(tmp_path / "router.db"))
+    reopened.database()
+    assert reopened.classifier.samples == 4
+
+
+def test_classifier_posterior() -> None:
+    classifier = RouterClassifier()
+    assert classifier.predict(["合同"]) == (None, 0.0)
+    classifier.learn(tokenize("买卖合同纠纷"), "civil")
+    assert classifier.predict(tokenize("合同纠纷")) == (None, 0.0)
+    assert not classifier.trained(1, 1)
+    classifier.learn(tokenize("故意伤害他人"), "criminal")
+    assert classifier.trained(2, 1) and not classifier.trained(2, 2)
+    label, probability = classifier.predict(tokenize("合同纠纷"))
+    assert label == "civil"
+    assert 0.5 < probability <= 1.0
+
+
+def test_classifier_is_not_used_with_a_single_domain(tmp_path: Path) -> None:
+    router = make_router(str(tmp_path / "router.db"), min_samples=2, min_label_samples=1)
+    for query_str in ("邻居漏水淹了我家", "房东不退押金"):
+        with patch.object(NluRagRouter, "_rag_route", autospec=True, side_effect=llm_route(["civil_law_sqlite_store"])):
+            router.rag_route(Query(query_str=query_str), STORES)
+
+    assert router.local_decision("酒驾撞人逃逸") == (None, "llm")
@@ -0,0 +1,134 @@
+# mypy: disable-error-code=import-not-found
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterator, List, Set
+from unittest.mock import MagicMock, patch
+
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.sqlite_store import SQLiteStore
+
+from writeworld.core.store.compiled_bm25_store import CompiledBM25Store
+
+TEXTS = [
+    "当事人订立合同，可以采取书面形式、口头形式或者其他形式。",
+    "当事人一方不履行合同义务，应当承担违约责任。违约责任包括赔偿损失。",
+    "租赁合同是出租人将租赁物交付承租人使用、收益，承租人支付租金的合同。",
+    "自然人的民事权利能力一律平等。",
+]
+
+
+def fake_keywords(documents: List[Document], query: object = None) -> List[Document]:
+    for document in documents:
+        document.keywords.update(word for word in ["合同", "违约", "租赁", "当事人", "民事"] if word in document.text)
+    return documents
+
+
+class FakeExtractor:
+    def extract_many(self, texts: List[str]) -> List[List[str]]:
+        return [list(fake_keywords([Document(text=text)])[0].keywords) for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def manager() -> Iterator[MagicMock]:
+    with patch("writeworld.core.store.compiled_bm25_store.DocProcessorManager") as manager:
+        manager.return_value.get_instance_obj.return_value = None
+        yield manager
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    store = SQLiteStore(db_path=str(tmp_path / "law.db"), keyword_extractor="fake")
+    store._new_client()
+    with patch.object(SQLiteStore, "_get_document_keyword", lambda self, doc: fake_keywords([doc])[0].keywords):
+        store.insert_document([Document(text=text, metadata={"file_name": "民法典.pdf"}) for text in TEXTS])
+    store.conn.close()
+    return str(store.db_path)
+
+
+def new_store(db_path: str) -> CompiledBM25Store:
+    store = CompiledBM25Store(db_path=db_path, keyword_extractor="fake", similarity_top_k=3)
+    store._new_client()
+    return store
+
+
+@pytest.mark.parametrize("keywords", [{"合同"}, {"违约", "租赁"}, {"当事人", "合同"}, {"不存在"}])
+def test_ranks_like_the_sqlite_store(db_path: str, keywords: Set[str]) -> None:
+    sqlite_store = SQLiteStore(db_path=db_path, similarity_top_k=3)
+    sqlite_store._new_client()
+    query_str = "".join(sorted(keywords))
+
+    expected = sqlite_store.query(Query(query_str=query_str, keywords=keywords))
+    result = new_store(db_path).query(Query(query_str=query_str, keywords=keywords))
+
+    assert [(d.id, d.text, d.metadata) for d in result] == [(d.id, d.text, d.metadata) for d in expected]
+
+
+def test_serialized_index_is_reused_until_the_database_changes(db_path: str) -> None:
+    new_store(db_path)
+    index_path = db_path + ".bm25.npz"
+    mtime = os.stat(index_path).st_mtime_ns
+
+    with patch.object(CompiledBM25Store, "compile_index", side_effect=AssertionError("recompiled")):
+        store = new_store(db_path)
+    assert os.stat(index_path).st_mtime_ns == mtime
+
+    with patch.object(SQLiteStore, "_get_document_keyword", lambda self, doc: fake_keywords([doc])[0].keywords):
+        store.insert_document([Document(text="违约金的数额由当事人约定。")])
+    result = store.query(Query(query_str="违约", keywords={"违约"}))
+    assert "违约金的数额由当事人约定。" in [d.text for d in result]
+
+
+def test_writes_extract_keywords_in_one_batch(db_path: str, manager: MagicMock) -> None:
+    store = new_store(db_path)
+    docs = [Document(text="违约金的数额由当事人约定。"), Document(text="租赁期限不得超过二十年。")]
+    manager.return_value.get_instance_obj.return_value = FakeExtractor()
+    with patch.object(SQLiteStore, "_get_document_keyword", side_effect=AssertionError("extracted one by one")):
+        store.upsert_document(docs)
+
+    assert docs[0].keywords == {"违约", "当事人"}
+    assert [d.text for d in store.query(Query(query_str="租赁", keywords={"租赁"}))][0] == "租赁期限不得超过二十年。"
+
+
+def test_new_client_keeps_a_current_index(db_path: str) -> None:
+    store = new_store(db_path)
+    index = store.index
+
+    # the post-fork client of a worker, after the master preloaded the index.
+    store._new_client()
+    assert store.index is index
+
+    with patch.object(SQLiteStore, "_get_document_keyword", lambda self, doc: fake_keywords([doc])[0].keywords):
+        new_store(db_path).insert_document([Document(text="违约金的数额由当事人约定。")])
+    store._new_client()
+    assert store.index is not index
+
+
+def test_fingerprint_follows_writes_not_checkpoints(db_path: str) -> None:
+    store = new_store(db_path)
+    fingerprint = store.fingerprint()
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    assert (store.fingerprint() == fingerprint).all()
+    assert store.index_is_current()
+
+    sqlite_store = SQLiteStore(db_path=db_path)
+    sqlite_store._new_client()
+    sqlite_store.delete_document(store.documents[-1][0])
+    sqlite_store.conn.close()
+    assert not store.index_is_current()
+    assert len(store.query(Query(query_str="民事", keywords={"民事"}))) == 0
+
+
+def test_preload_leaves_no_connection_open(db_path: str) -> None:
+    store = CompiledBM25Store(db_path=db_path, similarity_top_k=3)
+    store.preload()
+
+    assert store.sqlite_pool._writer is None and store.sqlite_pool._local.conn is None
+    assert store.conn is None
+    index = store.index
+    store._new_client()
+    assert store.index is index
@@ -0,0 +1,85 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+
+from writeworld.core.store.numpy_vector_store import (
+    NumpyVectorStore,
+    build_ivf,
+    normalize_rows,
+)
+
+
+def store_at(path: Path, **kwargs: int) -> NumpyVectorStore:
+    store = NumpyVectorStore(name="test_store", persist_path=str(path), **kwargs)
+    store._new_client()
+    return store
+
+
+def document(text: str, embedding: List[float]) -> Document:
+    return Document(text=text, embedding=embedding, metadata={"file_name": "民法典.pdf"})
+
+
+def test_exact_top_k_by_dot_product(tmp_path: Path) -> None:
+    store = store_at(tmp_path)
+    store.insert_document([document("a", [1, 0]), document("b", [0, 1]), document("c", [1, 1])])
+
+    result = store.query(Query(embeddings=[[2, 0.1]], similarity_top_k=2))
+
+    assert [d.text for d in result] == ["a", "c"]
+    assert result[0].metadata["file_name"] == "民法典.pdf"
+    assert result[0].metadata["score"] == pytest.approx(0.9988, abs=1e-3)
+
+
+def test_other_process_sees_upserts_and_deletes(tmp_path: Path) -> None:
+    writer = store_at(tmp_path)
+    reader = store_at(tmp_path)
+    writer.insert_document([document("a", [1, 0]), document("b", [0, 1])])
+    assert [d.text for d in reader.query(Query(embeddings=[[1, 0]]))][0] == "a"
+    assert isinstance(reader.embeddings, np.memmap)
+
+    writer.upsert_document([Document(id=writer.records[0]["id"], text="a2", embedding=[0, -1])])
+    writer.delete_document(writer.records[0]["id"])
+
+    assert [d.text for d in reader.query(Query(embeddings=[[1, 0]]))] == ["a2"]
+
+
+def test_ivf_returns_the_exact_neighbours_of_probed_lists(tmp_path: Path) -> None:
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(200, 8)).astype(np.float32)
+    store = store_at(tmp_path, nlist=4, nprobe=4)
+    store.insert_document([document(str(i), vector.tolist()) for i, vector in enumerate(vectors)])
+
+    result = store.query(Query(embeddings=[vectors[7].tolist()], similarity_top_k=5))
+
+    expected = np.argsort(-(normalize_rows(vectors) @ normalize_rows(vectors[7:8])[0]))[:5]
+    assert [d.text for d in result] == [str(i) for i in expected]
+
+
+def test_build_ivf_partitions_every_row() -> None:
+    matrix = normalize_rows(np.random.default_rng(0).normal(size=(50, 4)).astype(np.float32))
+
+    ivf = build_ivf(matrix, nlist=5)
+
+    assert sorted(ivf["order"].tolist()) == list(range(50))
+    assert ivf["offsets"][0] == 0 and ivf["offsets"][-1] == 50
+
+
+def test_save_without_lists_removes_the_stale_ones(tmp_path: Path) -> None:
+    store = store_at(tmp_path, nlist=2, nprobe=1)
+    store.insert_document([document("a", [1, 0]), document("b", [0, 1]), document("c", [1, 1])])
+    assert (tmp_path / "ivf.npz").exists()
+
+    for record in list(store.records):
+        store.delete_document(record["id"])
+    assert not (tmp_path / "ivf.npz").exists()
+
+    store.insert_document([document("d", [0, 1]), document("e", [1, 0])])
+    exact = store_at(tmp_path, nlist=0)
+    exact.insert_document([document("f", [1, 1])])
+    assert not (tmp_path / "ivf.npz").exists()
+    assert [d.text for d in store_at(tmp_path, nlist=2, nprobe=2).query(Query(embeddings=[[1, 0]]))][0] == "e"
@@ -0,0 +1,126 @@
+# mypy: disable-error-code=import-not-found
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from numpy.typing import NDArray
+
+from writeworld.core.store import quantization
+from writeworld.core.store.numpy_vector_store import NumpyVectorStore, normalize_rows
+
+
+@pytest.fixture
+def vectors() -> NDArray[Any]:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    return normalize_rows((centers[rng.integers(0, 20, 500)] + 0.3 * rng.normal(size=(500, 32))).astype(np.float32))
+
+
+def recall(result: NDArray[Any], expected: NDArray[Any]) -> float:
+    return len(set(result.tolist()) & set(expected.tolist())) / len(expected)
+
+
+def test_int8_scores_are_close_to_exact(vectors: NDArray[Any]) -> None:
+    quantized = quantization.train_int8(vectors)
+
+    assert quantized["codes"].dtype == np.int8
+    approximate = quantization.scores(quantized, vectors[3])
+    np.testing.assert_allclose(approximate, vectors @ vectors[3], atol=0.02)
+    np.testing.assert_allclose(quantization.scores(quantized, vectors[3], np.array([3, 9])), approximate[[3, 9]])
+
+
+def test_pq_candidates_hold_the_neighbours(vectors: NDArray[Any]) -> None:
+    quantized = quantization.train_pq(vectors, m=8, ksub=32)
+
+    assert quantized["codes"].shape == (500, 8) and quantized["codebooks"].shape == (8, 32, 4)
+    queries = vectors[:20]
+    recalls = [
+        recall(np.argsort(-quantization.scores(quantized, q))[:50], np.argsort(-(vectors @ q))[:10]) for q in queries
+    ]
+    assert np.mean(recalls) > 0.9
+    with pytest.raises(Exception, match="not a multiple"):
+        quantization.train_pq(vectors, m=5)
+
+
+def new_store(path: Path, **kwargs: object) -> NumpyVectorStore:
+    store = NumpyVectorStore(name="test_store", persist_path=str(path), **kwargs)
+    store._new_client()
+    return store
+
+
+@pytest.mark.parametrize("kind, options", [("int8", {}), ("pq", {"pq_m": 8})])
+def test_rescored_store_returns_exact_scores(
+    tmp_path: Path, vectors: NDArray[Any], kind: str, options: Dict[str, Any]
+) -> None:
+    new_store(tmp_path).insert_document([Document(text=str(i), embedding=v.tolist()) for i, v in enumerate(vectors)])
+    exact = new_store(tmp_path).query(Query(embeddings=[vectors[42].tolist()], similarity_top_k=5))
+
+    store = new_store(tmp_path, quantization=kind, rescore=50, **options)
+
+    assert os.path.exists(tmp_path / "codes.npy")
+    assert store.quantized is not None and isinstance(store.quantized["codes"], np.memmap)
+    result = store.query(Query(embeddings=[vectors[42].tolist()], similarity_top_k=5))
+    assert [d.text for d in result] == [d.text for d in exact]
+    assert [d.metadata["score"] for d in result] == pytest.approx([d.metadata["score"] for d in exact], abs=1e-5)
+
+
+def test_writes_keep_the_codes_in_sync(tmp_path: Path, vectors: NDArray[Any]) -> None:
+    store = new_store(tmp_path, quantization="int8")
+    store.insert_document([Document(text=str(i), embedding=v.tolist()) for i, v in enumerate(vectors[:100])])
+    store.upsert_document([Document(text="new", embedding=(-vectors[0]).tolist())])
+
+    result = store.query(Query(embeddings=[(-vectors[0]).tolist()], similarity_top_k=1))
+
+    assert result[0].text == "new"
+    assert store.quantized is not None and store.quantized["codes"].shape == (101, 32)
+    assert result[0].metadata["score"] == pytest.approx(1.0, abs=0.02)
+
+
+def test_stale_codes_are_rebuilt(tmp_path: Path, vectors: NDArray[Any]) -> None:
+    store = new_store(tmp_path, quantization="int8")
+    store.insert_document([Document(text=str(i), embedding=v.tolist()) for i, v in enumerate(vectors[:100])])
+    stale_codes = np.load(tmp_path / "codes.npy")
+
+    plain = new_store(tmp_path)
+    plain.insert_document([Document(text="new", embedding=(-vectors[0]).tolist())])
+    assert not (tmp_path / "codes.npy").exists() and not (tmp_path / "quantizer.npz").exists()
+    np.save(tmp_path / "codes.npy", stale_codes)
+    np.savez(tmp_path / "quantizer.npz", quantization=np.array("int8"), scale=np.ones(32, dtype=np.float32))
+
+    reloaded = new_store(tmp_path, quantization="int8")
+    result = reloaded.query(Query(embeddings=[(-vectors[0]).tolist()], similarity_top_k=1))
+
+    assert reloaded.quantized is not None and reloaded.quantized["codes"].shape == (101, 32)
+    assert result[0].text == "new"
+
+
+def test_concurrent_loads_quantize_once(tmp_path: Path, vectors: NDArray[Any]) -> None:
+    new_store(tmp_path).insert_document([Document(text=str(i), embedding=v.tolist()) for i, v in enumerate(vectors)])
+    train = quantization.train
+    trained: List[int] = []
+
+    def slow_train(*args: Any) -> Dict[str, NDArray[Any]]:
+        trained.append(1)
+        time.sleep(0.2)
+        return train(*args)
+
+    stores: List[NumpyVectorStore] = []
+    with patch.object(quantization, "train", side_effect=slow_train):
+        threads = [
+            threading.Thread(target=lambda: stores.append(new_store(tmp_path, quantization="int8"))) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(trained) == 1
+    assert all(store.quantized is not None and len(store.quantized["codes"]) == len(vectors) for store in stores)
+    assert not (tmp_path / "codes.npy.tmp").exists()
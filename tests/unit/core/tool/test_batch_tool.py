@@ -0,0 +1,158 @@
+# mypy: disable-error-code=import-not-found
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List
+from unittest.mock import patch
+
+import pytest
+from agentuniverse.agent.action.tool.tool import ToolInput
+from langchain_community.tools import QuerySQLDataBaseTool
+from langchain_community.utilities.sql_database import SQLDatabase
+
+from writeworld.core.tool.batch_tool import execute_many, run_batch
+from writeworld.core.tool.google_search_tool import GoogleSearchTool
+from writeworld.core.tool.langchain_tool.sql_langchain_tool import SqlLangchainTool
+from writeworld.core.tool.request_tool import PooledRequestsWrapper, RequestTool
+from writeworld.core.tool.search_cache import SearchCache
+from writeworld.core.tool.simple_math_tool import DivideTool
+from writeworld.util.http_client import HttpClient
+
+
+def inputs(*values: str) -> List[ToolInput]:
+    return [ToolInput({"input": value}) for value in values]
+
+
+def test_run_batch_keeps_order_and_isolates_failures() -> None:
+    results = run_batch(lambda x: 10 / x, [1, 0, 5])
+
+    assert [result.output for result in results] == [10, None, 2]
+    assert isinstance(results[1].error, ZeroDivisionError)
+    assert [result.ok for result in results] == [True, False, True]
+
+
+def test_run_batch_times_out_slow_items_only() -> None:
+    start = time.monotonic()
+    results = run_batch(time.sleep, [0.01, 1.0, 0.01], max_concurrency=3, timeout=0.2)
+
+    assert time.monotonic() - start < 0.9
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, TimeoutError)
+
+
+def test_run_batch_limits_concurrency_and_runs_duplicates_once() -> None:
+    running, peak, calls = [0], [0], []
+    lock = threading.Lock()
+
+    def call(x: int) -> int:
+        with lock:
+            calls.append(x)
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return x
+
+    results = run_batch(call, [1, 2, 3, 4, 1, 2], max_concurrency=2, key=lambda x: x)
+
+    assert [result.output for result in results] == [1, 2, 3, 4, 1, 2]
+    assert sorted(calls) == [1, 2, 3, 4]
+    assert peak[0] == 2
+
+
+def test_execute_many_falls_back_to_threads_for_plain_tools() -> None:
+    results = execute_many(DivideTool(), inputs("6,3", "1,0"))
+
+    assert results[0].output == 2
+    assert isinstance(results[1].error, ZeroDivisionError)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            time.sleep(1)
+        body = f'{{"path": "{self.path}"}}'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_request_tool_sends_the_batch_concurrently(url: str) -> None:
+    client = HttpClient()
+    tool = RequestTool(method="GET", http_client=client)
+    tool.requests_wrapper = PooledRequestsWrapper(response_content_type="json", http_client=client)
+
+    results = tool.execute_many(inputs(f"{url}/a", f"'{url}/b'", f"{url}/slow"), timeout=0.5)
+
+    assert [result.output for result in results[:2]] == [{"path": "/a"}, {"path": "/b"}]
+    assert not results[2].ok
+
+
+def test_google_search_tool_batches_uncached_queries(tmp_path: Path) -> None:
+    cache = SearchCache(str(tmp_path / "search.db"))
+    client = HttpClient()
+    tool = GoogleSearchTool(name="google_search_tool", serper_api_key="key", search_cache=cache, http_client=client)
+    key = SearchCache.cache_key("google_search_tool", "东京天气", tool.engine_params(ToolInput({})))
+    cache.put(key, "google_search_tool", "东京天气", "东京 阴")
+
+    with patch.object(client, "post") as post:
+        answers = [{"answerBox": {"answer": "上海 晴"}}, {"answerBox": {"answer": "北京 雨"}}]
+        post.return_value.json.return_value = answers
+        results = tool.execute_many(inputs("上海天气", "东京天气", "北京天气", "上海天气"))
+
+    assert [result.output for result in results] == ["上海 晴", "东京 阴", "北京 雨", "上海 晴"]
+    assert post.call_count == 1
+    assert [query["q"] for query in post.call_args.kwargs["json"]] == ["上海天气", "北京天气"]
+    assert tool.execute(ToolInput({"input": "北京天气"})) == "北京 雨"
+
+
+def test_sql_tool_runs_distinct_statements(tmp_path: Path) -> None:
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'demo.db'}")
+    db.run("CREATE TABLE laws (name TEXT)")
+    db.run("INSERT INTO laws VALUES ('刑法')")
+    tool = SqlLangchainTool()
+    tool.tool = QuerySQLDataBaseTool(db=db)
+
+    results = tool.execute_many(inputs("SELECT name FROM laws", "SELECT  name FROM laws;", "SELECT * FROM missing"))
+
+    assert results[0].output == results[1].output == "[('刑法',)]"
+    assert "no such table" in results[2].output
+
+
+def test_sql_tool_runs_every_write(tmp_path: Path) -> None:
+    db = SQLDatabase.from_uri(f"sqlite:///{tmp_path / 'demo.db'}")
+    db.run("CREATE TABLE laws (name TEXT)")
+    tool = SqlLangchainTool()
+    tool.tool = QuerySQLDataBaseTool(db=db)
+
+    tool.execute_many(inputs("INSERT INTO laws VALUES ('刑法')", "INSERT INTO laws VALUES ('刑法');"))
+
+    assert db.run("SELECT COUNT(*) FROM laws") == "[(2,)]"
+
+
+def test_run_batch_runs_queued_items_when_every_thread_hangs() -> None:
+    hang = threading.Event()
+    start = time.monotonic()
+    results = run_batch(lambda x: hang.wait() if x < 2 else x, [0, 1, 2, 3], max_concurrency=2, timeout=0.2)
+    hang.set()
+
+    assert time.monotonic() - start < 0.9
+    assert [result.ok for result in results] == [False, False, True, True]
+    assert [result.output for result in results[2:]] == [2, 3]
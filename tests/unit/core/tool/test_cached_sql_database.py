@@ -0,0 +1,82 @@
+# mypy: disable-error-code=import-not-found
+import sqlite3
+from pathlib import Path
+
+import pytest
+from agentuniverse.agent.action.tool.tool import ToolInput
+from langchain_community.tools import InfoSQLDatabaseTool, QuerySQLDataBaseTool
+from langchain_community.utilities.sql_database import SQLDatabase
+
+from writeworld.core.tool.langchain_tool.cached_sql_database import (
+    CachedSQLDatabase,
+    normalize_sql,
+    statement_kind,
+)
+from writeworld.core.tool.langchain_tool.sql_langchain_tool import SqlLangchainTool
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "demo.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE laws (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO laws (name) VALUES (?)", [(f"law {i}",) for i in range(10)])
+    return path
+
+
+@pytest.fixture
+def db(db_path: str) -> CachedSQLDatabase:
+    return CachedSQLDatabase(SQLDatabase.from_uri(f"sqlite:///{db_path}"), max_rows=3)
+
+
+def test_statement_kind_and_normalization() -> None:
+    assert normalize_sql("SELECT  name\n FROM laws; -- all of them") == "SELECT name FROM laws"
+    assert statement_kind("select 1") == "read"
+    assert statement_kind("WITH x AS (SELECT 1) DELETE FROM laws") == "write"
+    assert statement_kind("ALTER TABLE laws ADD COLUMN year INTEGER") == "ddl"
+    assert statement_kind("SELECT 1; DROP TABLE laws") == "write"
+
+
+def test_read_results_are_cached_until_a_write(db: CachedSQLDatabase) -> None:
+    first = db.run("SELECT count(*) FROM laws")
+    assert db.run("SELECT count(*)\n  FROM laws ;") == first == "[(10,)]"
+    assert db.stats["result_hits"] == 1
+
+    db.run("DELETE FROM laws WHERE id = 1")
+
+    assert db.run("SELECT count(*) FROM laws") == "[(9,)]"
+
+
+def test_read_results_are_cut_at_max_rows(db: CachedSQLDatabase) -> None:
+    result = db.run("SELECT name FROM laws ORDER BY id")
+
+    assert result.startswith("[('law 0',), ('law 1',), ('law 2',)]")
+    assert "only the first 3 rows" in result
+    assert db.run("SELECT name FROM laws WHERE id = 1") == "[('law 0',)]"
+
+
+def test_table_info_is_refreshed_by_ddl(db: CachedSQLDatabase, db_path: str) -> None:
+    info = db.get_table_info()
+    assert db.get_table_info() == info
+    assert (db.stats["schema_hits"], db.stats["schema_misses"]) == (1, 1)
+
+    db.run("CREATE TABLE cases (title TEXT)")
+    assert "CREATE TABLE cases" in db.get_table_info()
+
+    # a DDL by another connection changes the SQLite schema version.
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE judges (name TEXT)")
+    assert "judges" in db.get_usable_table_names()
+    assert "CREATE TABLE judges" in db.get_table_info()
+
+
+def test_sql_tools_share_the_cached_database(db_path: str) -> None:
+    query, info = SqlLangchainTool(), SqlLangchainTool()
+    database = CachedSQLDatabase(SQLDatabase.from_uri(f"sqlite:///{db_path}"))
+    query.tool, info.tool = QuerySQLDataBaseTool(db=database), InfoSQLDatabaseTool(db=database)
+
+    assert "laws" in info.execute(ToolInput({"input": "laws"}))
+    query.execute(ToolInput({"input": "CREATE TABLE cases (title TEXT)"}))
+
+    assert "CREATE TABLE cases" in info.execute(ToolInput({"input": "cases"}))
+    assert query.execute(ToolInput({"input": "SELECT * FROM missing"})).startswith("Error")
@@ -0,0 +1,70 @@
+# mypy: disable-error-code=import-not-found
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from agentuniverse.agent.action.tool.tool import ToolInput
+from agentuniverse.base.config.component_configer.configers.tool_configer import (
+    ToolConfiger,
+)
+from agentuniverse.base.config.configer import Configer
+
+from writeworld.core.tool.langchain_tool.langchain_tool import LangChainTool
+from writeworld.util import prewarm
+
+
+def configure(**value: Any) -> LangChainTool:
+    configer = Configer()
+    configer.value = {
+        "name": "read_file",
+        "description": "",
+        "tool_type": "api",
+        "input_keys": ["input"],
+        "langchain": {"module": "langchain_community.tools", "class_name": "ReadFileTool"},
+        "metadata": {"type": "TOOL"},
+        **value,
+    }
+    tool = LangChainTool()
+    tool.initialize_by_component_configer(ToolConfiger().load_by_configer(configer))
+    return tool
+
+
+def test_tool_is_built_on_first_execute(tmp_path: Path) -> None:
+    path = tmp_path / "law.txt"
+    path.write_text("第一条")
+    tool = configure()
+    unbuilt = tool.tool
+    assert unbuilt is None
+
+    assert tool.execute(ToolInput({"input": str(path)})) == "第一条"
+    assert tool.tool is not None
+    assert tool.description == "Read file from disk"
+
+
+def test_as_langchain_builds_the_tool_for_its_description() -> None:
+    assert configure().as_langchain().description == "Read file from disk"
+
+
+def test_yaml_description_keeps_the_tool_lazy() -> None:
+    tool = configure(description="Read a law file")
+    assert tool.as_langchain().description == "Read a law file"
+    unbuilt = tool.tool
+    assert unbuilt is None
+
+
+def test_eager_tool_is_built_at_configuration() -> None:
+    assert configure(lazy=False).tool is not None
+
+
+def test_prewarm_builds_the_registered_tools() -> None:
+    with patch.object(prewarm, "_loaders", []), patch.object(prewarm, "add_post_fork") as add_post_fork:
+        tool = configure(prewarm=True)
+        prewarm.register_prewarm("broken", lambda: 1 / 0)
+        assert add_post_fork.call_count == 1
+        unbuilt = tool.tool
+        assert unbuilt is None
+
+        timings = prewarm.prewarm()
+
+    assert tool.tool is not None
+    assert list(timings) == ["tool read_file"]
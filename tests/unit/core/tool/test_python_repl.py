@@ -0,0 +1,15 @@
+# mypy: disable-error-code=import-not-found
+import os
+
+from agentuniverse.agent.action.tool.tool import ToolInput
+
+from writeworld.core.tool.python_repl import PythonREPLTool
+
+
+def test_code_runs_in_the_sandbox_pool() -> None:
+    tool = PythonREPLTool(sandbox={"size": 1, "timeout": 5})
+
+    pid = tool.execute(ToolInput({"input": "```py\nimport os\nprint(os.getpid())\n```"}))
+
+    assert pid.strip().isdigit() and int(pid) != os.getpid()
+    assert tool.execute(ToolInput({"input": "```py\nx = 1\n```"})).startswith("ERROR")
@@ -0,0 +1,95 @@
+# mypy: disable-error-code=import-not-found
+import threading
+import time
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from agentuniverse.agent.action.tool.tool import ToolInput
+
+from writeworld.core.tool.google_search_tool import GoogleSearchTool
+from writeworld.core.tool.search_cache import SearchCache
+
+PARAMS = {"k": 10, "gl": "us", "hl": "en"}
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> SearchCache:
+    return SearchCache(str(tmp_path / "search.db"), ttl=60, max_entries=2)
+
+
+def test_hit_for_normalized_query_and_same_params(cache: SearchCache) -> None:
+    calls: List[str] = []
+
+    def search() -> str:
+        calls.append("search")
+        return "result"
+
+    assert cache.search("google", "黄金价格", PARAMS, search) == "result"
+    assert cache.search("google", " 黄金价格？", PARAMS, search) == "result"
+    assert cache.search("google", "黄金价格", {**PARAMS, "hl": "zh-cn"}, search) == "result"
+    assert cache.search("bing", "黄金价格", PARAMS, search) == "result"
+
+    assert len(calls) == 3
+    assert cache.stats()["google"] == {"hits": 1, "coalesced": 0, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_concurrent_misses_share_one_search(cache: SearchCache) -> None:
+    calls: List[str] = []
+    results: List[str] = []
+
+    def search() -> str:
+        calls.append("search")
+        time.sleep(0.1)
+        return "result"
+
+    threads = [threading.Thread(target=lambda: results.append(cache.search("google", "q", PARAMS, search)))]
+    threads += [threading.Thread(target=lambda: results.append(cache.search("google", "q", PARAMS, search)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["search"]
+    assert results == ["result", "result"]
+    assert cache.stats()["google"]["coalesced"] == 1
+
+
+def test_failed_search_is_raised_to_every_waiter_and_not_cached(cache: SearchCache) -> None:
+    def search() -> str:
+        raise ValueError("quota exceeded")
+
+    with pytest.raises(ValueError):
+        cache.search("google", "q", PARAMS, search)
+
+    assert cache.search("google", "q", PARAMS, lambda: "result") == "result"
+
+
+def test_expired_entries_miss(cache: SearchCache) -> None:
+    cache.search("google", "q", PARAMS, lambda: "old")
+
+    with patch("writeworld.core.tool.search_cache.time.time", return_value=time.time() + 120):
+        assert cache.search("google", "q", PARAMS, lambda: "new") == "new"
+
+
+def test_results_are_shared_through_sqlite_and_evicted_lru(tmp_path: Path, cache: SearchCache) -> None:
+    for query in ("a", "b", "c"):
+        cache.search("searchapi", query, PARAMS, lambda query=query: {"organic_results": [query]})
+
+    other = SearchCache(str(tmp_path / "search.db"), ttl=60, max_entries=2)
+
+    assert other.search("searchapi", "c", PARAMS, lambda: None) == {"organic_results": ["c"]}
+    assert other.search("searchapi", "a", PARAMS, lambda: "searched again") == "searched again"
+
+
+def test_google_search_tool_searches_through_the_cache(cache: SearchCache) -> None:
+    tool = GoogleSearchTool(name="google_search_tool", serper_api_key="key", search_cache=cache)
+
+    with patch("writeworld.core.tool.google_search_tool.PooledGoogleSerperAPIWrapper") as wrapper:
+        wrapper.return_value.run.return_value = "上海 晴"
+        assert tool.execute(ToolInput({"input": "上海今天的天气"})) == "上海 晴"
+        assert tool.execute(ToolInput({"input": "上海今天的天气"})) == "上海 晴"
+
+    assert wrapper.return_value.run.call_count == 1
+    assert cache.stats()["google_search_tool"]["hits"] == 1
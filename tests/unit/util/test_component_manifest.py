@@ -0,0 +1,89 @@
+# mypy: disable-error-code=import-not-found
+import importlib
+import os
+from pathlib import Path
+from typing import List
+
+import pytest
+from agentuniverse.base.component.component_enum import ComponentEnum
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.config.config_type_enum import ConfigTypeEnum
+
+from writeworld.util.component_manifest import ComponentManifest
+
+TOOL_YAML = """name: '{name}'
+description: '${{MANIFEST_TEST_DESCRIPTION}}'
+metadata:
+  type: 'TOOL'
+  module: 'writeworld.core.tool.mock_search_tool'
+  class: 'MockSearchTool'
+"""
+
+
+@pytest.fixture
+def package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    package = tmp_path / f"manifest_package_{tmp_path.name}"
+    (package / "tool").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "tool" / "search.yaml").write_text(TOOL_YAML.format(name="search"))
+    (package / "llm.yaml").write_text("name: 'llm'\nmetadata:\n  type: 'LLM'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("MANIFEST_TEST_DESCRIPTION", "first")
+    importlib.invalidate_caches()
+    return package
+
+
+def scan(
+    manifest: ComponentManifest, package: Path, component_enum: ComponentEnum = ComponentEnum.TOOL
+) -> List[ComponentConfiger]:
+    return manifest.scan([package.name], ConfigTypeEnum.YAML, component_enum)
+
+
+def test_filters_by_type_and_resolves_placeholders(package: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = str(package.parent / "manifest.json")
+    manifest = ComponentManifest(path).load()
+
+    tools = scan(manifest, package)
+    assert [tool.name for tool in tools] == ["search"]
+    assert tools[0].description == "first"
+    assert [llm.name for llm in scan(manifest, package, ComponentEnum.LLM)] == ["llm"]
+    assert manifest.stats == {"hits": 0, "scans": 1}
+    manifest.save()
+
+    # the next start resolves the placeholders again, from the saved raw yaml.
+    monkeypatch.setenv("MANIFEST_TEST_DESCRIPTION", "second")
+    reloaded = ComponentManifest(path).load()
+    assert scan(reloaded, package)[0].description == "second"
+    assert reloaded.stats == {"hits": 1, "scans": 0}
+
+
+def test_rescans_a_changed_package(package: Path) -> None:
+    path = str(package.parent / "manifest.json")
+    manifest = ComponentManifest(path).load()
+    scan(manifest, package)
+    manifest.save()
+
+    search = package / "tool" / "search.yaml"
+    search.write_text(TOOL_YAML.format(name="web_search"))
+    stat = search.stat()
+    # a new mtime even on file systems of coarse timestamps.
+    os.utime(search, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    (package / "tool" / "other").mkdir()
+    (package / "tool" / "other" / "other.yaml").write_text(TOOL_YAML.format(name="other"))
+
+    reloaded = ComponentManifest(path).load()
+    assert sorted(tool.name for tool in scan(reloaded, package)) == ["other", "web_search"]
+    assert reloaded.stats == {"hits": 0, "scans": 1}
+    assert reloaded.dirty
+
+
+def test_an_unreadable_manifest_is_empty(package: Path) -> None:
+    path = package.parent / "manifest.json"
+    path.write_text("{not json")
+
+    manifest = ComponentManifest(str(path)).load()
+    assert [tool.name for tool in scan(manifest, package)] == ["search"]
+    manifest.save()
+    assert ComponentManifest(str(path)).load().packages.keys() == {package.name}
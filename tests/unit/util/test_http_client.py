@@ -0,0 +1,91 @@
+# mypy: disable-error-code=import-not-found
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, cast
+
+import pytest
+
+from writeworld.core.tool.request_tool import PooledRequestsWrapper
+from writeworld.util.http_client import HttpClient, get_http_client
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses: List[int] = []
+    connections: List[int] = []
+
+    def setup(self) -> None:
+        super().setup()
+        Handler.connections.append(1)
+
+    def do_GET(self) -> None:
+        status = Handler.statuses.pop(0) if Handler.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def url() -> Iterator[str]:
+    Handler.statuses, Handler.connections = [], []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_requests_reuse_the_kept_alive_connection(url: str) -> None:
+    client = HttpClient()
+
+    for _ in range(5):
+        assert client.get(url).json() == {"ok": True}
+
+    assert len(Handler.connections) == 1
+
+
+def test_retryable_statuses_are_retried(url: str) -> None:
+    Handler.statuses = [503, 502]
+    client = HttpClient(retries=2, backoff_factor=0.01, backoff_jitter=0.01)
+
+    assert client.get(url).status_code == 200
+
+
+def test_last_retryable_status_is_returned(url: str) -> None:
+    Handler.statuses = [503, 503]
+    client = HttpClient(retries=1, backoff_factor=0.01, backoff_jitter=0.01)
+
+    assert client.get(url).status_code == 503
+
+
+def test_async_client_retries_and_reads_the_body(url: str) -> None:
+    Handler.statuses = [503]
+    client = HttpClient(retries=1, backoff_factor=0.01, backoff_jitter=0.01)
+
+    async def fetch() -> Dict[str, Any]:
+        response = await client.async_client.get(url)
+        result = cast(Dict[str, Any], await response.json())
+        await client.async_client.close()
+        return result
+
+    assert asyncio.run(fetch()) == {"ok": True}
+
+
+def test_clients_are_shared_by_configuration() -> None:
+    assert get_http_client() is get_http_client(retries=2)
+    assert get_http_client() is not get_http_client(retries=3)
+
+
+def test_request_tool_wrapper_sends_through_the_pool(url: str) -> None:
+    wrapper = PooledRequestsWrapper(response_content_type="json", http_client=HttpClient())
+
+    assert wrapper.get(url) == {"ok": True}
+    assert wrapper.get(url) == {"ok": True}
+    assert len(Handler.connections) == 1
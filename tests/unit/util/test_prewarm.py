@@ -0,0 +1,64 @@
+# mypy: disable-error-code=import-not-found
+import gc
+import os
+from typing import Iterator
+
+import pytest
+from flask import Flask
+
+from writeworld.api.routes import readiness
+from writeworld.util import prewarm
+
+
+@pytest.fixture(autouse=True)
+def registry() -> Iterator[None]:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(prewarm, "_loaders", [])
+        monkeypatch.setattr(prewarm, "_preloaders", [])
+        monkeypatch.setattr(prewarm, "_status", {phase: {"done": False} for phase in ("preload", "prewarm")})
+        monkeypatch.setattr(prewarm, "add_post_fork", lambda func: None)
+        yield
+    gc.unfreeze()
+
+
+def test_preload_records_the_loaded_and_failed_components() -> None:
+    loaded = []
+    prewarm.register_preload("dictionary", lambda: loaded.append("dictionary"))
+    prewarm.register_preload("broken", lambda: 1 / 0)
+
+    timings = prewarm.preload()
+
+    assert loaded == ["dictionary"] and list(timings) == ["dictionary"]
+    assert gc.get_freeze_count() > 0
+    status = prewarm.warm_status()
+    assert status["preload"]["done"] and status["preload"]["pid"] == os.getpid()
+    assert list(status["preload"]["failed"]) == ["broken"]
+    assert status["memory"]["rss"] > 0
+
+
+def test_ready_once_every_phase_with_loaders_ran() -> None:
+    assert prewarm.warm_status()["ready"]
+
+    prewarm.register_preload("dictionary", lambda: None)
+    prewarm.register_prewarm("tool", lambda: None)
+    assert not prewarm.warm_status()["ready"]
+
+    prewarm.preload(freeze=False)
+    assert not prewarm.warm_status()["ready"]
+    prewarm.start_prewarm(delay=0).join()
+    assert prewarm.warm_status()["ready"]
+
+
+def test_readiness_endpoint_reports_the_warm_status() -> None:
+    app = Flask(__name__)
+    readiness.register_routes(app)
+    client = app.test_client()
+    prewarm.register_preload("dictionary", lambda: None)
+
+    response = client.get("/readiness")
+    assert response.status_code == 503 and response.json is not None and not response.json["success"]
+
+    prewarm.preload(freeze=False)
+    response = client.get("/readiness")
+    assert response.status_code == 200 and response.json is not None
+    assert response.json["result"]["preload"]["loaded"].keys() == {"dictionary"}
@@ -0,0 +1,90 @@
+# mypy: disable-error-code=import-not-found
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from writeworld.util.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def limiter(tmp_path: Path) -> RateLimiter:
+    return RateLimiter(str(tmp_path / "limits.db"))
+
+
+def test_token_bucket_queues_past_the_burst(limiter: RateLimiter) -> None:
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire("qwen", requests_per_minute=600, burst=2).release()
+
+    # the third call waited for a token, 0.1s at 10 requests/s.
+    assert 0.08 <= time.monotonic() - start < 0.5
+    stats = limiter.stats()["qwen"]
+    assert stats["acquired"] == 3 and stats["throttled"] == 1
+    assert 0.08 <= stats["throttled_seconds"] < 0.5
+
+
+def test_fails_past_the_deadline(limiter: RateLimiter) -> None:
+    lease = limiter.acquire("kimi", max_concurrency=1)
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire("kimi", max_wait=0.1, max_concurrency=1)
+    # a token due after the deadline fails at once.
+    limiter.acquire("wenxin", requests_per_minute=1)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        limiter.acquire("wenxin", max_wait=5, requests_per_minute=1)
+    assert time.monotonic() - start < 1
+
+    lease.release()
+    limiter.acquire("kimi", max_wait=0.1, max_concurrency=1).release()
+    assert limiter.stats()["kimi"]["timeouts"] == 1
+
+
+def test_reclaims_the_slots_of_dead_processes(limiter: RateLimiter) -> None:
+    process = multiprocessing.get_context("fork").Process(target=lambda: limiter.acquire("baichuan", max_concurrency=1))
+    process.start()
+    process.join()
+
+    assert limiter.stats()["baichuan"]["in_flight"] == 1
+    limiter.acquire("baichuan", max_wait=0, max_concurrency=1).release()
+
+
+def test_penalty_holds_every_caller(limiter: RateLimiter) -> None:
+    limiter.penalize("deepseek", 0.3, requests_per_minute=600, burst=5)
+
+    lease, wait = limiter.try_acquire("deepseek", requests_per_minute=600, burst=5)
+    assert lease is None and 0.25 <= wait <= 0.45
+    assert limiter.stats()["deepseek"]["penalties"] == 1
+
+
+def hold(db_path: str, concurrent: Any, peak: Any) -> None:
+    limiter = RateLimiter(db_path)
+    for _ in range(3):
+        lease = limiter.acquire("shared", max_wait=10, max_concurrency=2)
+        with concurrent.get_lock():
+            concurrent.value += 1
+            peak.value = max(peak.value, concurrent.value)
+        time.sleep(0.05)
+        with concurrent.get_lock():
+            concurrent.value -= 1
+        lease.release()
+
+
+def test_concurrency_cap_holds_across_processes(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("fork")
+    concurrent: Any = context.Value("i", 0)
+    peak: Any = context.Value("i", 0)
+    db_path = str(tmp_path / "limits.db")
+    RateLimiter(db_path)
+    processes = [context.Process(target=hold, args=(db_path, concurrent, peak)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert peak.value == 2
+    stats = RateLimiter(db_path).stats()["shared"]
+    assert stats["acquired"] == 12 and stats["in_flight"] == 0 and stats["throttled"] > 0
@@ -0,0 +1,69 @@
+# mypy: disable-error-code=import-not-found
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+
+from writeworld.util.sandbox_pool import SandboxPool
+
+
+@pytest.fixture(scope="module")
+def pool() -> Iterator[SandboxPool]:
+    pool = SandboxPool(size=2, timeout=2, cpu_seconds=1, memory_mb=64, max_runs=3)
+    yield pool
+    pool.close()
+
+
+def test_runs_code_in_a_fresh_namespace(pool: SandboxPool) -> None:
+    assert pool.run("x = 41\nprint(x + 1)") == "42\n"
+    assert pool.run("print(x)") == "NameError(\"name 'x' is not defined\")"
+
+
+def test_exception_is_returned_after_the_output(pool: SandboxPool) -> None:
+    assert pool.run("print('before')\n1 / 0") == "before\nZeroDivisionError('division by zero')"
+
+
+def test_wall_clock_timeout_replaces_the_worker(pool: SandboxPool) -> None:
+    timeouts = pool.stats["timeouts"]
+
+    assert pool.run("import time\ntime.sleep(5)", timeout=0.3).startswith("TimeoutError")
+    assert pool.stats["timeouts"] == timeouts + 1
+    assert pool.run("print('alive')") == "alive\n"
+
+
+def test_cpu_limit_kills_the_worker(pool: SandboxPool) -> None:
+    assert "CPU time or memory limit" in pool.run("while True:\n    pass", timeout=10)
+    assert pool.run("print('alive')") == "alive\n"
+
+
+def test_memory_limit_raises_memory_error(pool: SandboxPool) -> None:
+    assert pool.run("data = bytearray(256 * 1024 * 1024)").startswith("MemoryError")
+    assert pool.run("print(len(bytearray(1024)))") == "1024\n"
+
+
+def test_workers_are_recycled_after_max_runs(pool: SandboxPool) -> None:
+    recycled = pool.stats["recycled"]
+
+    pids = {pool.run("import os\nprint(os.getpid())") for _ in range(8)}
+
+    assert pool.stats["recycled"] > recycled
+    assert len(pids) > 2
+
+
+def test_snippets_do_not_block_the_calling_process(pool: SandboxPool) -> None:
+    ticks: List[float] = []
+    stop = threading.Event()
+
+    def tick() -> None:
+        while not stop.is_set():
+            ticks.append(time.monotonic())
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=tick)
+    thread.start()
+    pool.run("total = 0\nfor i in range(3_000_000):\n    total += i\nprint(total)")
+    stop.set()
+    thread.join()
+
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1
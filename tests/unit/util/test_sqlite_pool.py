@@ -0,0 +1,91 @@
+# mypy: disable-error-code=import-not-found
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from writeworld.util.sqlite_pool import SQLitePool, get_pool
+
+
+@pytest.fixture
+def pool(tmp_path: Path) -> SQLitePool:
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    with pool.write() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+    return pool
+
+
+def test_connections_are_tuned(pool: SQLitePool) -> None:
+    with pool.read() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 256 * 1024 * 1024
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+
+
+def test_every_thread_reads_through_its_own_connection(pool: SQLitePool) -> None:
+    connections = []
+
+    def read() -> None:
+        with pool.read() as conn:
+            connections.append(conn)
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with pool.read() as first, pool.read() as second:
+        assert first is second
+
+    assert len({id(conn) for conn in connections}) == 3
+
+
+def test_readers_see_the_last_commit_while_a_write_is_open(pool: SQLitePool) -> None:
+    with pool.write() as conn:
+        conn.execute("INSERT INTO items VALUES (1)")
+
+    with pool.write() as conn:
+        conn.execute("INSERT INTO items VALUES (2)")
+        with pool.read() as reader:
+            assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+    with pool.read() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+
+
+def test_failed_write_is_rolled_back(pool: SQLitePool) -> None:
+    with pytest.raises(ValueError):
+        with pool.write() as conn:
+            conn.execute("INSERT INTO items VALUES (1)")
+            raise ValueError()
+
+    with pool.read() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+
+def test_write_committed_by_the_caller(pool: SQLitePool) -> None:
+    with pool.write() as conn:
+        with conn:
+            conn.execute("INSERT INTO items VALUES (1)")
+
+    with pool.read() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+
+
+def test_connections_are_reopened_after_fork(pool: SQLitePool) -> None:
+    writer = pool.writer
+    with pool.read() as reader:
+        pass
+
+    pool._pid = os.getpid() + 1
+
+    assert pool.writer is not writer
+    with pool.read() as conn:
+        assert conn is not reader
+
+
+def test_get_pool_is_shared_by_path(tmp_path: Path) -> None:
+    path = tmp_path / "shared.db"
+
+    assert get_pool(str(path)) is get_pool(os.path.relpath(path))
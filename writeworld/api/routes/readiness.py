@@ -0,0 +1,25 @@
+from typing import Any, cast
+
+from agentuniverse.agent_serve.web.web_util import make_standard_response
+from flask import Response
+
+from writeworld.util.prewarm import warm_status
+
+
+def readiness() -> Response:
+    """Warm status of the worker serving the request: 200 once warm, 503 before
+
+    Returns:
+        The preload and prewarm phases, with the loaded and failed components, and the memory of the worker
+    """
+    status = warm_status()
+    return cast(
+        Response,
+        make_standard_response(success=status["ready"], result=status, status_code=200 if status["ready"] else 503),
+    )
+
+
+# Register route
+def register_routes(app: Any) -> None:
+    """Register readiness routes"""
+    app.add_url_rule("/readiness", view_func=readiness, methods=["GET"])
@@ -0,0 +1,34 @@
+# mypy: disable-error-code=import-not-found
+from typing import Any, Dict, List
+
+from agentuniverse.agent.agent import Agent
+from agentuniverse.agent.input_object import InputObject
+
+
+class ParallelPeerAgent(Agent):
+    """PEER agent run by the planner of its yaml, `parallel_peer_planner`.
+
+    The `PeerAgentTemplate` of agentUniverse runs the PEER work pattern and ignores `plan.planner`,
+    so the parallel planner is selected through this agent, whose `execute` invokes the planner named
+    in `plan.planner.name`. The member agents are the `planning`, `executing`, `expressing` and
+    `reviewing` keys of the planner config; the reviewer is `parallel_reviewing_agent`, which can name
+    the sub-questions to re-run.
+    """
+
+    def input_keys(self) -> List[str]:
+        return ["input"]
+
+    def output_keys(self) -> List[str]:
+        return ["output"]
+
+    def parse_input(self, input_object: InputObject, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        agent_input["input"] = input_object.get_data("input")
+        return agent_input
+
+    def parse_result(self, planner_result: Dict[str, Any]) -> Dict[str, Any]:
+        """The output of the last expressing agent which answered."""
+        for loop_result in reversed(planner_result.get("result", [])):
+            expressing_result = loop_result.get("expressing_result")
+            if expressing_result and expressing_result.get_data("output"):
+                return {"output": expressing_result.get_data("output")}
+        return {"output": ""}
@@ -0,0 +1,22 @@
+# mypy: disable-error-code=import-not-found
+from typing import Any, Dict
+
+from agentuniverse.agent.input_object import InputObject
+from agentuniverse.agent.template.reviewing_agent_template import ReviewingAgentTemplate
+
+
+class ParallelReviewingAgent(ReviewingAgentTemplate):
+    """Reviewing agent which also sees the numbered sub-question answers.
+
+    The reviewer can then name the sub-questions to re-run in its `rejected` field,
+    which the `parallel_peer_planner` uses to avoid re-executing the whole plan.
+    """
+
+    def parse_input(self, input_object: InputObject, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        agent_input = super().parse_input(input_object, agent_input)
+        executing_result = input_object.get_data("executing_result")
+        sub_results = executing_result.get_data("executing_result", []) if executing_result else []
+        agent_input["executing_result"] = "\n".join(
+            f"{sub_result.get('input')}\n{sub_result.get('output')}" for sub_result in sub_results
+        )
+        return agent_input
@@ -0,0 +1,155 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+from collections import Counter
+from typing import Any, List, Optional, cast
+
+import jieba
+import numpy as np
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor import (
+    DocProcessor,
+)
+from agentuniverse.agent.action.knowledge.doc_processor.jieba_keyword_extractor import (
+    chinese_stopwords,
+    stop_words,
+)
+from agentuniverse.agent.action.knowledge.embedding.embedding_manager import (
+    EmbeddingManager,
+)
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.util.logging.logging_util import LOGGER
+from numpy.typing import NDArray
+
+
+def min_max(scores: NDArray[Any]) -> NDArray[Any]:
+    """Scale the scores to [0, 1], a constant score vector becomes all zeros."""
+    span = scores.max() - scores.min()
+    if span <= 0:
+        return np.zeros_like(scores)
+    return cast(NDArray[Any], (scores - scores.min()) / span)
+
+
+def bm25_scores(keywords: List[str], doc_tokens: List[List[str]], k1: float = 1.5, b: float = 0.75) -> NDArray[Any]:
+    """BM25 score of every candidate for the keywords, with the IDF taken over the candidate set."""
+    if not keywords or not doc_tokens:
+        return np.zeros(len(doc_tokens), dtype=np.float32)
+    counts = [Counter(tokens) for tokens in doc_tokens]
+    tf = np.array([[count.get(keyword, 0) for keyword in keywords] for count in counts], dtype=np.float32)
+    doc_len = np.array([len(tokens) for tokens in doc_tokens], dtype=np.float32)
+
+    n = len(doc_tokens)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+    norm = k1 * (1.0 - b + b * doc_len / max(doc_len.mean(), 1.0))
+    return cast(NDArray[Any], (tf * (k1 + 1.0) / (tf + norm[:, None])) @ idf)
+
+
+def cosine_scores(query_embedding: List[float], doc_embeddings: List[List[float]]) -> NDArray[Any]:
+    """Cosine similarity between the query and every candidate embedding."""
+    matrix = np.asarray(doc_embeddings, dtype=np.float32)
+    vector = np.asarray(query_embedding, dtype=np.float32)
+    matrix_norm = np.linalg.norm(matrix, axis=1)
+    vector_norm = np.linalg.norm(vector)
+    return cast(NDArray[Any], (matrix @ vector) / np.maximum(matrix_norm * vector_norm, 1e-12))
+
+
+class LocalReranker(DocProcessor):
+    """Rerank the retrieved candidates locally and keep the best `top_n`.
+
+    The score is `bm25_weight * BM25 + (1 - bm25_weight) * cosine`, both min-max scaled over the
+    candidates. BM25 uses the query keywords and the IDF of the candidate set. Cosine uses the embeddings
+    the candidates and the query carry from retrieval; `embedding_model` embeds the missing ones, a cached
+    embedding keeps that cheap for the candidates seen before. Without it, only the candidates carrying
+    an embedding get a cosine, and the others the mean cosine of those, so they rank on BM25. When the
+    embedding fails, the ranking is BM25 only, so the processor can stand in for a remote reranker when
+    that service is unavailable.
+
+    Attributes:
+        top_n (int): Number of documents to keep.
+        bm25_weight (float): Weight of the BM25 score against the embedding cosine.
+        k1 (float): BM25 term frequency saturation.
+        b (float): BM25 document length normalization.
+        embedding_model (Optional[str]): Embedding component for the candidates and queries without a
+            embedding, None scores only those which carry one.
+    """
+
+    top_n: int = 30
+    bm25_weight: float = 0.5
+    k1: float = 1.5
+    b: float = 0.75
+    embedding_model: Optional[str] = None
+
+    def _process_docs(self, origin_docs: List[Document], query: Query = None) -> List[Document]:
+        if not query or not query.query_str:
+            raise Exception("Local reranker need an origin string query.")
+        if len(origin_docs) < 1:
+            return origin_docs
+
+        keywords = list(query.keywords) or self.tokenize(query.query_str)
+        scores = self.bm25_weight * min_max(
+            bm25_scores(keywords, [self.tokenize(doc.text) for doc in origin_docs], self.k1, self.b)
+        )
+        cosine = self.embedding_scores(origin_docs, query)
+        if cosine is not None:
+            scored = ~np.isnan(cosine)
+            cosine[scored] = min_max(cosine[scored])
+            cosine[~scored] = cosine[scored].mean()
+            scores += (1.0 - self.bm25_weight) * cosine
+
+        rerank_docs = []
+        for index in np.argsort(-scores, kind="stable")[: self.top_n]:
+            doc = origin_docs[index]
+            doc.metadata = doc.metadata or {}
+            doc.metadata["relevance_score"] = float(scores[index])
+            rerank_docs.append(doc)
+        return rerank_docs
+
+    @staticmethod
+    def tokenize(text: Optional[str]) -> List[str]:
+        return [
+            word
+            for word in jieba.lcut_for_search(text or "")
+            if word.strip() and word not in chinese_stopwords and word.lower() not in stop_words
+        ]
+
+    def embedding_scores(self, docs: List[Document], query: Query) -> Optional[NDArray[Any]]:
+        """Cosine scores of the candidates, NaN for those without an embedding, None when none has one."""
+        missing = [doc for doc in docs if not doc.embedding]
+        if len(missing) == len(docs) and not self.embedding_model:
+            return None
+        try:
+            embedding = EmbeddingManager().get_instance_obj(self.embedding_model) if self.embedding_model else None
+            query_embedding = query.embeddings[0] if query.embeddings else None
+            if query_embedding is None and embedding:
+                query_embedding = embedding.get_embeddings([query.query_str], text_type="query")[0]
+            if query_embedding is None:
+                return None
+            if missing and embedding:
+                for doc, doc_embedding in zip(missing, embedding.get_embeddings([doc.text for doc in missing])):
+                    doc.embedding = doc_embedding
+            embedded = [i for i, doc in enumerate(docs) if doc.embedding]
+            if not embedded:
+                return None
+            scores = np.full(len(docs), np.nan, dtype=np.float32)
+            scores[embedded] = cosine_scores(query_embedding, [docs[i].embedding for i in embedded])
+            return scores
+        except Exception as e:
+            LOGGER.warn(f"Local reranker falls back to BM25 only: {e}")
+            return None
+
+    def _initialize_by_component_configer(self, doc_processor_configer: ComponentConfiger) -> "DocProcessor":
+        super()._initialize_by_component_configer(doc_processor_configer)
+        if hasattr(doc_processor_configer, "top_n"):
+            self.top_n = doc_processor_configer.top_n
+        if hasattr(doc_processor_configer, "bm25_weight"):
+            self.bm25_weight = doc_processor_configer.bm25_weight
+        if hasattr(doc_processor_configer, "k1"):
+            self.k1 = doc_processor_configer.k1
+        if hasattr(doc_processor_configer, "b"):
+            self.b = doc_processor_configer.b
+        if hasattr(doc_processor_configer, "embedding_model"):
+            self.embedding_model = doc_processor_configer.embedding_model
+        return self
@@ -0,0 +1,111 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+import copy
+import os
+import pickle
+import threading
+from typing import Dict, List, Optional, Tuple, cast
+
+import jieba
+import jieba.analyse
+from agentuniverse.agent.action.knowledge.doc_processor.jieba_keyword_extractor import (
+    JiebaKeywordExtractor,
+    chinese_stopwords,
+    stop_words,
+)
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.util.logging.logging_util import LOGGER
+from jieba.analyse.tfidf import IDFLoader
+
+_warm_lock = threading.Lock()
+
+
+def load_idf(idf_path: str) -> Tuple[Dict[str, float], float]:
+    """IDF table of a jieba idf file, from its pickle next to it when that one is up to date."""
+    serialized_path = idf_path + ".pkl"
+    if os.path.exists(serialized_path) and os.stat(serialized_path).st_mtime_ns >= os.stat(idf_path).st_mtime_ns:
+        with open(serialized_path, "rb") as serialized_file:
+            return cast(Tuple[Dict[str, float], float], pickle.load(serialized_file))
+    idf = cast(Tuple[Dict[str, float], float], IDFLoader(idf_path).get_idf())
+    tmp_path = serialized_path + ".tmp"
+    with open(tmp_path, "wb") as serialized_file:
+        pickle.dump(idf, serialized_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, serialized_path)
+    return idf
+
+
+def warm_jieba(dictionary_cache: Optional[str] = None) -> None:
+    """Load the jieba dictionary now, from the serialized `dictionary_cache` which jieba builds once."""
+    with _warm_lock:
+        if jieba.dt.initialized:
+            return
+        if dictionary_cache:
+            directory = os.path.dirname(os.path.abspath(dictionary_cache))
+            os.makedirs(directory, exist_ok=True)
+            jieba.dt.cache_file = os.path.abspath(dictionary_cache)
+        jieba.dt.initialize()
+
+
+class WarmKeywordExtractor(JiebaKeywordExtractor):
+    """Jieba keyword extractor whose dictionary and IDF table are loaded when the component is built.
+
+    jieba loads its dictionary on the first cut, so every gunicorn worker used to pay it on its first
+    query and hold a private copy. Components are built by the master before it forks, so loading
+    them here lets the workers share the pages copy-on-write. The dictionary is read from the marshal
+    cache at `dictionary_cache`, and a custom `idf_path` from a pickle beside it, both written on
+    the first start.
+
+    Attributes:
+        dictionary_cache (Optional[str]): Serialized jieba dictionary, jieba's temp file when empty.
+        idf_path (Optional[str]): jieba idf file, the jieba default table when empty.
+    """
+
+    dictionary_cache: Optional[str] = None
+    idf_path: Optional[str] = None
+    tfidf: Optional[jieba.analyse.TFIDF] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def warm(self) -> None:
+        warm_jieba(self.dictionary_cache)
+        if self.tfidf is None:
+            tfidf = jieba.analyse.default_tfidf
+            if self.idf_path:
+                tfidf = copy.copy(tfidf)
+                tfidf.idf_freq, tfidf.median_idf = load_idf(self.idf_path)
+            self.tfidf = tfidf
+            LOGGER.info(f"Keyword extractor {self.name} warmed with {len(tfidf.idf_freq)} idf terms.")
+
+    def extract(self, text: str) -> List[str]:
+        if self.tfidf is None:
+            self.warm()
+        tfidf = cast(jieba.analyse.TFIDF, self.tfidf)
+        words = [word for word in jieba.lcut(text) if word not in chinese_stopwords and word.lower() not in stop_words]
+        return cast(List[str], tfidf.extract_tags(" ".join(words), topK=self.top_k))
+
+    def extract_many(self, texts: List[str]) -> List[List[str]]:
+        """Keywords of every text, extracting repeated texts once."""
+        extracted: Dict[str, List[str]] = {}
+        for text in texts:
+            if text not in extracted:
+                extracted[text] = self.extract(text or "")
+        return [extracted[text] for text in texts]
+
+    def _process_docs(self, origin_docs: List[Document], query: Query = None) -> List[Document]:
+        for doc, keywords in zip(origin_docs, self.extract_many([doc.text for doc in origin_docs])):
+            doc.keywords.update(keywords)
+        return origin_docs
+
+    def _initialize_by_component_configer(self, doc_processor_configer: ComponentConfiger) -> "WarmKeywordExtractor":
+        super()._initialize_by_component_configer(doc_processor_configer)
+        if hasattr(doc_processor_configer, "dictionary_cache"):
+            self.dictionary_cache = doc_processor_configer.dictionary_cache
+        if hasattr(doc_processor_configer, "idf_path"):
+            self.idf_path = doc_processor_configer.idf_path
+        self.warm()
+        return self
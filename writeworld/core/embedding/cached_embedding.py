@@ -0,0 +1,81 @@
+# mypy: disable-error-code=import-not-found
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from agentuniverse.agent.action.knowledge.embedding.embedding import Embedding
+from agentuniverse.agent.action.knowledge.embedding.embedding_manager import (
+    EmbeddingManager,
+)
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from numpy.typing import NDArray
+
+from writeworld.core.embedding.embedding_cache import (
+    EmbeddingCache,
+    get_embedding_cache,
+)
+
+
+class CachedEmbedding(Embedding):
+    """Embedding wrapper which serves repeated texts from a persistent cache.
+
+    Vectors are keyed by the model name of the wrapped embedding and the hash of the text and its
+    `text_type`, so query and document embeddings of the same text are kept apart. Only the texts
+    missing from the cache are sent to the wrapped embedding, in one call.
+
+    Attributes:
+        embedding (str): Name of the wrapped embedding component.
+        cache_dir (str): Directory of the cache files.
+    """
+
+    embedding: Optional[str] = None
+    cache_dir: str = "../../DB/embedding_cache"
+
+    def get_embeddings(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        inner = self.inner_embedding()
+        cache, digests, vectors, missing = self.lookup(inner, texts, **kwargs)
+        if missing:
+            missing_texts = list(missing)
+            cache.put_many([missing[text] for text in missing_texts], inner.get_embeddings(missing_texts, **kwargs))
+            vectors = cache.get_many(digests)
+        return [cast(NDArray[Any], vector).tolist() for vector in vectors]
+
+    async def async_get_embeddings(self, texts: List[str], **kwargs: Any) -> List[List[float]]:
+        inner = self.inner_embedding()
+        cache, digests, vectors, missing = self.lookup(inner, texts, **kwargs)
+        if missing:
+            missing_texts = list(missing)
+            embeddings = await inner.async_get_embeddings(missing_texts, **kwargs)
+            cache.put_many([missing[text] for text in missing_texts], embeddings)
+            vectors = cache.get_many(digests)
+        return [cast(NDArray[Any], vector).tolist() for vector in vectors]
+
+    def inner_embedding(self) -> Embedding:
+        inner = EmbeddingManager().get_instance_obj(self.embedding)
+        if inner is None:
+            raise Exception(f"Cached embedding {self.name} wraps an unknown embedding {self.embedding}.")
+        return inner
+
+    def lookup(
+        self, inner: Embedding, texts: List[str], **kwargs: Any
+    ) -> Tuple[EmbeddingCache, List[bytes], List[Optional[NDArray[Any]]], Dict[str, bytes]]:
+        """Cached vectors of the texts, and the distinct missing texts mapped to their digest."""
+        model_name = inner.embedding_model_name or self.embedding
+        if inner.embedding_dims:
+            model_name = f"{model_name}-{inner.embedding_dims}"
+        cache: EmbeddingCache = get_embedding_cache(self.cache_dir, model_name)
+        text_type = kwargs.get("text_type", "document")
+        digests = [cache.digest(text, text_type) for text in texts]
+        vectors = cache.get_many(digests)
+        missing: Dict[str, bytes] = {
+            text: digest for text, digest, vector in zip(texts, digests, vectors) if vector is None
+        }
+        return cache, digests, vectors, missing
+
+    def _initialize_by_component_configer(self, embedding_configer: ComponentConfiger) -> "Embedding":
+        super()._initialize_by_component_configer(embedding_configer)
+        if hasattr(embedding_configer, "embedding"):
+            self.embedding = embedding_configer.embedding
+        if hasattr(embedding_configer, "cache_dir"):
+            self.cache_dir = embedding_configer.cache_dir
+        return self
@@ -0,0 +1,130 @@
+# mypy: disable-error-code=import-not-found
+import fcntl
+import hashlib
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+# index record: sha1 digest of the content, offset and length of the vector in float32 units.
+RECORD = struct.Struct("<20sQI")
+
+
+class EmbeddingCache:
+    """Append-only, memory-mapped store of the embeddings of one model.
+
+    Vectors are appended as raw float32 to `<model>.f32`, and a fixed-size record `digest -> (offset,
+    length)` is appended to `<model>.idx` afterwards, so a reader never sees an index entry without
+    its vector. Every process maps the data file read-only, sharing the pages through the OS cache,
+    and picks up the records other processes appended since its last read. Writers serialize on a
+    file lock, and drop the data a crashed writer left past the last indexed vector before appending.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str) -> None:
+        os.makedirs(cache_dir, exist_ok=True)
+        file_name = re.sub(r"[^\w.-]", "_", model_name)
+        self.data_path = os.path.join(cache_dir, f"{file_name}.f32")
+        self.index_path = os.path.join(cache_dir, f"{file_name}.idx")
+        self.lock_path = os.path.join(cache_dir, f"{file_name}.lock")
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._index_size = 0
+        # end of the last indexed vector in the data file, in float32 units.
+        self._data_end = 0
+        self._data: Optional[NDArray[Any]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(text: str, text_type: str = "document") -> bytes:
+        return hashlib.sha1(f"{text_type}\0{text}".encode("utf-8")).digest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def get_many(self, digests: Sequence[bytes]) -> List[Optional[NDArray[Any]]]:
+        """Look up the vectors, None for the digests which are not cached."""
+        with self._lock:
+            self._refresh()
+            vectors: List[Optional[NDArray[Any]]] = []
+            for digest in digests:
+                location = self._index.get(digest)
+                if location is None or self._data is None:
+                    vectors.append(None)
+                else:
+                    offset, length = location
+                    vectors.append(self._data[offset : offset + length])
+            return vectors
+
+    def put_many(self, digests: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        with self._lock, self._file_lock():
+            self._refresh()
+            records = []
+            chunks = []
+            with open(self.data_path, "ab") as data_file:
+                # drop the vectors, or the torn part of one, written by a crashed writer after the last record.
+                data_file.truncate(self._data_end * 4)
+                offset = self._data_end
+                for digest, vector in zip(digests, vectors):
+                    if digest in self._index:
+                        continue
+                    array = np.asarray(vector, dtype=np.float32)
+                    chunks.append(array.tobytes())
+                    records.append(RECORD.pack(digest, offset, len(array)))
+                    self._index[digest] = (offset, len(array))
+                    offset += len(array)
+                self._data_end = offset
+                data_file.write(b"".join(chunks))
+                data_file.flush()
+                os.fsync(data_file.fileno())
+            with open(self.index_path, "ab") as index_file:
+                # drop a torn record left by a crashed writer before appending.
+                index_file.truncate(index_file.tell() - index_file.tell() % RECORD.size)
+                index_file.write(b"".join(records))
+                self._index_size = index_file.tell()
+            self._remap()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Read the index records appended since the last refresh and remap the grown data file."""
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.index_path)
+        size -= size % RECORD.size
+        if size <= self._index_size:
+            return
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(self._index_size)
+            buffer = index_file.read(size - self._index_size)
+        for digest, offset, length in RECORD.iter_unpack(buffer):
+            self._index[digest] = (offset, length)
+            self._data_end = max(self._data_end, offset + length)
+        self._index_size = size
+        self._remap()
+
+    def _remap(self) -> None:
+        # map whole float32 units only, the data file may end with a torn write until the next writer drops it.
+        if os.path.exists(self.data_path) and os.path.getsize(self.data_path) >= 4:
+            self._data = np.memmap(
+                self.data_path, dtype=np.float32, mode="r", shape=(os.path.getsize(self.data_path) // 4,)
+            )
+
+
+@lru_cache(maxsize=None)
+def get_embedding_cache(cache_dir: str, model_name: str) -> EmbeddingCache:
+    """The process-wide cache of a model, shared by every component using it."""
+    return EmbeddingCache(cache_dir, model_name)
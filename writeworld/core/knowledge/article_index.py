@@ -0,0 +1,209 @@
+# mypy: disable-error-code=import-not-found
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+NUMERAL = r"[零〇一二两三四五六七八九十百千万\d]+"
+DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+UNITS = {"十": 10, "百": 100, "千": 1000, "万": 10000}
+
+# an article heading starts a line: "第二百三十四条　故意伤害他人身体的，……"
+HEADING_PATTERN = re.compile(rf"^[ \t　]*第({NUMERAL})条(?:之({NUMERAL}))?(?=[ \t　])", re.MULTILINE)
+# part, chapter and section titles between two articles: "第二章　犯罪"
+TITLE_PATTERN = re.compile(rf"^[ \t　]*第{NUMERAL}[编分章节][ \t　].*$\n?", re.MULTILINE)
+ARTICLE_REF = rf"第({NUMERAL})条(?:之({NUMERAL}))?"
+RANGE_PATTERN = re.compile(
+    rf"{ARTICLE_REF}(?:\s*(至|到|-|—|~|～)\s*{ARTICLE_REF}|((?:\s*[、,，和及与]\s*{ARTICLE_REF})*))"
+)
+# words left in a query asking for the articles themselves.
+FILLER_PATTERN = re.compile(
+    r"中华人民共和国|规定|内容|条文|原文|全文|是什么|是啥|说了什么|讲了什么|写了什么|怎么|如何|查询|查找|请问|看看|一下|"
+    r"[的了呢吗《》\s?？!！.。,，:：、]"
+)
+
+ArticleKey = Tuple[int, int]
+
+
+def parse_numeral(numeral: str) -> int:
+    """Value of an Arabic or Chinese numeral, like "234", "二百三十四" or "一千零四十三"."""
+    if numeral.isdigit():
+        return int(numeral)
+    total, section, digit = 0, 0, 0
+    for char in numeral:
+        if char in DIGITS:
+            digit = DIGITS[char]
+        elif char == "万":
+            total += (section + digit) * 10000
+            section, digit = 0, 0
+        elif char in UNITS:
+            section += (digit or 1) * UNITS[char]
+            digit = 0
+        else:
+            raise ValueError(f"Invalid numeral: {numeral}")
+    return total + section + digit
+
+
+def article_key(number: str, sub_number: Optional[str]) -> ArticleKey:
+    return parse_numeral(number), parse_numeral(sub_number) if sub_number else 0
+
+
+def article_label(key: ArticleKey) -> str:
+    return f"{key[0]}-{key[1]}" if key[1] else str(key[0])
+
+
+def parse_label(label: str) -> ArticleKey:
+    number, _, sub_number = label.partition("-")
+    return int(number), int(sub_number or 0)
+
+
+class ArticleIndex:
+    """Index of the law articles by (code, article number), for queries naming the articles.
+
+    The text of every ingested file is cut at the article headings and kept under the code named by
+    the file, so "刑法第234条", "民法典第一千零四十三条" or "刑法第十条至第十五条" are answered with
+    a dict lookup. Articles like "第一百二十条之一" are keyed (120, 1). A file is read in order, a
+    text without a leading heading continues the last article of its code, and a heading must number
+    past the previous one, which skips article references wrapped to the start of a line. The index is
+    saved as JSON and reloaded when another process rewrites it.
+
+    Args:
+        path (str): JSON file of the index.
+        codes (Dict[str, List[str]]): Names of every code, found in file names and queries.
+    """
+
+    def __init__(self, path: str, codes: Dict[str, List[str]]) -> None:
+        self.path = path
+        self.codes = codes
+        self.articles: Dict[str, Dict[ArticleKey, str]] = {}
+        self.sources: Dict[str, str] = {}
+        self.last: Dict[str, Optional[ArticleKey]] = {}
+        self.loaded_mtime = 0
+        self.lock = threading.RLock()
+        aliases = sorted(((alias, code) for code, names in codes.items() for alias in names), key=lambda a: -len(a[0]))
+        self.alias_codes = dict(aliases)
+        alias_pattern = "|".join(re.escape(alias) for alias, _ in aliases)
+        self.query_pattern = re.compile(rf"({alias_pattern})》?\s*((?:{RANGE_PATTERN.pattern})+)") if aliases else None
+        self.load()
+
+    def code_of(self, file_name: str) -> Optional[str]:
+        for alias, code in self.alias_codes.items():
+            if alias in file_name:
+                return code
+        return None
+
+    def add_text(self, file_name: str, text: str) -> int:
+        """Index the articles of the next part of a file, returns the number of articles started."""
+        code = self.code_of(file_name)
+        if code is None:
+            return 0
+        with self.lock:
+            articles = self.articles.setdefault(code, {})
+            self.sources[code] = file_name
+            last = self.last.get(code)
+            position, started = 0, 0
+            for match in HEADING_PATTERN.finditer(text):
+                key = article_key(match.group(1), match.group(2))
+                if last is not None and key <= last:
+                    continue
+                if last is not None:
+                    articles[last] = articles.get(last, "") + text[position : match.start()]
+                last, position = key, match.start()
+                articles[key] = ""
+                started += 1
+            if last is not None:
+                articles[last] = articles.get(last, "") + text[position:]
+            self.last[code] = last
+        return started
+
+    def reset(self, file_name: str) -> None:
+        """Forget the code of a file before it is ingested from its first page."""
+        code = self.code_of(file_name)
+        if code is None:
+            return
+        with self.lock:
+            self.articles.pop(code, None)
+            self.last.pop(code, None)
+
+    def get(self, code: str, key: ArticleKey) -> Optional[Document]:
+        text = self.articles.get(code, {}).get(key)
+        if text is None:
+            return None
+        text = TITLE_PATTERN.sub("", text).strip()
+        return Document(
+            text=text,
+            metadata={"file_name": self.sources.get(code, ""), "code": code, "article": article_label(key)},
+        )
+
+    def parse_query(self, query_str: str) -> Optional[Tuple[str, List[ArticleKey]]]:
+        """Code and article keys of a query which asks for articles only, None for any other query."""
+        if self.query_pattern is None:
+            return None
+        match = self.query_pattern.search(query_str)
+        if match is None:
+            return None
+        rest = query_str[: match.start()] + query_str[match.end() :]
+        if FILLER_PATTERN.sub("", rest):
+            return None
+        code = self.alias_codes[match.group(1)]
+        keys: List[ArticleKey] = []
+        for ref in RANGE_PATTERN.finditer(match.group(2)):
+            start = article_key(ref.group(1), ref.group(2))
+            if ref.group(4):
+                end = article_key(ref.group(4), ref.group(5))
+                keys.extend(key for key in sorted(self.articles.get(code, {})) if start <= key <= end)
+            else:
+                keys.append(start)
+                keys.extend(article_key(*listed.groups()) for listed in re.finditer(ARTICLE_REF, ref.group(6) or ""))
+        return code, keys
+
+    def lookup(self, query_str: str) -> Optional[List[Document]]:
+        """The articles asked for by the query, None when it is not an article query or one is missing."""
+        with self.lock:
+            self.load()
+            parsed = self.parse_query(query_str)
+            if parsed is None or not parsed[1]:
+                return None
+            code, keys = parsed
+            docs = [self.get(code, key) for key in keys]
+        if any(doc is None for doc in docs):
+            return None
+        return docs
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.loaded_mtime:
+            return
+        with open(self.path, encoding="utf-8") as index_file:
+            data = json.load(index_file)
+        self.articles = {
+            code: {parse_label(label): text for label, text in entry["articles"].items()}
+            for code, entry in data.items()
+        }
+        self.sources = {code: entry["source"] for code, entry in data.items()}
+        self.last = {code: parse_label(entry["last"]) if entry["last"] else None for code, entry in data.items()}
+        self.loaded_mtime = mtime
+
+    def save(self) -> None:
+        with self.lock:
+            data = {
+                code: {
+                    "source": self.sources.get(code, ""),
+                    "last": article_label(last) if (last := self.last.get(code)) else None,
+                    "articles": {article_label(key): text for key, text in sorted(articles.items())},
+                }
+                for code, articles in self.articles.items()
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as index_file:
+                json.dump(data, index_file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.loaded_mtime = os.stat(self.path).st_mtime_ns
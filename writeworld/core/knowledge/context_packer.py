@@ -0,0 +1,124 @@
+# mypy: disable-error-code=import-not-found
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+
+from agentuniverse.agent.action.knowledge.store.document import Document
+
+ARTICLE_PATTERN = re.compile(r"第[零〇一二三四五六七八九十百千万\d]+条")
+CJK_PATTERN = re.compile(r"[㐀-鿿豈-﫿　-〿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token count: one token per CJK character, one per four other characters."""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def compact(text: str) -> str:
+    return "".join(text.split())
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    return {text[i : i + size] for i in range(max(len(text) - size + 1, 1))}
+
+
+def overlap_length(head: str, tail: str, min_overlap: int) -> int:
+    """Length of the longest suffix of `head` which is a prefix of `tail`, 0 when below `min_overlap`."""
+    for length in range(min(len(head), len(tail)), min_overlap - 1, -1):
+        if head.endswith(tail[:length]):
+            return length
+    return 0
+
+
+@dataclass
+class Passage:
+    text: str
+    source: str
+    shingles: Set[str] = field(default_factory=set)
+
+    @property
+    def last_article(self) -> Optional[str]:
+        articles = ARTICLE_PATTERN.findall(self.text)
+        return articles[-1] if articles else None
+
+
+class ContextPacker:
+    """Pack retrieved law documents into a compact, token-budgeted context.
+
+    Documents are taken in rerank order. A document contained in, or a near duplicate of, an earlier
+    passage of the same source is dropped; a document continuing an earlier passage of the same
+    article (its start overlaps the passage end) is merged into it. The passages are then added in
+    order while they fit the token budget, each as `[n] source` followed by its text.
+
+    Args:
+        token_budget (Optional[int]): Max estimated tokens of the packed context, None for no limit.
+        duplicate_threshold (float): Shingle Jaccard similarity above which a document is a duplicate.
+        min_overlap (int): Min characters shared by two chunks to be considered adjacent.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, duplicate_threshold: float = 0.8, min_overlap: int = 10):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.min_overlap = min_overlap
+
+    def passages(self, docs: List[Document]) -> List[Passage]:
+        passages: List[Passage] = []
+        for doc in docs:
+            text = (doc.text or "").strip()
+            if not text:
+                continue
+            source = (doc.metadata or {}).get("file_name", "")
+            passage = Passage(text=text, source=source, shingles=shingles(compact(text)))
+            if not self.merge(passages, passage):
+                passages.append(passage)
+        return passages
+
+    def merge(self, passages: List[Passage], new: Passage) -> bool:
+        """Fold `new` into an earlier passage of the same source, False when it stays on its own."""
+        new_compact = compact(new.text)
+        for passage in passages:
+            if passage.source != new.source:
+                continue
+            passage_compact = compact(passage.text)
+            if new_compact in passage_compact or self.similarity(passage, new) >= self.duplicate_threshold:
+                return True
+            if passage_compact in new_compact:
+                passage.text, passage.shingles = new.text, new.shingles
+                return True
+            if self.same_article(passage, new) and (
+                overlap := overlap_length(passage.text, new.text, self.min_overlap)
+            ):
+                passage.text += new.text[overlap:]
+                passage.shingles |= new.shingles
+                return True
+            if self.same_article(new, passage) and (
+                overlap := overlap_length(new.text, passage.text, self.min_overlap)
+            ):
+                passage.text = new.text + passage.text[overlap:]
+                passage.shingles |= new.shingles
+                return True
+        return False
+
+    @staticmethod
+    def similarity(a: Passage, b: Passage) -> float:
+        union = len(a.shingles | b.shingles)
+        return len(a.shingles & b.shingles) / union if union else 0.0
+
+    @staticmethod
+    def same_article(head: Passage, tail: Passage) -> bool:
+        """`tail` continues the article `head` ends in, or starts without an article heading."""
+        leading = ARTICLE_PATTERN.match(tail.text)
+        return leading is None or leading.group() == head.last_article
+
+    def pack(self, docs: List[Document]) -> str:
+        blocks: List[str] = []
+        used = 0
+        for passage in self.passages(docs):
+            block = f"[{len(blocks) + 1}] {passage.source}\n{passage.text}"
+            tokens = estimate_tokens(block) + 1
+            if self.token_budget is not None and used + tokens > self.token_budget:
+                continue
+            blocks.append(block)
+            used += tokens
+        return "\n\n".join(blocks)
@@ -0,0 +1,378 @@
+# mypy: disable-error-code=import-not-found
+"""Streaming, parallel and resumable ingestion of law PDFs into a knowledge.
+
+Pages are extracted and split by the knowledge's insert processors in a process pool, a few pages per
+task. The chunks of every task are embedded in batches, concurrently, once per embedding model of the
+vector stores, and written to all stores of the knowledge with one bulk call per store. A checkpoint
+file records how many pages of each PDF are fully written, so an interrupted run resumes from there.
+A manifest of chunk fingerprints makes re-ingesting an amended file incremental: only the new or changed
+chunks are embedded and written, and the chunks gone from the file are deleted from every store.
+The page text also builds the article index of the knowledge, when it has one.
+
+Usage:
+    python -m writeworld.core.knowledge.law_ingestion resources/民法典.pdf resources/刑法.pdf \
+        --batch-size 25 --concurrency 4 --workers 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor import (
+    DocProcessor,
+)
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor_manager import (
+    DocProcessorManager,
+)
+from agentuniverse.agent.action.knowledge.embedding.embedding_manager import (
+    EmbeddingManager,
+)
+from agentuniverse.agent.action.knowledge.knowledge import Knowledge
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.store import Store
+from agentuniverse.agent.action.knowledge.store.store_manager import StoreManager
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+from writeworld.core.knowledge.article_index import ArticleIndex
+
+# insert processors of the knowledge, set once per worker process.
+_processors: List[DocProcessor] = []
+
+
+def init_worker(processors: List[DocProcessor]) -> None:
+    global _processors
+    _processors = processors
+
+
+def count_pages(file_path: str) -> int:
+    import pypdf
+
+    return len(pypdf.PdfReader(file_path).pages)
+
+
+def extract_pages(file_path: str, start: int, end: int) -> Tuple[int, int, List[Document], str]:
+    """Extract pages [start, end) like the aU pdf reader, then run the insert processors on them.
+
+    The page text is returned with the chunks, for the article index.
+    """
+    import pypdf
+
+    pdf = pypdf.PdfReader(file_path)
+    docs = [
+        Document(
+            text=pdf.pages[page].extract_text(),
+            metadata={"page_label": pdf.page_labels[page], "file_name": Path(file_path).name},
+        )
+        for page in range(start, end)
+    ]
+    text = "\n".join(doc.text for doc in docs)
+    for processor in _processors:
+        docs = processor.process_docs(docs)
+    return start, end, docs, text
+
+
+def batched(items: List[Any], batch_size: int) -> Iterator[List[Any]]:
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]
+
+
+class IngestionCheckpoint:
+    """Number of fully written pages per PDF, keyed by the file path, size and mtime."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.progress: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as checkpoint_file:
+                self.progress = json.load(checkpoint_file)
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        stat = os.stat(file_path)
+        return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def pages_done(self, file_path: str) -> int:
+        return self.progress.get(self.key(file_path), 0)
+
+    def mark(self, file_path: str, pages_done: int) -> None:
+        self.progress[self.key(file_path)] = pages_done
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(self.progress, checkpoint_file, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# metadata identifying the source of a chunk, the other keys (pages, scores) do not change its content.
+FINGERPRINT_KEYS = ("file_name", "code", "article")
+
+
+def fingerprint(doc: Document) -> str:
+    """Hash of the chunk text and of the metadata naming its law, the id only depends on the text.
+
+    The page of the chunk is left out: an amendment which adds a page before it must not rewrite it.
+    """
+    metadata = doc.metadata or {}
+    content = json.dumps([doc.text, *(metadata.get(key) for key in FINGERPRINT_KEYS)], ensure_ascii=False)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class ChunkManifest:
+    """Fingerprints of the chunks written for every file, so a re-ingestion only writes what changed.
+
+    Each run of a file tags the chunks it sees with a generation, the checkpoint key of the file; the
+    chunks left with an older generation once the file is done were removed from it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (file TEXT, doc_id TEXT, fingerprint TEXT, generation TEXT, "
+                "PRIMARY KEY (file, doc_id))"
+            )
+
+    def changed(self, file_name: str, docs: List[Document]) -> List[Document]:
+        """The documents which are new or different since they were last written, once per id."""
+        rows = self.conn.execute("SELECT doc_id, fingerprint FROM chunks WHERE file = ?", (file_name,)).fetchall()
+        written = dict(rows)
+        changed: Dict[str, Document] = {}
+        for doc in docs:
+            if written.get(doc.id) != fingerprint(doc):
+                changed[doc.id] = doc
+        return list(changed.values())
+
+    def record(self, file_name: str, docs: List[Document], generation: str) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO chunks (file, doc_id, fingerprint, generation) VALUES (?, ?, ?, ?)",
+                [(file_name, doc.id, fingerprint(doc), generation) for doc in docs],
+            )
+
+    def stale(self, file_name: str, generation: str) -> List[str]:
+        """Ids of the chunks of an older generation which no other file contains."""
+        rows = self.conn.execute(
+            "SELECT doc_id FROM chunks AS c WHERE file = ? AND generation != ? AND NOT EXISTS "
+            "(SELECT 1 FROM chunks WHERE doc_id = c.doc_id AND file != c.file)",
+            (file_name, generation),
+        ).fetchall()
+        return [doc_id for (doc_id,) in rows]
+
+    def forget_stale(self, file_name: str, generation: str) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE file = ? AND generation != ?", (file_name, generation))
+
+
+class LawIngestion:
+    """Ingest PDFs into the stores of a knowledge.
+
+    Args:
+        knowledge (Knowledge): The knowledge whose insert processors and stores are used.
+        checkpoint (IngestionCheckpoint): Progress of the previous runs.
+        batch_size (int): Number of texts per embedding call.
+        concurrency (int): Number of embedding calls in flight.
+        workers (int): Size of the extraction process pool, 0 extracts in the calling process.
+        pages_per_task (int): Number of pages extracted per task, also the checkpoint granularity.
+        manifest (Optional[ChunkManifest]): Chunks written by the previous runs. With a manifest only new
+            or changed chunks are embedded and written, and chunks gone from a file are deleted from
+            every store; without one every chunk is written.
+    """
+
+    def __init__(
+        self,
+        knowledge: Knowledge,
+        checkpoint: IngestionCheckpoint,
+        batch_size: int = 25,
+        concurrency: int = 4,
+        workers: int = 4,
+        pages_per_task: int = 8,
+        manifest: Optional[ChunkManifest] = None,
+    ) -> None:
+        self.knowledge = knowledge
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.manifest = manifest
+        self.stores: Dict[str, Store] = {name: StoreManager().get_instance_obj(name) for name in knowledge.stores}
+        self.processors: List[DocProcessor] = [
+            DocProcessorManager().get_instance_obj(name) for name in knowledge.insert_processors
+        ]
+        self.article_index: Optional[ArticleIndex] = getattr(knowledge, "article_index", None)
+        self.pages = 0
+        self.chunks = 0
+        self.written = 0
+        self.removed = 0
+
+    def ingest(self, file_paths: List[str]) -> None:
+        start_time = time.time()
+        embed_executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="law_ingestion")
+        if self.workers > 0:
+            extract_executor: Optional[Executor] = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=init_worker, initargs=(self.processors,)
+            )
+        else:
+            extract_executor = None
+            init_worker(self.processors)
+        try:
+            for file_path in file_paths:
+                self.ingest_file(file_path, extract_executor, embed_executor)
+        finally:
+            embed_executor.shutdown()
+            if extract_executor:
+                extract_executor.shutdown()
+        # the stores did not change when every chunk was already written.
+        if (self.written or self.removed) and hasattr(self.knowledge, "invalidate_retrieval_cache"):
+            self.knowledge.invalidate_retrieval_cache(list(self.stores))
+
+        elapsed = max(time.time() - start_time, 1e-9)
+        print(
+            f"Ingested {self.pages} pages, {self.chunks} chunks in {elapsed:.1f}s: "
+            f"{self.pages / elapsed:.2f} pages/s, {self.chunks / elapsed:.2f} chunks/s, "
+            f"{self.written} chunks written, {self.removed} removed"
+        )
+
+    def ingest_file(
+        self, file_path: str, extract_executor: Optional[Executor], embed_executor: ThreadPoolExecutor
+    ) -> None:
+        total_pages = count_pages(file_path)
+        first_page = self.checkpoint.pages_done(file_path)
+        if first_page >= total_pages:
+            LOGGER.info(f"{file_path} is already ingested, skipping.")
+            return
+        LOGGER.info(f"Ingesting {file_path} from page {first_page + 1} of {total_pages}.")
+        tasks = [
+            (file_path, start, min(start + self.pages_per_task, total_pages))
+            for start in range(first_page, total_pages, self.pages_per_task)
+        ]
+        if extract_executor:
+            results = extract_executor.map(extract_pages, *zip(*tasks))
+        else:
+            results = (extract_pages(*task) for task in tasks)
+        file_name = Path(file_path).name
+        generation = self.checkpoint.key(file_path)
+        if self.article_index and first_page == 0:
+            self.article_index.reset(file_name)
+        # results come back in page order, so the checkpoint always covers a prefix of the file.
+        for start, end, docs, text in results:
+            changed = self.manifest.changed(file_name, docs) if self.manifest else docs
+            self.write(changed, self.embed(changed, embed_executor))
+            if self.manifest:
+                self.manifest.record(file_name, docs, generation)
+            if self.article_index:
+                self.article_index.add_text(file_name, text)
+                self.article_index.save()
+            self.checkpoint.mark(file_path, end)
+            self.pages += end - start
+            self.chunks += len(docs)
+            self.written += len(changed)
+            LOGGER.info(f"{file_path}: {end}/{total_pages} pages, {len(changed)} changed chunks written.")
+        if self.manifest:
+            self.remove(self.manifest.stale(file_name, generation))
+            self.manifest.forget_stale(file_name, generation)
+
+    def remove(self, doc_ids: List[str]) -> None:
+        """Delete the chunks from every store."""
+        if not doc_ids:
+            return
+        for store in self.stores.values():
+            bulk_delete(store, doc_ids)
+        self.removed += len(doc_ids)
+
+    def embed(self, docs: List[Document], embed_executor: ThreadPoolExecutor) -> Dict[str, List[List[float]]]:
+        """Embed the chunks once per embedding model used by the stores."""
+        if not docs:
+            return {}
+        models = {store.embedding_model for store in self.stores.values() if getattr(store, "embedding_model", None)}
+        texts = [doc.text for doc in docs]
+        embeddings: Dict[str, List[List[float]]] = {}
+        for model in models:
+            embedding = EmbeddingManager().get_instance_obj(model)
+            batches = embed_executor.map(embedding.get_embeddings, batched(texts, self.batch_size))
+            embeddings[model] = [vector for batch in batches for vector in batch]
+        return embeddings
+
+    def write(self, docs: List[Document], embeddings: Dict[str, List[List[float]]]) -> None:
+        if not docs:
+            return
+        for store in self.stores.values():
+            model = getattr(store, "embedding_model", None)
+            store_docs = [
+                doc.model_copy(update={"embedding": embeddings[model][i] if model else []})
+                for i, doc in enumerate(docs)
+            ]
+            bulk_write(store, store_docs)
+
+    @staticmethod
+    def from_args(knowledge: Knowledge, args: argparse.Namespace) -> "LawIngestion":
+        return LawIngestion(
+            knowledge,
+            IngestionCheckpoint(args.checkpoint),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            workers=args.workers,
+            pages_per_task=args.pages_per_task,
+            manifest=ChunkManifest(args.manifest),
+        )
+
+
+def bulk_write(store: Store, docs: List[Document]) -> None:
+    """Write the documents with one call per store, upserting so a resumed batch is not duplicated."""
+    collection = getattr(store, "collection", None)
+    if collection is not None:
+        # ChromaStore writes one document per call, upsert the batch on its collection instead.
+        collection.upsert(
+            ids=[doc.id for doc in docs],
+            documents=[doc.text for doc in docs],
+            metadatas=[doc.metadata for doc in docs],
+            embeddings=[doc.embedding for doc in docs],
+        )
+    else:
+        store.upsert_document(docs)
+
+
+def bulk_delete(store: Store, doc_ids: List[str]) -> None:
+    collection = getattr(store, "collection", None)
+    if collection is not None:
+        collection.delete(ids=doc_ids)
+    else:
+        for doc_id in doc_ids:
+            store.delete_document(doc_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest law PDFs into a knowledge.")
+    parser.add_argument("files", nargs="+", help="PDF files to ingest.")
+    parser.add_argument("--knowledge", default="law_knowledge", help="Name of the knowledge component.")
+    parser.add_argument("--batch-size", type=int, default=25, help="Texts per embedding call.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding calls in flight.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes.")
+    parser.add_argument("--pages-per-task", type=int, default=8, help="Pages per extraction task.")
+    parser.add_argument("--checkpoint", default="law_ingestion_checkpoint.json", help="Checkpoint file.")
+    parser.add_argument("--manifest", default="law_ingestion_manifest.db", help="Fingerprints of the written chunks.")
+    args = parser.parse_args()
+
+    from agentuniverse.agent.action.knowledge.knowledge_manager import KnowledgeManager
+    from agentuniverse.agent_serve.web.post_fork_queue import POST_FORK_QUEUE
+    from agentuniverse.base.agentuniverse import AgentUniverse
+
+    project_root = Path(__file__).resolve().parents[3]
+    files = [os.path.abspath(file) for file in args.files]
+    args.checkpoint = os.path.abspath(args.checkpoint)
+    args.manifest = os.path.abspath(args.manifest)
+    # store paths in the component configs are relative to bootstrap/, like the server application.
+    os.chdir(project_root / "bootstrap")
+    AgentUniverse().start(config_path=str(project_root / "config" / "config.toml"))
+    for func, args_, kwargs in POST_FORK_QUEUE:
+        func(*args_, **kwargs)
+    knowledge = KnowledgeManager().get_instance_obj(args.knowledge)
+    LawIngestion.from_args(knowledge, args).ingest(files)
+
+
+if __name__ == "__main__":
+    main()
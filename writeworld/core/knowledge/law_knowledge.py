@@ -4,18 +4,242 @@
 # @Author  : fanen.lhy
 # @Email   : fanen.lhy@antgroup.com
 # @FileName: law_knowledge.py
-import json
-from typing import Any, List
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, Future, wait
+from typing import Any, Dict, List, Optional, Tuple
 
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor import (
+    DocProcessor,
+)
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor_manager import (
+    DocProcessorManager,
+)
 from agentuniverse.agent.action.knowledge.knowledge import Knowledge
 from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.store_manager import StoreManager
+from agentuniverse.base.annotation.trace import trace_knowledge
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+from writeworld.core.knowledge.article_index import ArticleIndex
+from writeworld.core.knowledge.context_packer import ContextPacker
+from writeworld.core.knowledge.retrieval_cache import RetrievalCache
+
+# Stores with a query still running past its timeout. `Future.cancel` can't stop a running query, so
+# such a store is skipped until it finishes instead of tying up another worker.
+_stuck_stores: Dict[str, int] = {}
+_stuck_stores_lock = threading.Lock()
+
+
+def _release_stuck_store(store_name: str) -> None:
+    with _stuck_stores_lock:
+        _stuck_stores[store_name] -= 1
+        if not _stuck_stores[store_name]:
+            del _stuck_stores[store_name]
+
+
+def document_key(doc: Document) -> Tuple[str, str]:
+    """Identify a document by its whitespace-normalized text and source file."""
+    metadata = doc.metadata or {}
+    return "".join((doc.text or "").split()), metadata.get("file_name", "")
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Document]], k: int = 60) -> List[Document]:
+    """Merge ranked document lists with reciprocal-rank fusion.
+
+    Each document scores `sum(1 / (k + rank))` over the lists it appears in. Documents with the same
+    text and source file are merged, keeping the first one seen.
+    """
+    scores: Dict[Tuple[str, str], float] = {}
+    docs: Dict[Tuple[str, str], Document] = {}
+    for ranked_docs in ranked_lists:
+        for rank, doc in enumerate(ranked_docs, start=1):
+            key = document_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return [docs[key] for key in sorted(scores, key=lambda key: scores[key], reverse=True)]
 
 
 class LawKnowledge(Knowledge):
+    """Knowledge of the Chinese civil and criminal law.
+
+    Attributes:
+        retrieval_mode (str): `fusion` queries the routed stores concurrently under `store_timeout`
+            and merges the results with reciprocal-rank fusion, `default` keeps the aU behaviour.
+        store_timeout (float): The global budget, in seconds, of a fusion query: the routed stores are queried
+            concurrently and the ones not done when it runs out are left out of the result. A store still
+            running a timed-out query is skipped by the later queries until that query finishes.
+        rrf_k (int): The rank constant of reciprocal-rank fusion.
+        retrieval_cache (Optional[RetrievalCache]): Cache of the final reranked documents, configured by
+            `retrieval_cache: {db_path, max_entries}`. Re-ingesting a store invalidates its entries, and
+            a degraded run, missing a store or a post processor, is not cached.
+        context_packer (ContextPacker): Dedupes, merges and budgets the documents passed to the LLM,
+            configured by `context_packing: {token_budget, duplicate_threshold, min_overlap}`.
+        article_index (Optional[ArticleIndex]): Answers the queries naming code articles without retrieval,
+            configured by `article_index: {path, codes}` and built by the law ingestion command.
+    """
+
+    retrieval_mode: str = "default"
+    store_timeout: float = 5.0
+    rrf_k: int = 60
+    retrieval_cache: Optional[RetrievalCache] = None
+    context_packer: ContextPacker = ContextPacker()
+    article_index: Optional[ArticleIndex] = None
+
+    def query_knowledge(self, **kwargs: Any) -> List[Document]:
+        query_str = kwargs.get("query_str") or ""
+        top_k = kwargs.get("similarity_top_k")
+        if self.article_index:
+            articles = self.article_index.lookup(query_str)
+            if articles is not None:
+                return articles
+        if self.retrieval_cache:
+            cached_docs = self.retrieval_cache.get(query_str, self.stores, top_k)
+            if cached_docs is not None:
+                return cached_docs
+
+        start = time.time()
+        degraded: List[str] = []
+        if self.retrieval_mode == "fusion":
+            retrieved_docs: List[Document] = self._fusion_query(degraded, **kwargs)
+        else:
+            retrieved_docs = self._default_query(degraded, **kwargs)
+        if self.retrieval_cache:
+            if degraded:
+                LOGGER.info(f"Not caching the results of {query_str!r}, degraded by {degraded}.")
+            else:
+                self.retrieval_cache.put(query_str, self.stores, top_k, retrieved_docs, time.time() - start)
+        return retrieved_docs
+
+    def insert_knowledge(self, **kwargs: Any) -> None:
+        super().insert_knowledge(**kwargs)
+        self.invalidate_retrieval_cache(kwargs.get("stores", self.stores))
+
+    def update_knowledge(self, **kwargs: Any) -> None:
+        super().update_knowledge(**kwargs)
+        self.invalidate_retrieval_cache(kwargs.get("stores", self.stores))
+
+    def invalidate_retrieval_cache(self, stores: List[str]) -> None:
+        """Drop the cached results built from the re-ingested stores."""
+        if self.retrieval_cache:
+            self.retrieval_cache.invalidate_stores(stores)
+
+    def fusion_query_knowledge(self, **kwargs: Any) -> Tuple[List[Document], List[str]]:
+        """Query the routed stores concurrently and fuse their rankings.
+
+        Returns:
+            The documents, and what degraded them: the stores which timed out or failed and the post
+            processors which failed. A degraded run must not be cached.
+        """
+        degraded: List[str] = []
+        return self._fusion_query(degraded, **kwargs), degraded
+
+    @trace_knowledge
+    def _fusion_query(self, degraded: List[str], **kwargs: Any) -> List[Document]:
+        query = Query(**kwargs)
+        query = self._paraphrase_query(query)
+        ranked_lists = self.query_stores(self._route_rag(query), degraded)
+        retrieved_docs = reciprocal_rank_fusion(ranked_lists, self.rrf_k)
+        return self._rag_post_process(retrieved_docs, query, degraded)
+
+    @trace_knowledge
+    def _default_query(self, degraded: List[str], **kwargs: Any) -> List[Document]:
+        """The aU query: every routed store to completion, the documents deduped by id, reporting failures."""
+        query = Query(**kwargs)
+        query = self._paraphrase_query(query)
+        futures: Dict[Future[List[Document]], str] = {}
+        for store_query, store_name in self._route_rag(query):
+            store = StoreManager().get_instance_obj(store_name)
+            futures[self.query_executor.submit(store.query, store_query)] = store_name
+        wait(futures, return_when=ALL_COMPLETED)
+        retrieved_docs: Dict[Any, Document] = {}
+        for future, store_name in futures.items():
+            try:
+                for doc in future.result():
+                    retrieved_docs.setdefault(doc.id, doc)
+            except Exception as e:
+                degraded.append(store_name)
+                LOGGER.error(f"Exception occurred in store {store_name} query: {e}")
+        return self._rag_post_process(list(retrieved_docs.values()), query, degraded)
+
+    def query_stores(
+        self, query_tasks: List[Tuple[Query, str]], failed_stores: Optional[List[str]] = None
+    ) -> List[List[Document]]:
+        """Run the (query, store) tasks concurrently, dropping the stores which fail or time out.
+
+        All the tasks share the `store_timeout` budget. The dropped stores are appended to `failed_stores`.
+        """
+        failed = failed_stores if failed_stores is not None else []
+        futures: Dict[Future[List[Document]], str] = {}
+        for store_query, store_name in query_tasks:
+            if store_name in _stuck_stores:
+                failed.append(store_name)
+                LOGGER.warn(f"Store {store_name} is still running a timed-out query, skipping it.")
+                continue
+            store = StoreManager().get_instance_obj(store_name)
+            futures[self.query_executor.submit(store.query, store_query)] = store_name
+        done, not_done = wait(futures, timeout=self.store_timeout)
+        for future in not_done:
+            store_name = futures[future]
+            failed.append(store_name)
+            LOGGER.warn(f"Store {store_name} timed out after {self.store_timeout}s, using partial results.")
+            if future.cancel():
+                continue
+            with _stuck_stores_lock:
+                _stuck_stores[store_name] = _stuck_stores.get(store_name, 0) + 1
+            future.add_done_callback(lambda _, name=store_name: _release_stuck_store(name))
+
+        ranked_lists = []
+        for future in futures:
+            if future not in done:
+                continue
+            try:
+                ranked_lists.append(future.result())
+            except Exception as e:
+                failed.append(futures[future])
+                LOGGER.error(f"Exception occurred in store {futures[future]} query: {e}")
+        return ranked_lists
+
+    def _rag_post_process(
+        self, origin_docs: List[Document], query: Query, degraded: Optional[List[str]] = None
+    ) -> List[Document]:
+        """Run the post processors, skipping the ones which fail and appending them to `degraded`.
+
+        A failed reranker keeps the ranking of the previous processors, cut to its `top_n`, so the local
+        reranker stands in for the remote one when that service is unavailable.
+        """
+        for processor_code in self.post_processors:
+            doc_processor: DocProcessor = DocProcessorManager().get_instance_obj(processor_code)
+            try:
+                origin_docs = doc_processor.process_docs(origin_docs, query=query)
+            except Exception as e:
+                LOGGER.warn(f"Post processor {processor_code} failed, keeping the previous ranking: {e}")
+                if degraded is not None:
+                    degraded.append(processor_code)
+                top_n = getattr(doc_processor, "top_n", None)
+                if top_n:
+                    origin_docs = origin_docs[:top_n]
+        return origin_docs
+
     def to_llm(self, retrieved_docs: List[Document]) -> Any:
+        return self.context_packer.pack(retrieved_docs)
 
-        retrieved_texts = [
-            json.dumps({"text": doc.text, "from": doc.metadata["file_name"]}, ensure_ascii=False)
-            for doc in retrieved_docs
-        ]
-        return "\n=========================================\n".join(retrieved_texts)
+    def _initialize_by_component_configer(self, knowledge_configer: ComponentConfiger) -> "LawKnowledge":
+        super()._initialize_by_component_configer(knowledge_configer)
+        if hasattr(knowledge_configer, "retrieval_mode"):
+            self.retrieval_mode = knowledge_configer.retrieval_mode
+        if hasattr(knowledge_configer, "store_timeout"):
+            self.store_timeout = knowledge_configer.store_timeout
+        if hasattr(knowledge_configer, "rrf_k"):
+            self.rrf_k = knowledge_configer.rrf_k
+        if hasattr(knowledge_configer, "retrieval_cache"):
+            self.retrieval_cache = RetrievalCache(**knowledge_configer.retrieval_cache)
+        if hasattr(knowledge_configer, "context_packing"):
+            self.context_packer = ContextPacker(**knowledge_configer.context_packing)
+        if hasattr(knowledge_configer, "article_index"):
+            self.article_index = ArticleIndex(**knowledge_configer.article_index)
+        return self
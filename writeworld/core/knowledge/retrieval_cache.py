@@ -0,0 +1,154 @@
+# mypy: disable-error-code=import-not-found
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+from writeworld.util.sqlite_pool import get_pool
+
+
+def normalize_query(query_str: str) -> str:
+    """Normalize a query so that trivially different spellings share a cache entry."""
+    text = unicodedata.normalize("NFKC", query_str or "").lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?？!！.。")
+
+
+@dataclass
+class CacheEntry:
+    docs: List[Dict[str, Any]]
+    generations: Dict[str, int]
+    cost: float
+
+
+class RetrievalCache:
+    """Two-tier cache of the final reranked documents of a knowledge query.
+
+    Entries are keyed on the normalized query text, the store set and top_k. The memory tier is a
+    per-process LRU, the SQLite tier is shared by all workers. Each entry remembers the generation of
+    the stores it was built from; `invalidate_stores` bumps those generations when a store is
+    re-ingested, which makes the older entries miss in every process.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 1024) -> None:
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.pool = get_pool(db_path)
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        with self.pool.write() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS retrieval_cache ("
+                "key TEXT PRIMARY KEY, docs TEXT, generations TEXT, cost REAL, accessed_at REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS store_generations (store TEXT PRIMARY KEY, generation INT)")
+
+    @staticmethod
+    def cache_key(query_str: str, stores: Iterable[str], top_k: Optional[int]) -> str:
+        raw = json.dumps([normalize_query(query_str), sorted(stores), top_k], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def generations(self, stores: Iterable[str]) -> Dict[str, int]:
+        stores = list(stores)
+        with self.pool.read() as conn:
+            rows = conn.execute(
+                f"SELECT store, generation FROM store_generations WHERE store IN ({','.join('?' * len(stores))})",
+                stores,
+            ).fetchall()
+        current = dict(rows)
+        return {store: current.get(store, 0) for store in stores}
+
+    def get(self, query_str: str, stores: List[str], top_k: Optional[int]) -> Optional[List[Document]]:
+        start = time.time()
+        key = self.cache_key(query_str, stores, top_k)
+        generations = self.generations(stores)
+        entry = self._memory_get(key)
+        if entry is None:
+            entry = self._disk_get(key)
+        if entry is None or entry.generations != generations:
+            self.misses += 1
+            return None
+        self._memory_put(key, entry)
+        self.hits += 1
+        self.saved_seconds += max(entry.cost - (time.time() - start), 0.0)
+        LOGGER.info(f"Retrieval cache hit, hit rate {self.hit_rate():.2%}, saved {self.saved_seconds:.2f}s in total.")
+        return [Document(**doc) for doc in entry.docs]
+
+    def put(self, query_str: str, stores: List[str], top_k: Optional[int], docs: List[Document], cost: float) -> None:
+        key = self.cache_key(query_str, stores, top_k)
+        entry = CacheEntry(
+            docs=[{"id": doc.id, "text": doc.text, "metadata": doc.metadata} for doc in docs],
+            generations=self.generations(stores),
+            cost=cost,
+        )
+        self._memory_put(key, entry)
+        with self.pool.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO retrieval_cache (key, docs, generations, cost, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.docs, ensure_ascii=False), json.dumps(entry.generations), cost, time.time()),
+            )
+            conn.execute(
+                "DELETE FROM retrieval_cache WHERE key NOT IN "
+                "(SELECT key FROM retrieval_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate_stores(self, stores: Iterable[str]) -> None:
+        """Bump the generation of the re-ingested stores, every entry built from them becomes stale."""
+        with self.pool.write() as conn:
+            for store in stores:
+                conn.execute(
+                    "INSERT INTO store_generations (store, generation) VALUES (?, 1) "
+                    "ON CONFLICT(store) DO UPDATE SET generation = generation + 1",
+                    (store,),
+                )
+        with self._lock:
+            self._memory.clear()
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def _memory_get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        with self.pool.read() as conn:
+            row: Optional[Tuple[str, str, float]] = conn.execute(
+                "SELECT docs, generations, cost FROM retrieval_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        with self.pool.write() as conn:
+            conn.execute("UPDATE retrieval_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(docs=json.loads(row[0]), generations=json.loads(row[1]), cost=row[2])
@@ -0,0 +1,204 @@
+# mypy: disable-error-code=import-not-found
+"""LLMs whose calls are governed by the request rate and concurrency limits of their provider.
+
+`RateLimitedLLM` takes a token and a slot of the `RateLimiter` shared by the workers before every call,
+sync or async, and keeps the slot until a streamed answer is consumed or dropped. The provider client
+does not retry by itself: the failed calls are retried by `RateLimitedLLM`, each attempt taking a new
+token, up to `max_retries` times. It is mixed into the LLM classes of the providers, which the yaml
+select in place of the agentUniverse ones, and is configured by the `rate_limit` key of the yaml:
+
+    rate_limit:
+      db_path: '../../DB/llm_rate_limit.db'
+      key: 'dashscope/qwen2-72b-instruct'  # defaults to `<name>/<model_name>`
+      requests_per_minute: 60
+      burst: 5
+      max_concurrency: 8
+      max_wait: 10  # seconds a call queues before it fails with TimeoutError
+      cooldown: 5  # seconds every worker holds off after a 429 without Retry-After
+      max_retries: 2  # defaults to the `max_retries` of the LLM
+
+LLMs sharing the account of a provider share its limits by using the same `key`. Without the
+`rate_limit` key, the calls are not limited.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Union
+
+from agentuniverse.base.config.component_configer.configers.llm_configer import (
+    LLMConfiger,
+)
+from agentuniverse.llm.default.baichuan_openai_style_llm import BAICHUANOpenAIStyleLLM
+from agentuniverse.llm.default.deep_seek_openai_style_llm import DefaultDeepSeekLLM
+from agentuniverse.llm.default.kimi_openai_style_llm import KIMIOpenAIStyleLLM
+from agentuniverse.llm.default.qwen_openai_style_llm import QWenOpenAIStyleLLM
+from agentuniverse.llm.default.wenxin_llm import WenXinLLM
+from agentuniverse.llm.llm import LLM
+from agentuniverse.llm.llm_output import LLMOutput
+from openai import APIConnectionError
+from pydantic import Field
+
+from writeworld.core.llm.stub_llm import StubOpenAILLM
+from writeworld.util.rate_limiter import Lease, RateLimiter, get_rate_limiter
+
+DEFAULT_DB_PATH = "../../DB/llm_rate_limit.db"
+LIMIT_KEYS = ("requests_per_minute", "burst", "max_concurrency", "lease")
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds of the Retry-After header of a 429 error, 0 for a 429 without it, None for other errors."""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def should_retry(error: Exception) -> bool:
+    """Whether the call may succeed on retry, as the OpenAI client decides: timeouts, conflicts, 429s and 5xxs."""
+    if isinstance(error, APIConnectionError):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code in (408, 409, 429) or status_code >= 500)
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Backoff before a retry. A 429 waits through the limiter instead, which `penalize` holds off."""
+    return 0.0 if retry_after(error) is not None else min(0.5 * 2.0**attempt, 8.0)
+
+
+class RateLimitedLLM(LLM):
+    """LLM taking a request token and a concurrency slot of its provider before each call.
+
+    Attributes:
+        rate_limit (Dict[str, Any]): The `rate_limit` key of the yaml, see the module docstring.
+    """
+
+    rate_limit: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def limit_key(self) -> str:
+        return self.rate_limit.get("key") or f"{self.name}/{self.model_name}"
+
+    @property
+    def limits(self) -> Dict[str, Any]:
+        return {key: self.rate_limit[key] for key in LIMIT_KEYS if key in self.rate_limit}
+
+    def limiter(self) -> RateLimiter:
+        return get_rate_limiter(self.rate_limit.get("db_path") or DEFAULT_DB_PATH)
+
+    @property
+    def retries(self) -> int:
+        return int(self.rate_limit.get("max_retries", self.max_retries) or 0)
+
+    def _new_client(self) -> Any:
+        return self._without_retries(super()._new_client())
+
+    def _new_async_client(self) -> Any:
+        return self._without_retries(super()._new_async_client())
+
+    def _without_retries(self, client: Any) -> Any:
+        # the client would retry a 429 straight away, bypassing the limiter.
+        if self.rate_limit and getattr(client, "max_retries", None):
+            return client.with_options(max_retries=0)
+        return client
+
+    def _penalize(self, error: Exception) -> None:
+        seconds = retry_after(error)
+        if seconds is not None:
+            self.limiter().penalize(self.limit_key, seconds or self.rate_limit.get("cooldown", 5), **self.limits)
+
+    def _call(self, *args: Any, **kwargs: Any) -> Union[LLMOutput, Iterator[LLMOutput]]:
+        if not self.rate_limit:
+            return super()._call(*args, **kwargs)
+        attempt = 0
+        while True:
+            lease = self.limiter().acquire(self.limit_key, self.rate_limit.get("max_wait", 10), **self.limits)
+            try:
+                # the provider may pop the kwargs it reads, keep them for the retries.
+                output = super()._call(*args, **dict(kwargs))
+            except Exception as e:
+                lease.release()
+                self._penalize(e)
+                if attempt >= self.retries or not should_retry(e):
+                    raise
+                time.sleep(retry_delay(e, attempt))
+                attempt += 1
+                continue
+            if isinstance(output, LLMOutput):
+                lease.release()
+                return output
+            return self._release_after(output, lease)
+
+    async def _acall(self, *args: Any, **kwargs: Any) -> Union[LLMOutput, AsyncIterator[LLMOutput]]:
+        if not self.rate_limit:
+            return await super()._acall(*args, **kwargs)
+        attempt = 0
+        while True:
+            lease = await self.limiter().acquire_async(
+                self.limit_key, self.rate_limit.get("max_wait", 10), **self.limits
+            )
+            try:
+                output = await super()._acall(*args, **dict(kwargs))
+            except Exception as e:
+                lease.release()
+                self._penalize(e)
+                if attempt >= self.retries or not should_retry(e):
+                    raise
+                await asyncio.sleep(retry_delay(e, attempt))
+                attempt += 1
+                continue
+            if isinstance(output, LLMOutput):
+                lease.release()
+                return output
+            return self._arelease_after(output, lease)
+
+    def _release_after(self, stream: Iterator[LLMOutput], lease: Lease) -> Iterator[LLMOutput]:
+        # also run when the consumer drops the stream, as the generator is closed.
+        try:
+            yield from stream
+        except Exception as e:
+            self._penalize(e)
+            raise
+        finally:
+            lease.release()
+
+    async def _arelease_after(self, stream: AsyncIterator[LLMOutput], lease: Lease) -> AsyncIterator[LLMOutput]:
+        try:
+            async for output in stream:
+                yield output
+        except Exception as e:
+            self._penalize(e)
+            raise
+        finally:
+            lease.release()
+
+    def initialize_by_component_configer(self, component_configer: LLMConfiger) -> "LLM":
+        super().initialize_by_component_configer(component_configer)
+        self.rate_limit = component_configer.configer.value.get("rate_limit") or {}
+        return self
+
+
+class RateLimitedQWenLLM(RateLimitedLLM, QWenOpenAIStyleLLM):
+    """`QWenOpenAIStyleLLM` under the `rate_limit` of its yaml."""
+
+
+class RateLimitedDeepSeekLLM(RateLimitedLLM, DefaultDeepSeekLLM):
+    """`DefaultDeepSeekLLM` under the `rate_limit` of its yaml."""
+
+
+class RateLimitedKimiLLM(RateLimitedLLM, KIMIOpenAIStyleLLM):
+    """`KIMIOpenAIStyleLLM` under the `rate_limit` of its yaml."""
+
+
+class RateLimitedBaichuanLLM(RateLimitedLLM, BAICHUANOpenAIStyleLLM):
+    """`BAICHUANOpenAIStyleLLM` under the `rate_limit` of its yaml."""
+
+
+class RateLimitedWenXinLLM(RateLimitedLLM, WenXinLLM):
+    """`WenXinLLM` under the `rate_limit` of its yaml."""
+
+
+class RateLimitedStubLLM(RateLimitedLLM, StubOpenAILLM):
+    """`StubOpenAILLM` under the `rate_limit` of its yaml, to load test the limits offline."""
@@ -0,0 +1,254 @@
+# mypy: disable-error-code=import-not-found
+"""A local OpenAI-compatible chat completions server with modelled latency, and the LLM using it.
+
+`StubLLMServer` answers `POST /v1/chat/completions` like the OpenAI API, streamed as server-sent
+events or in one JSON body, after the time to first token and at the token rate of its
+`LatencyModel`, and fails the configured share of the calls with 429 or 500. The text depends only on
+the seed, the model and the messages. `StubOpenAILLM` is an `OpenAIStyleLLM` on such a server, started
+in the process from the `stub` key of the LLM yaml when it builds its first client, unless the yaml
+gives an `api_base`: a server started at configuration, in the master, would not survive the fork. Agents select it
+by its name like any other LLM, and run offline through the real OpenAI client.
+
+Run a shared server for several workers with `python -m writeworld.core.llm.stub_llm --port 8900`.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, cast
+
+import httpx
+from agentuniverse.base.config.component_configer.configers.llm_configer import (
+    LLMConfiger,
+)
+from agentuniverse.llm.llm import LLM
+from agentuniverse.llm.openai_style_llm import OpenAIStyleLLM
+from openai import AsyncOpenAI, OpenAI
+from pydantic import Field
+
+from writeworld.util.latency_model import LatencyModel
+
+TOKEN_PATTERN = re.compile(r"[\u3000-\u9fff\uff00-\uffef]|[^\s\u3000-\u9fff\uff00-\uffef]+")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of a text without a tokenizer download: a CJK character or an ASCII word is one token."""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops the connects of a burst of streams, which retry a second later.
+    request_queue_size = 1024
+
+
+class StubLLMServer:
+    """An OpenAI-compatible chat completions endpoint on a local port, served by a daemon thread.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 picks a free one.
+        completion_tokens (int): Tokens of an answer, at most the `max_tokens` of the request.
+        **latency: Arguments of `LatencyModel`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, completion_tokens: int = 200, **latency: Any) -> None:
+        self.model = LatencyModel(**latency)
+        self.completion_tokens = completion_tokens
+        # the attempts of every request, a retried request draws its failure again.
+        self.attempts: Counter[str] = Counter()
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "tokens": 0}
+        self.httpd = _Server((host, port), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.socket.getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _draw(self, body: Dict[str, Any]) -> Tuple[Any, Any]:
+        """The generator of the answer and the one of this attempt of the request."""
+        request = json.dumps([body.get("model"), body.get("messages")], sort_keys=True, ensure_ascii=False)
+        with self.lock:
+            attempt = self.attempts[request]
+            self.attempts[request] += 1
+            self.stats["requests"] += 1
+        return self.model.rng(request), self.model.rng(f"{request}\x00{attempt}")
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_event(self, payload: Any) -> None:
+                data = f"data: {payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)}\n\n"
+                encoded = data.encode()
+                self.wfile.write(f"{len(encoded):x}\r\n".encode() + encoded + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub-chat", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}.", "type": "not_found"}})
+
+            def do_POST(self) -> None:
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}.", "type": "not_found"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                try:
+                    server._complete(self, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client went away in the middle of the stream.
+                    pass
+
+        return Handler
+
+    def _complete(self, handler: Any, body: Dict[str, Any]) -> None:
+        text_rng, attempt_rng = self._draw(body)
+        time.sleep(self.model.first_token_delay(attempt_rng))
+        if self.model.fails(attempt_rng):
+            with self.lock:
+                self.stats["errors"] += 1
+            status, kind = attempt_rng.choice([(429, "rate_limit_error"), (500, "server_error")])
+            handler._send_json(status, {"error": {"message": "Simulated provider error.", "type": kind}})
+            return
+        count = min(body.get("max_tokens") or self.completion_tokens, self.completion_tokens)
+        tokens = self.model.tokens(text_rng, count)
+        prompt = "".join(str(message.get("content", "")) for message in body.get("messages", []))
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count, "total_tokens": 0}
+        usage["total_tokens"] = usage["prompt_tokens"] + count
+        completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), body.get("model")
+        with self.lock:
+            self.stats["tokens"] += count
+        if not body.get("stream"):
+            time.sleep(sum(self.model.token_delay(attempt_rng) for _ in tokens[1:]))
+            message = {"role": "assistant", "content": "".join(tokens)}
+            completion = {"id": completion_id, "object": "chat.completion", "created": created, "model": model}
+            choice = {"index": 0, "message": message, "finish_reason": "stop"}
+            handler._send_json(200, {**completion, "choices": [choice], "usage": usage})
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.model.token_delay(attempt_rng))
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            handler._send_event({**chunk, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        handler._send_event({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        handler._send_event("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_servers: Dict[Tuple[Any, ...], StubLLMServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_stub_server(**config: Any) -> StubLLMServer:
+    """The server of the process for a configuration, started on first use."""
+    key = (os.getpid(), tuple(sorted((k, str(v)) for k, v in config.items())))
+    with _servers_lock:
+        if key not in _servers:
+            _servers[key] = StubLLMServer(**config)
+        return _servers[key]
+
+
+class StubOpenAILLM(OpenAIStyleLLM):
+    """An OpenAI-style LLM answered by a local `StubLLMServer`, for offline runs and load tests.
+
+    Attributes:
+        stub (Dict[str, Any]): Arguments of `StubLLMServer`, from the `stub` key of the yaml.
+    """
+
+    api_key: Optional[str] = "stub"
+    stub: Dict[str, Any] = Field(default_factory=dict)
+
+    def initialize_by_component_configer(self, component_configer: LLMConfiger) -> "LLM":
+        super().initialize_by_component_configer(component_configer)
+        self.stub = component_configer.configer.value.get("stub") or {}
+        return self
+
+    @property
+    def base_url(self) -> str:
+        """The `api_base` of the yaml, or the stub server of this process, started on first use."""
+        return self.api_base or get_stub_server(**self.stub).url
+
+    def _new_client(self) -> OpenAI:
+        if self.client is not None:
+            return cast(OpenAI, self.client)
+        # trust_env=False: a proxy of the environment must not see the calls to the local server.
+        return OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.request_timeout,
+            max_retries=self.max_retries,
+            http_client=httpx.Client(trust_env=False),
+            **(self.client_args or {}),
+        )
+
+    def _new_async_client(self) -> AsyncOpenAI:
+        if self.async_client is not None:
+            return cast(AsyncOpenAI, self.async_client)
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.request_timeout,
+            max_retries=self.max_retries,
+            http_client=httpx.AsyncClient(trust_env=False),
+            **(self.client_args or {}),
+        )
+
+    def get_num_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def max_context_length(self) -> int:
+        return super().max_context_length() or 128000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the stub chat completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args())
+    server = StubLLMServer(**args)
+    print(f"stub chat completions on {server.url}")
+    server.thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# mypy: disable-error-code=import-not-found
+import math
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set
+
+from agentuniverse.agent.agent import Agent
+from agentuniverse.agent.agent_model import AgentModel
+from agentuniverse.agent.input_object import InputObject
+from agentuniverse.agent.memory.memory import Memory
+from agentuniverse.agent.output_object import OutputObject
+from agentuniverse.agent.plan.planner.peer_planner.peer_planner import (
+    PeerPlanner,
+    default_eval_threshold,
+    default_jump_step,
+    default_retry_count,
+)
+from agentuniverse.base.context.framework_context_manager import FrameworkContextManager
+from agentuniverse.base.util.agent_util import assemble_memory_output
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+default_max_concurrency = 5
+
+# fraction of the sub-questions that must be answered before the expressing agent starts.
+default_express_ratio = 1.0
+
+# seconds to wait for the remaining sub-questions once the express ratio is reached.
+default_straggler_timeout = 0.0
+
+
+class ParallelPeerPlanner(PeerPlanner):
+    """PEER planner which executes the planned sub-questions concurrently.
+
+    Every sub-question from the planning agent is sent to the executing agent on its own, through a
+    thread pool capped by `max_concurrency`. The expressing agent starts as soon as `express_ratio` of
+    the sub-questions are answered; the stragglers keep running and are picked up by the next round.
+    When the review fails, only the sub-questions listed in the reviewer's `rejected` field are re-run.
+
+    An agent selects it with `plan.planner.name: 'parallel_peer_planner'`, see `parallel_peer_agent`;
+    the `PeerAgentTemplate` agents of agentUniverse run the PEER work pattern instead of a planner.
+
+    Planner config:
+        max_concurrency (int): Max number of sub-questions executed at the same time.
+        express_ratio (float): Fraction of answered sub-questions required to start expressing.
+        straggler_timeout (float): Seconds to wait for the remaining sub-questions after the ratio is reached.
+    """
+
+    def agents_run(
+        self,
+        agent_model: AgentModel,
+        agents: Dict[str, Any],
+        planner_config: Dict[str, Any],
+        agent_input: Dict[str, Any],
+        input_object: InputObject,
+    ) -> Dict[str, Any]:
+        """Planner agents run.
+
+        Args:
+            agent_model (AgentModel): Agent model object.
+            agents (dict): Planner agents.
+            planner_config (dict): Planner config object.
+            agent_input (dict): Planner input object.
+            input_object (InputObject): Agent input object.
+        Returns:
+            dict: The planner result.
+        """
+        retry_count: int = planner_config.get("retry_count", default_retry_count)
+        jump_step: str = planner_config.get("jump_step", default_jump_step)
+        eval_threshold: int = planner_config.get("eval_threshold", default_eval_threshold)
+        max_concurrency: int = planner_config.get("max_concurrency", default_max_concurrency)
+        express_ratio: float = planner_config.get("express_ratio", default_express_ratio)
+        straggler_timeout: float = planner_config.get("straggler_timeout", default_straggler_timeout)
+
+        self.build_expert_framework(planner_config, input_object)
+
+        planning_agent: Agent = agents.get("planning")
+        executing_agent: Agent = agents.get("executing")
+        expressing_agent: Agent = agents.get("expressing")
+        reviewing_agent: Agent = agents.get("reviewing")
+
+        peer_memory: Memory = self.handle_memory(agent_model, agent_input)
+
+        loop_results: List[Dict[str, Any]] = []
+        framework: List[str] = []
+        answers: Dict[int, Dict[str, Any]] = {}
+        in_flight: Dict[Future[Dict[str, Any]], int] = {}
+        to_run: Set[int] = set()
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="parallel_peer_planner")
+        try:
+            for i in range(retry_count):
+                LOGGER.info(f"Starting parallel peer agents, retry_count is {i + 1}.")
+                if not framework or jump_step == "planning":
+                    planning_result = self.planning_agent_run(planning_agent, input_object, agent_input, peer_memory)
+                    framework = planning_result.get_data("framework") or [agent_input.get(self.input_key)]
+                    for future in in_flight:
+                        future.cancel()
+                    in_flight.clear()
+                    answers.clear()
+                    to_run = set(range(len(framework)))
+
+                if executing_agent:
+                    context_values = FrameworkContextManager().get_all_contexts()
+                    # a rejected sub-question may still be running from an earlier round, drop that answer.
+                    for future, index in list(in_flight.items()):
+                        if index in to_run:
+                            future.cancel()
+                            del in_flight[future]
+                    for index in sorted(to_run):
+                        answers.pop(index, None)
+                        future = executor.submit(
+                            self.execute_sub_question,
+                            executing_agent,
+                            input_object,
+                            index,
+                            framework[index],
+                            context_values,
+                        )
+                        in_flight[future] = index
+                    self.collect_sub_results(
+                        in_flight, answers, math.ceil(len(framework) * express_ratio), straggler_timeout
+                    )
+                executing_result = self.executing_result_run(
+                    executing_agent, answers, input_object, agent_input, peer_memory
+                )
+
+                expressing_result = self.expressing_agent_run(expressing_agent, input_object, agent_input, peer_memory)
+                reviewing_result = self.reviewing_agent_run(reviewing_agent, input_object, agent_input, peer_memory)
+                loop_results.append({
+                    "planning_result": input_object.get_data("planning_result"),
+                    "executing_result": executing_result,
+                    "expressing_result": expressing_result,
+                    "reviewing_result": reviewing_result,
+                })
+                if not reviewing_result.to_dict() or (
+                    reviewing_result.get_data("score") and reviewing_result.get_data("score") >= eval_threshold
+                ):
+                    break
+                to_run = self.rejected_sub_questions(reviewing_result, len(framework), jump_step)
+                # sub-questions which failed or never finished are always retried.
+                to_run |= set(range(len(framework))) - set(answers) - set(in_flight.values())
+                LOGGER.info(f"Review rejected sub-questions {sorted(i + 1 for i in to_run)}, re-running them.")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return {"result": loop_results}
+
+    @staticmethod
+    def execute_sub_question(
+        executing_agent: Agent,
+        input_object: InputObject,
+        index: int,
+        sub_question: str,
+        context_values: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Run the executing agent on a single sub-question.
+
+        Args:
+            executing_agent (Agent): Executing agent object.
+            input_object (InputObject): The input parameters passed by the user.
+            index (int): Position of the sub-question in the planning framework.
+            sub_question (str): The sub-question to answer.
+            context_values (Dict[str, Any]): Framework context of the calling thread.
+        Returns:
+            dict: The executing result of the sub-question, numbered by its position in the framework.
+        """
+        FrameworkContextManager().set_all_contexts(context_values)
+        sub_input = InputObject(input_object.to_dict())
+        sub_input.add_data("planning_result", OutputObject({"framework": [sub_question]}))
+        result: OutputObject = executing_agent.run(**sub_input.to_dict())
+        sub_results = result.get_data("executing_result") or []
+        output = sub_results[0].get("output", "") if sub_results else ""
+        return {
+            "index": index,
+            "input": f"Question {index + 1}: {sub_question}",
+            "output": re.sub(r"^Answer 1: ", f"Answer {index + 1}: ", output),
+        }
+
+    @staticmethod
+    def collect_sub_results(
+        in_flight: Dict[Future[Dict[str, Any]], int],
+        answers: Dict[int, Dict[str, Any]],
+        required: int,
+        straggler_timeout: float,
+    ) -> None:
+        """Wait until `required` sub-questions are answered, then give the rest `straggler_timeout` seconds.
+
+        Finished futures are moved from `in_flight` into `answers`, the unfinished ones stay in `in_flight`.
+        """
+
+        def harvest(done: Set[Future[Dict[str, Any]]]) -> None:
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    answers[index] = future.result()
+                except Exception as e:
+                    LOGGER.error(f"Sub-question {index + 1} failed: {e}")
+
+        pending = set(in_flight)
+        while pending and len(answers) < required:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            harvest(done)
+        if pending:
+            done, pending = wait(pending, timeout=straggler_timeout)
+            harvest(done)
+        if pending:
+            LOGGER.info(f"Start expressing with {len(answers)} answered, {len(pending)} sub-questions still running.")
+
+    def executing_result_run(
+        self,
+        executing_agent: Optional[Agent],
+        answers: Dict[int, Dict[str, Any]],
+        input_object: InputObject,
+        agent_input: Dict[str, Any],
+        peer_memory: Memory,
+    ) -> OutputObject:
+        """Assemble the answered sub-questions into the executing result of this round."""
+        executing_result = OutputObject({"executing_result": [answers[index] for index in sorted(answers)]})
+        input_object.add_data("executing_result", executing_result)
+        if executing_agent:
+            executing_agent_name = executing_agent.agent_model.info.get("name")
+            content = (
+                f"The agent responsible for executing the specific subtask is: {executing_agent_name}, "
+                f"Human: {agent_input.get(self.input_key)}, "
+                f"AI: {executing_result.get_data('executing_result')}"
+            )
+            assemble_memory_output(peer_memory, agent_input, content, executing_agent_name)
+        return executing_result
+
+    @staticmethod
+    def rejected_sub_questions(reviewing_result: OutputObject, total: int, jump_step: str) -> Set[int]:
+        """Indexes of the sub-questions to re-run after a failed review.
+
+        The reviewer may return a `rejected` list of 1-based sub-question numbers. Without it, all
+        sub-questions are re-run when the jump step goes back to executing, and none otherwise.
+        """
+        output = reviewing_result.get_data("output")
+        rejected = output.get("rejected") if isinstance(output, dict) else None
+        if rejected is None:
+            return set(range(total)) if jump_step == "executing" else set()
+        indexes = set()
+        for number in rejected:
+            try:
+                index = int(number) - 1
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < total:
+                indexes.add(index)
+        return indexes
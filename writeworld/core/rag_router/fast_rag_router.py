@@ -0,0 +1,238 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+import json
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, cast
+
+import jieba
+from agentuniverse.agent.action.knowledge.doc_processor.jieba_keyword_extractor import (
+    chinese_stopwords,
+)
+from agentuniverse.agent.action.knowledge.rag_router.nlu_rag_router import NluRagRouter
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.util.logging.logging_util import LOGGER
+from pydantic import Field
+
+from writeworld.core.knowledge.retrieval_cache import normalize_query
+from writeworld.util.sqlite_pool import SQLitePool, get_pool
+
+# label of a decision covering every domain.
+ALL_DOMAINS = "all"
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in jieba.lcut(text) if word.strip() and word not in chinese_stopwords]
+
+
+class RouterClassifier:
+    """Multinomial naive Bayes over query tokens, trained on past router decisions.
+
+    It is shared by the threads routing queries, which learn and predict under its lock.
+    """
+
+    def __init__(self) -> None:
+        self.label_counts: Counter[str] = Counter()
+        self.token_counts: Dict[str, Counter[str]] = {}
+        self.vocabulary: Set[str] = set()
+        self.lock = threading.Lock()
+
+    @property
+    def samples(self) -> int:
+        with self.lock:
+            return sum(self.label_counts.values())
+
+    def trained(self, min_samples: int, min_label_samples: int) -> bool:
+        """Whether it has `min_samples` samples, with two labels or more having `min_label_samples` each.
+
+        The posterior of a single label is always 1.0, whatever the query.
+        """
+        with self.lock:
+            labels = [count for count in self.label_counts.values() if count >= min_label_samples]
+            return sum(self.label_counts.values()) >= min_samples and len(labels) >= 2
+
+    def learn(self, tokens: List[str], label: str) -> None:
+        with self.lock:
+            self.label_counts[label] += 1
+            self.token_counts.setdefault(label, Counter()).update(tokens)
+            self.vocabulary.update(tokens)
+
+    def predict(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        """The most likely label and its posterior probability, None when fewer than two labels were learnt."""
+        with self.lock:
+            if len(self.label_counts) < 2:
+                return None, 0.0
+            samples = sum(self.label_counts.values())
+            log_scores = {}
+            for label, label_count in self.label_counts.items():
+                counts = self.token_counts[label]
+                total = sum(counts.values()) + len(self.vocabulary)
+                log_scores[label] = math.log(label_count / samples) + sum(
+                    math.log((counts[token] + 1) / total) for token in tokens
+                )
+        best = max(log_scores, key=lambda label: log_scores[label])
+        norm = sum(math.exp(score - log_scores[best]) for score in log_scores.values())
+        return best, 1.0 / norm
+
+
+class FastRagRouter(NluRagRouter):
+    """NLU router which decides locally when it can and asks the LLM only when unsure.
+
+    The query is matched against the regex `rules` of each domain; when one domain holds at least
+    `rule_confidence` of the matches, the query goes to the stores of that domain. Otherwise a naive
+    Bayes classifier trained on the past LLM decisions is tried, once it has `min_samples` samples, of
+    two domains or more with `min_label_samples` each, and reaches `classifier_confidence`. The LLM
+    router of the parent class decides the rest, and its decision trains the classifier. Decisions are
+    memoized per normalized query and store list, in memory and in the SQLite file at `db_path`.
+
+    Attributes:
+        domains (Dict[str, List[str]]): Stores of each domain.
+        rules (Dict[str, List[str]]): Regexes of each domain's terminology.
+        rule_confidence (float): Min share of the rule matches for a local decision.
+        classifier_confidence (float): Min classifier posterior for a local decision.
+        min_samples (int): Number of LLM decisions before the classifier is used.
+        min_label_samples (int): Min number of LLM decisions of each of two domains or more before the
+            classifier is used.
+        db_path (Optional[str]): SQLite file of the memoized decisions, in memory only when empty.
+        memo_size (int): Max number of decisions memoized in memory.
+    """
+
+    domains: Dict[str, List[str]] = {}
+    rules: Dict[str, List[str]] = {}
+    rule_confidence: float = 0.8
+    classifier_confidence: float = 0.9
+    min_samples: int = 20
+    min_label_samples: int = 5
+    db_path: Optional[str] = None
+    memo_size: int = 1024
+    classifier: RouterClassifier = Field(default_factory=RouterClassifier)
+    memo: OrderedDict[str, List[str]] = Field(default_factory=OrderedDict)
+    lock: threading.Lock = Field(default_factory=threading.Lock)
+    pool: Optional[SQLitePool] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _rag_route(self, query: Query, store_list: List[str]) -> List[Tuple[Query, str]]:
+        key = f"{normalize_query(query.query_str)}|{','.join(sorted(store_list))}"
+        stores = self.memoized(key)
+        if stores is None:
+            label, source = self.local_decision(query.query_str)
+            if label is not None:
+                stores = self.domain_stores(label, store_list)
+            else:
+                stores = [store for _, store in super()._rag_route(query, store_list)]
+                label, source = self.domain_label(stores), "llm"
+                if label is not None:
+                    self.classifier.learn(tokenize(query.query_str), label)
+            LOGGER.info(f"Rag router decided {stores} by {source} for query: {query.query_str}")
+            self.memoize(key, query.query_str, stores, label, source)
+        return [(query, store) for store in stores]
+
+    def local_decision(self, query_str: str) -> Tuple[Optional[str], str]:
+        """The domain label decided without the LLM, with the way it was decided."""
+        hits = {
+            domain: sum(1 for pattern in patterns if re.search(pattern, query_str))
+            for domain, patterns in self.rules.items()
+        }
+        total = sum(hits.values())
+        if total:
+            domain = max(hits, key=lambda domain: hits[domain])
+            if hits[domain] / total >= self.rule_confidence:
+                return domain, "rules"
+        if self.classifier.trained(self.min_samples, self.min_label_samples):
+            label, probability = self.classifier.predict(tokenize(query_str))
+            if label is not None and probability >= self.classifier_confidence:
+                return label, "classifier"
+        return None, "llm"
+
+    def domain_stores(self, label: str, store_list: List[str]) -> List[str]:
+        domains = self.domains.values() if label == ALL_DOMAINS else [self.domains.get(label, [])]
+        targets = {store for stores in domains for store in stores}
+        return [store for store in store_list if store in targets]
+
+    def domain_label(self, stores: List[str]) -> Optional[str]:
+        labels = {domain for domain, domain_stores in self.domains.items() if set(stores) & set(domain_stores)}
+        if not labels:
+            return None
+        return labels.pop() if len(labels) == 1 else ALL_DOMAINS
+
+    def memoized(self, key: str) -> Optional[List[str]]:
+        with self.lock:
+            if key in self.memo:
+                self.memo.move_to_end(key)
+                return self.memo[key]
+        pool = self.database()
+        if pool is None:
+            return None
+        with pool.read() as conn:
+            row = conn.execute("SELECT stores FROM router_decisions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        stores = cast(List[str], json.loads(row[0]))
+        self.remember(key, stores)
+        return stores
+
+    def memoize(self, key: str, query_str: str, stores: List[str], label: Optional[str], source: str) -> None:
+        self.remember(key, stores)
+        pool = self.database()
+        if pool is not None:
+            with pool.write() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO router_decisions (key, query, stores, label, source) VALUES (?, ?, ?, ?, ?)",
+                    (key, query_str, json.dumps(stores), label, source),
+                )
+
+    def remember(self, key: str, stores: List[str]) -> None:
+        with self.lock:
+            self.memo[key] = stores
+            self.memo.move_to_end(key)
+            while len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+
+    def database(self) -> Optional[SQLitePool]:
+        """The decision database, training the classifier on its LLM decisions when first opened."""
+        if not self.db_path:
+            return None
+        with self.lock:
+            if self.pool is None:
+                pool = get_pool(self.db_path)
+                with pool.write() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS router_decisions "
+                        "(key TEXT PRIMARY KEY, query TEXT, stores TEXT, label TEXT, source TEXT)"
+                    )
+                with pool.read() as conn:
+                    rows = conn.execute(
+                        "SELECT query, label FROM router_decisions WHERE source = 'llm' AND label IS NOT NULL"
+                    ).fetchall()
+                self.classifier = RouterClassifier()
+                for query_str, label in rows:
+                    self.classifier.learn(tokenize(query_str), label)
+                self.pool = pool
+        return self.pool
+
+    def _initialize_by_component_configer(self, rag_router_config: ComponentConfiger) -> "FastRagRouter":
+        super()._initialize_by_component_configer(rag_router_config)
+        if hasattr(rag_router_config, "domains"):
+            self.domains = rag_router_config.domains
+        if hasattr(rag_router_config, "rules"):
+            self.rules = rag_router_config.rules
+        if hasattr(rag_router_config, "rule_confidence"):
+            self.rule_confidence = rag_router_config.rule_confidence
+        if hasattr(rag_router_config, "classifier_confidence"):
+            self.classifier_confidence = rag_router_config.classifier_confidence
+        if hasattr(rag_router_config, "min_samples"):
+            self.min_samples = rag_router_config.min_samples
+        if hasattr(rag_router_config, "min_label_samples"):
+            self.min_label_samples = rag_router_config.min_label_samples
+        if hasattr(rag_router_config, "db_path"):
+            self.db_path = rag_router_config.db_path
+        if hasattr(rag_router_config, "memo_size"):
+            self.memo_size = rag_router_config.memo_size
+        return self
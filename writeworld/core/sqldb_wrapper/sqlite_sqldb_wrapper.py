@@ -0,0 +1,45 @@
+# mypy: disable-error-code=import-not-found
+from typing import Any, Dict, cast
+
+from agentuniverse.base.config.component_configer.configers.sqldb_wrapper_config import (
+    SQLDBWrapperConfiger,
+)
+from agentuniverse.database.sqldb_wrapper import SQLDBWrapper
+from langchain_community.utilities.sql_database import SQLDatabase
+from pydantic import Field
+from sqlalchemy import event
+
+from writeworld.util.sqlite_pool import DEFAULT_PRAGMAS, apply_pragmas
+
+
+class SQLiteDBWrapper(SQLDBWrapper):
+    """A SQLDBWrapper on a SQLite file, with the connections of its engine tuned like the SQLite pool.
+
+    Every connection the engine opens is switched to WAL and gets the page cache, mmap and busy timeout
+    pragmas, so the pooled connections read concurrently while one of them writes.
+
+    Attributes:
+        pragmas (Dict[str, Any]): Overrides of `DEFAULT_PRAGMAS`, from the `pragmas` key of the yaml.
+    """
+
+    pragmas: Dict[str, Any] = Field(default_factory=lambda: dict(DEFAULT_PRAGMAS))
+
+    def initialize_by_component_configer(self, db_wrapper_configer: SQLDBWrapperConfiger) -> "SQLiteDBWrapper":
+        super().initialize_by_component_configer(db_wrapper_configer)
+        configer = db_wrapper_configer.configer
+        overrides = configer.value.get("pragmas") if configer and configer.value else None
+        self.pragmas = {**DEFAULT_PRAGMAS, **(overrides or {})}
+        return self
+
+    @property
+    def sql_database(self) -> SQLDatabase:
+        database = cast(SQLDatabase, super().sql_database)
+        engine = database._engine
+        if not event.contains(engine, "connect", self._on_connect):
+            event.listen(engine, "connect", self._on_connect)
+            # the table reflection of SQLDatabase opened connections before the listener.
+            engine.dispose()
+        return database
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        apply_pragmas(dbapi_connection, self.pragmas)
@@ -0,0 +1,252 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
+
+import jieba
+import numpy as np
+from agentuniverse.agent.action.knowledge.doc_processor.doc_processor_manager import (
+    DocProcessorManager,
+)
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.sqlite_store import SQLiteStore
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from numpy.typing import NDArray
+from pydantic import Field
+
+from writeworld.core.store.numpy_vector_store import top_k_indexes
+from writeworld.util.prewarm import register_preload
+from writeworld.util.sqlite_pool import SQLitePool, get_pool
+
+VERSION_TABLE = "bm25_data_version"
+
+
+def create_version_triggers(conn: Any) -> None:
+    """Count the writes to the store tables in `bm25_data_version`, whichever connection makes them."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER)")
+    conn.execute(f"INSERT OR IGNORE INTO {VERSION_TABLE} (id, version) VALUES (0, 0)")
+    for table in ("documents", "inverted_index"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {VERSION_TABLE}_{table}_{event.lower()} AFTER {event} ON {table} "
+                f"BEGIN UPDATE {VERSION_TABLE} SET version = version + 1 WHERE id = 0; END"
+            )
+
+
+def database_fingerprint(conn: Any) -> NDArray[Any]:
+    """The write count and the last rowid of the documents, changed by every committed write.
+
+    Unlike the mtime of the files, it does not change on checkpoints, and it survives a restart.
+    """
+    version = conn.execute(f"SELECT version FROM {VERSION_TABLE} WHERE id = 0").fetchone()
+    last_rowid = conn.execute("SELECT MAX(rowid) FROM documents").fetchone()
+    return np.array([version[0] if version else -1, last_rowid[0] or 0], dtype=np.int64)
+
+
+class CompiledBM25Store(SQLiteStore):
+    """SQLite store answering keyword queries from a compiled in-memory BM25 index.
+
+    The `inverted_index` table is compiled into CSR arrays: the postings of the i-th term are
+    `doc_indexes[offsets[i]:offsets[i + 1]]`, and `weights` holds the full BM25 contribution of each
+    posting, with the IDF and document length norm already applied. A query sums the postings of its
+    keywords with `np.bincount`. The arrays are saved next to the database and reused at startup
+    while the database fingerprint matches: triggers count the writes to the store tables, so writes
+    through this store or any other connection trigger a rebuild on the next query.
+
+    The database is opened through the shared SQLite pool: reads use the connection of the calling
+    thread and writes go through the serialized writer, in one transaction per call.
+
+    With `preload: true` in the yaml, the index is loaded by the master before the workers fork, and
+    the workers keep it while the database did not change.
+
+    Attributes:
+        index_path (Optional[str]): Path of the serialized index, defaults to `<db_path>.bm25.npz`.
+    """
+
+    index_path: Optional[str] = None
+    conn: Optional[sqlite3.Connection] = None
+    pool: Optional[SQLitePool] = None
+    index: Optional[Dict[str, NDArray[Any]]] = None
+    term_indexes: Dict[str, int] = {}
+    documents: List[Tuple[str, str, Optional[str]]] = []
+    lock: Any = Field(default_factory=threading.RLock)
+
+    def _new_client(self) -> None:
+        self.pool = get_pool(self.db_path)
+        with self.sqlite_pool.write() as conn:
+            self.conn = conn
+            self._create_tables()
+            create_version_triggers(conn)
+        # a worker keeps the index the master preloaded, and shares its pages.
+        if not self.index_is_current():
+            self.load_index()
+
+    def preload(self) -> None:
+        """Load the index in the master before the fork, closing the connections it took on the way.
+
+        The workers open their own in their post-fork `_new_client`, which keeps the inherited index.
+        """
+        self._new_client()
+        self.sqlite_pool.close()
+        self.conn = None
+
+    @property
+    def sqlite_pool(self) -> SQLitePool:
+        if self.pool is None:
+            raise Exception(f"Store {self.name} is not connected, call `_new_client` first.")
+        return self.pool
+
+    @property
+    def serialized_path(self) -> str:
+        return self.index_path or f"{self.db_path}.bm25.npz"
+
+    def fingerprint(self) -> NDArray[Any]:
+        with self.sqlite_pool.read() as conn:
+            return database_fingerprint(conn)
+
+    def index_is_current(self) -> bool:
+        return self.index is not None and np.array_equal(self.index["fingerprint"], self.fingerprint())
+
+    def load_index(self) -> None:
+        """Load the serialized index when it matches the database, compile a new one otherwise."""
+        fingerprint = self.fingerprint()
+        index = None
+        if os.path.exists(self.serialized_path):
+            with np.load(self.serialized_path) as serialized:
+                if np.array_equal(serialized["fingerprint"], fingerprint):
+                    index = dict(serialized)
+        if index is None:
+            index = self.compile_index()
+            index["fingerprint"] = fingerprint
+            tmp_path = self.serialized_path + ".tmp"
+            with open(tmp_path, "wb") as index_file:
+                np.savez(index_file, **index)
+            os.replace(tmp_path, self.serialized_path)
+        with self.sqlite_pool.read() as conn:
+            self.documents = conn.execute("SELECT id, text, metadata FROM documents ORDER BY rowid").fetchall()
+        self.term_indexes = {str(term): i for i, term in enumerate(index["terms"])}
+        self.index = index
+
+    def compile_index(self) -> Dict[str, NDArray[Any]]:
+        with self.sqlite_pool.read() as conn:
+            rows = conn.execute("SELECT id, text, word_count FROM documents ORDER BY rowid").fetchall()
+            postings = conn.execute("SELECT DISTINCT term, doc_id FROM inverted_index").fetchall()
+        doc_positions = {doc_id: i for i, (doc_id, _, _) in enumerate(rows)}
+        doc_lengths = np.array([word_count or 0 for _, _, word_count in rows], dtype=np.float32)
+        avg_doc_length = max(float(doc_lengths.mean()) if len(rows) else 0.0, 1.0)
+
+        term_docs: Dict[str, List[int]] = {}
+        for term, doc_id in postings:
+            if doc_id in doc_positions:
+                term_docs.setdefault(term, []).append(doc_positions[doc_id])
+        counters: Dict[int, Counter[str]] = {}
+        terms = sorted(term_docs)
+        offsets = [0]
+        doc_indexes: List[int] = []
+        term_freqs: List[int] = []
+        idfs: List[float] = []
+        for term in terms:
+            positions = sorted(term_docs[term])
+            idf = math.log((len(rows) - len(positions) + 0.5) / (len(positions) + 0.5) + 1)
+            for position in positions:
+                if position not in counters:
+                    counters[position] = Counter(jieba.lcut(rows[position][1] or ""))
+                doc_indexes.append(position)
+                term_freqs.append(counters[position][term])
+                idfs.append(idf)
+            offsets.append(len(doc_indexes))
+
+        doc_array = np.array(doc_indexes, dtype=np.int32)
+        tf = np.array(term_freqs, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_array] / avg_doc_length)
+        weights = np.array(idfs, dtype=np.float32) * tf * (self.k1 + 1) / (tf + norm)
+        return {
+            "terms": np.array(terms, dtype=str),
+            "offsets": np.array(offsets, dtype=np.int64),
+            "doc_indexes": doc_array,
+            "weights": weights.astype(np.float32),
+            "num_docs": np.array(len(rows), dtype=np.int64),
+        }
+
+    def query(self, query: Query, **kwargs: Any) -> List[Document]:
+        if len(query.keywords) > 0:
+            query_terms = query.keywords
+        else:
+            query_terms = self._get_document_keyword(Document(text=query.query_str))
+            query.keywords = query_terms
+
+        with self.lock:
+            if not self.index_is_current():
+                self.load_index()
+            index, term_indexes, documents = (
+                cast(Dict[str, NDArray[Any]], self.index),
+                self.term_indexes,
+                self.documents,
+            )
+
+        offsets = index["offsets"]
+        spans = [
+            (offsets[i], offsets[i + 1]) for i in (term_indexes.get(term) for term in query_terms) if i is not None
+        ]
+        if not spans:
+            return []
+        doc_indexes = np.concatenate([index["doc_indexes"][start:end] for start, end in spans])
+        weights = np.concatenate([index["weights"][start:end] for start, end in spans])
+        scores = np.bincount(doc_indexes, weights=weights, minlength=int(index["num_docs"]))
+        candidates = np.unique(doc_indexes)
+        top_k = query.similarity_top_k if query.similarity_top_k else self.similarity_top_k
+        results = []
+        for position in candidates[top_k_indexes(scores[candidates], top_k)]:
+            doc_id, text, metadata = documents[position]
+            results.append(Document(id=doc_id, text=text, metadata=json.loads(metadata) if metadata else None))
+        return results
+
+    def extract_keywords(self, documents: List[Document]) -> None:
+        """Extract the keywords of the documents in one batch when the keyword extractor supports it."""
+        extractor = DocProcessorManager().get_instance_obj(self.keyword_extractor) if self.keyword_extractor else None
+        if not hasattr(extractor, "extract_many"):
+            return
+        missing = [document for document in documents if not document.keywords]
+        for document, keywords in zip(missing, extractor.extract_many([document.text for document in missing])):
+            document.keywords.update(keywords)
+
+    def _get_document_keyword(self, document: Document) -> Set[str]:
+        if document.keywords:
+            return cast(Set[str], document.keywords)
+        return cast(Set[str], super()._get_document_keyword(document))
+
+    def insert_document(self, documents: List[Document], **kwargs: Any) -> None:
+        self.extract_keywords(documents)
+        with self.sqlite_pool.write() as conn:
+            self.conn = conn
+            super().insert_document(documents, **kwargs)
+        self.index = None
+
+    def upsert_document(self, documents: List[Document], **kwargs: Any) -> None:
+        self.extract_keywords(documents)
+        with self.sqlite_pool.write() as conn:
+            self.conn = conn
+            super().upsert_document(documents, **kwargs)
+        self.index = None
+
+    def delete_document(self, document_id: str, **kwargs: Any) -> None:
+        with self.sqlite_pool.write() as conn:
+            self.conn = conn
+            super().delete_document(document_id)
+        self.index = None
+
+    def _initialize_by_component_configer(self, sqlite_store_configer: ComponentConfiger) -> "CompiledBM25Store":
+        super()._initialize_by_component_configer(sqlite_store_configer)
+        if hasattr(sqlite_store_configer, "index_path"):
+            self.index_path = sqlite_store_configer.index_path
+        if getattr(sqlite_store_configer, "preload", False):
+            register_preload(f"store {self.name}", self.preload)
+        return self
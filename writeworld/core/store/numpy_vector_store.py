@@ -0,0 +1,344 @@
+# mypy: disable-error-code=import-not-found
+import contextlib
+import fcntl
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, cast
+
+import numpy as np
+from agentuniverse.agent.action.knowledge.embedding.embedding_manager import (
+    EmbeddingManager,
+)
+from agentuniverse.agent.action.knowledge.store.document import Document
+from agentuniverse.agent.action.knowledge.store.query import Query
+from agentuniverse.agent.action.knowledge.store.store import Store
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from numpy.typing import NDArray
+from pydantic import Field
+
+from writeworld.core.store import quantization as quantizer
+from writeworld.util.prewarm import register_preload
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.jsonl"
+IVF_FILE = "ivf.npz"
+CODES_FILE = "codes.npy"
+QUANTIZER_FILE = "quantizer.npz"
+QUANTIZER_LOCK_FILE = "quantizer.lock"
+
+
+def normalize_rows(matrix: NDArray[Any]) -> NDArray[Any]:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return cast(NDArray[Any], matrix / np.maximum(norms, 1e-12))
+
+
+def remove_file(path: str) -> None:
+    """Delete a store file left by an earlier save, if any."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def top_k_indexes(scores: NDArray[Any], k: int) -> NDArray[Any]:
+    """Indexes of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def build_ivf(matrix: NDArray[Any], nlist: int, iterations: int = 10, seed: int = 0) -> Dict[str, NDArray[Any]]:
+    """Partition the normalized rows with spherical k-means.
+
+    Returns the centroids, the row indexes ordered by list and the start offset of every list in that
+    order, so that the rows of list i are `order[offsets[i]:offsets[i + 1]]`.
+    """
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(matrix))
+    centroids = matrix[rng.choice(len(matrix), nlist, replace=False)].copy()
+    assignment = np.zeros(len(matrix), dtype=np.int64)
+    for _ in range(iterations):
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        for i in range(nlist):
+            members = matrix[assignment == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+    return {"centroids": centroids.astype(np.float32), "order": order, "offsets": offsets}
+
+
+class NumpyVectorStore(Store):
+    """Vector store keeping the embeddings in a memory-mapped `.npy` matrix.
+
+    The rows are L2-normalized float32 embeddings, `metadata.jsonl` holds the id, text and metadata of
+    each row in the same order. Queries score every row with one matrix-vector product, or only the
+    `nprobe` closest IVF lists when `nlist` is set. The matrix is opened with `mmap_mode='r'`, so the
+    gunicorn workers share its pages through the OS page cache, and it is remapped when another
+    process rewrites it. With `preload: true` in the yaml, the master maps the files before the workers
+    fork, and they inherit the mapping and the records.
+
+    With `quantization` set to `int8` or `pq`, queries score compressed codes of the rows instead
+    (`codes.npy`, also memory-mapped), so only the codes need to stay resident; the float32 matrix is
+    kept on disk and only read for the `rescore` best candidates, which are scored exactly. The codes
+    are built by the writes, or by the first load missing them, preferably the preload of the master;
+    the processes write and read the codes and the quantizer under a file lock, so the workers build
+    them once and never read the codes of one build with the quantizer of another.
+
+    Attributes:
+        persist_path (str): Directory of the store files.
+        embedding_model (Optional[str]): Embedding component used for documents and queries without one.
+        similarity_top_k (int): Number of documents returned by a query.
+        nlist (int): Number of IVF lists, 0 for exact search over all rows.
+        nprobe (int): Number of IVF lists scanned by a query.
+        quantization (str): `none`, `int8` or `pq` (product quantization).
+        pq_m (int): Number of PQ subspaces, one code byte each; must divide the embedding dimension.
+        rescore (int): Number of candidates re-scored with the float32 rows, 0 keeps the approximate scores.
+    """
+
+    persist_path: Optional[str] = None
+    embedding_model: Optional[str] = None
+    similarity_top_k: Optional[int] = 10
+    nlist: int = 0
+    nprobe: int = 8
+    quantization: str = "none"
+    pq_m: int = 64
+    rescore: int = 0
+    embeddings: Optional[NDArray[Any]] = None
+    records: List[Dict[str, Any]] = []
+    ivf: Optional[Dict[str, NDArray[Any]]] = None
+    quantized: Optional[Dict[str, NDArray[Any]]] = None
+    loaded_mtime: int = 0
+    lock: Any = Field(default_factory=threading.RLock)
+
+    def _new_client(self) -> Any:
+        os.makedirs(os.path.dirname(self.file_path(EMBEDDINGS_FILE)), exist_ok=True)
+        self.load()
+
+    def file_path(self, file_name: str) -> str:
+        if self.persist_path is None:
+            raise Exception(f"Store {self.name} needs a persist_path.")
+        return os.path.join(self.persist_path, file_name)
+
+    def load(self) -> None:
+        """Map the store files, a no-op when they did not change since the last load."""
+        embeddings_path = self.file_path(EMBEDDINGS_FILE)
+        if not os.path.exists(embeddings_path):
+            self.embeddings, self.records, self.ivf, self.quantized, self.loaded_mtime = None, [], None, None, 0
+            return
+        mtime = os.stat(embeddings_path).st_mtime_ns
+        if mtime == self.loaded_mtime:
+            return
+        self.embeddings = np.load(embeddings_path, mmap_mode="r")
+        with open(self.file_path(METADATA_FILE), encoding="utf-8") as metadata_file:
+            self.records = [json.loads(line) for line in metadata_file]
+        ivf_path = self.file_path(IVF_FILE)
+        self.ivf = dict(np.load(ivf_path)) if self.nlist and os.path.exists(ivf_path) else None
+        if self.ivf is not None and len(self.ivf["order"]) != len(self.records):
+            # lists of other rows, e.g. saved by a process whose save did not finish: search exactly.
+            self.ivf = None
+        self.quantized = self.load_quantized()
+        self.loaded_mtime = mtime
+
+    def load_quantized(self) -> Optional[Dict[str, NDArray[Any]]]:
+        """Map the codes of the rows, quantizing the rows first when the codes are missing or stale."""
+        if self.quantization == "none" or not len(self.records):
+            return None
+        with self.quantizer_lock(shared=True):
+            params = self.read_quantized()
+        if params is None:
+            with self.quantizer_lock():
+                # another process may have quantized the rows while this one waited for the lock.
+                params = self.read_quantized()
+                if params is None:
+                    self.save_quantized(np.asarray(self.embeddings))
+                    params = self.read_quantized()
+        if params is None:
+            raise Exception(f"Store {self.name} could not quantize its {len(self.records)} rows.")
+        return params
+
+    def read_quantized(self) -> Optional[Dict[str, NDArray[Any]]]:
+        """The saved quantizer and mapped codes, None when they are missing or of other rows."""
+        codes_path = self.file_path(CODES_FILE)
+        quantizer_path = self.file_path(QUANTIZER_FILE)
+        if not os.path.exists(quantizer_path) or not os.path.exists(codes_path):
+            return None
+        with np.load(quantizer_path) as saved:
+            params = dict(saved)
+        params["codes"] = np.load(codes_path, mmap_mode="r")
+        # codes of another quantization or of other rows would score the wrong documents.
+        if str(params.pop("quantization", "")) != self.quantization or len(params["codes"]) != len(self.records):
+            return None
+        return params
+
+    @contextlib.contextmanager
+    def quantizer_lock(self, shared: bool = False) -> Iterator[None]:
+        """Lock the codes and the quantizer files against the other processes."""
+        with open(self.file_path(QUANTIZER_LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save_quantized(self, matrix: NDArray[Any]) -> None:
+        """Quantize the rows and swap in the codes and the quantizer, under the exclusive quantizer lock."""
+        quantized = quantizer.train(matrix, self.quantization, self.pq_m)
+        codes_tmp = self.file_path(CODES_FILE + ".tmp")
+        with open(codes_tmp, "wb") as codes_file:
+            np.save(codes_file, quantized.pop("codes"))
+        os.replace(codes_tmp, self.file_path(CODES_FILE))
+        quantizer_tmp = self.file_path(QUANTIZER_FILE + ".tmp")
+        with open(quantizer_tmp, "wb") as quantizer_file:
+            np.savez(quantizer_file, quantization=np.array(self.quantization), **quantized)
+        os.replace(quantizer_tmp, self.file_path(QUANTIZER_FILE))
+
+    def query(self, query: Query, **kwargs: Any) -> List[Document]:
+        top_k = query.similarity_top_k if query.similarity_top_k else self.similarity_top_k
+        with self.lock:
+            self.load()
+            embeddings, records, ivf, quantized = self.embeddings, self.records, self.ivf, self.quantized
+        if embeddings is None or not len(records):
+            return []
+        vector = np.asarray(self.query_embedding(query), dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+
+        candidates = None
+        if ivf is not None:
+            lists = top_k_indexes(ivf["centroids"] @ vector, self.nprobe)
+            offsets = ivf["offsets"]
+            candidates = np.concatenate([ivf["order"][offsets[i] : offsets[i + 1]] for i in lists])
+        if quantized is not None:
+            approximate = quantizer.scores(quantized, vector, candidates)
+            best = top_k_indexes(approximate, max(top_k, self.rescore))
+            rows = best if candidates is None else candidates[best]
+            if not self.rescore:
+                return [self.to_document(records[i], float(score)) for i, score in zip(rows, approximate[best])]
+            candidates = rows
+
+        if candidates is None:
+            scores = embeddings @ vector
+            indexes = top_k_indexes(scores, top_k)
+            scores = scores[indexes]
+        else:
+            scores = embeddings[candidates] @ vector
+            best = top_k_indexes(scores, top_k)
+            indexes, scores = candidates[best], scores[best]
+        return [self.to_document(records[index], float(score)) for index, score in zip(indexes, scores)]
+
+    def query_embedding(self, query: Query) -> List[float]:
+        if query.embeddings:
+            return cast(List[float], query.embeddings[0])
+        if self.embedding_model is None:
+            raise Exception(f"Store {self.name} needs an embedding model or query embeddings.")
+        embedding = EmbeddingManager().get_instance_obj(self.embedding_model)
+        return cast(List[float], embedding.get_embeddings([query.query_str], text_type="query")[0])
+
+    def insert_document(self, documents: List[Document], **kwargs: Any) -> None:
+        self.upsert_document(documents, **kwargs)
+
+    def upsert_document(self, documents: List[Document], **kwargs: Any) -> None:
+        """Add the documents, replacing the rows with the same id."""
+        if not documents:
+            return
+        new_rows = self.embed_documents(documents)
+        with self.lock:
+            self.load()
+            replaced = {document.id for document in documents}
+            keep = [i for i, record in enumerate(self.records) if record["id"] not in replaced]
+            records = [self.records[i] for i in keep] + [
+                {"id": document.id, "text": document.text, "metadata": document.metadata} for document in documents
+            ]
+            old_rows = np.asarray(self.embeddings[keep]) if self.embeddings is not None else None
+            matrix = new_rows if old_rows is None or not len(old_rows) else np.vstack([old_rows, new_rows])
+            self.save(matrix, records)
+
+    def update_document(self, documents: List[Document], **kwargs: Any) -> None:
+        self.upsert_document(documents, **kwargs)
+
+    def delete_document(self, document_id: str, **kwargs: Any) -> None:
+        with self.lock:
+            self.load()
+            keep = [i for i, record in enumerate(self.records) if record["id"] != document_id]
+            if self.embeddings is None or len(keep) == len(self.records):
+                return
+            self.save(np.asarray(self.embeddings[keep]), [self.records[i] for i in keep])
+
+    def embed_documents(self, documents: List[Document]) -> NDArray[Any]:
+        """Normalized embedding rows of the documents, embedding the ones without one in a single call."""
+        missing = [document for document in documents if not document.embedding]
+        if missing:
+            if self.embedding_model is None:
+                raise Exception(f"Store {self.name} needs an embedding model or document embeddings.")
+            embedding = EmbeddingManager().get_instance_obj(self.embedding_model)
+            embeddings = embedding.get_embeddings([document.text for document in missing])
+            for document, embedding in zip(missing, embeddings):
+                document.embedding = embedding
+        return normalize_rows(np.asarray([document.embedding for document in documents], dtype=np.float32))
+
+    def save(self, matrix: NDArray[Any], records: List[Dict[str, Any]]) -> None:
+        """Write the store files next to the current ones and swap them in.
+
+        The matrix is replaced last, its mtime tells the other processes to reload.
+        """
+        metadata_tmp = self.file_path(METADATA_FILE + ".tmp")
+        with open(metadata_tmp, "w", encoding="utf-8") as metadata_file:
+            for record in records:
+                metadata_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(metadata_tmp, self.file_path(METADATA_FILE))
+
+        ivf_path = self.file_path(IVF_FILE)
+        if self.nlist and len(matrix):
+            with open(ivf_path + ".tmp", "wb") as ivf_file:
+                np.savez(ivf_file, **build_ivf(matrix, self.nlist))
+            os.replace(ivf_path + ".tmp", ivf_path)
+        else:
+            # lists of the previous rows would send the queries to rows which moved or no longer exist.
+            remove_file(ivf_path)
+
+        with self.quantizer_lock():
+            if self.quantization != "none" and len(matrix):
+                self.save_quantized(matrix)
+            else:
+                # codes of the previous rows, which a later load with quantization would take for these.
+                remove_file(self.file_path(CODES_FILE))
+                remove_file(self.file_path(QUANTIZER_FILE))
+
+        embeddings_tmp = self.file_path(EMBEDDINGS_FILE + ".tmp")
+        with open(embeddings_tmp, "wb") as embeddings_file:
+            np.save(embeddings_file, matrix.astype(np.float32))
+        os.replace(embeddings_tmp, self.file_path(EMBEDDINGS_FILE))
+        self.loaded_mtime = 0
+        self.load()
+
+    @staticmethod
+    def to_document(record: Dict[str, Any], score: float) -> Document:
+        metadata = dict(record.get("metadata") or {})
+        metadata["score"] = score
+        return Document(id=record["id"], text=record["text"], metadata=metadata)
+
+    def _initialize_by_component_configer(self, store_configer: ComponentConfiger) -> "NumpyVectorStore":
+        super()._initialize_by_component_configer(store_configer)
+        if hasattr(store_configer, "persist_path"):
+            self.persist_path = store_configer.persist_path
+        if hasattr(store_configer, "embedding_model"):
+            self.embedding_model = store_configer.embedding_model
+        if hasattr(store_configer, "similarity_top_k"):
+            self.similarity_top_k = store_configer.similarity_top_k
+        if hasattr(store_configer, "nlist"):
+            self.nlist = store_configer.nlist
+        if hasattr(store_configer, "nprobe"):
+            self.nprobe = store_configer.nprobe
+        if hasattr(store_configer, "quantization"):
+            self.quantization = store_configer.quantization
+        if hasattr(store_configer, "pq_m"):
+            self.pq_m = store_configer.pq_m
+        if hasattr(store_configer, "rescore"):
+            self.rescore = store_configer.rescore
+        if getattr(store_configer, "preload", False):
+            # the post-fork load of the workers is then a no-op, they share the mapping and the records.
+            register_preload(f"store {self.name}", self._new_client)
+        return self
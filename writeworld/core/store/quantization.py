@@ -0,0 +1,92 @@
+# mypy: disable-error-code=import-not-found
+"""Compressed embedding matrices with asymmetric scoring.
+
+The rows are stored as int8 codes (4x smaller than float32) or product-quantized uint8 codes (one byte
+per subspace, 4 * dim / m x smaller), the query stays float32 and is scored against the codes without
+decoding the matrix.
+"""
+from typing import Any, Dict, Optional, cast
+
+import numpy as np
+from numpy.typing import NDArray
+
+# rows scored per block, bounding the float32 temporaries of a query.
+BLOCK_ROWS = 16384
+
+
+def kmeans(matrix: NDArray[Any], k: int, iterations: int = 10, seed: int = 0) -> NDArray[Any]:
+    """Euclidean k-means centroids of the rows."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(matrix))
+    centroids = matrix[rng.choice(len(matrix), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        distances = (centroids**2).sum(axis=1) - 2 * matrix @ centroids.T
+        assignment = np.argmin(distances, axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, matrix)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+    return cast(NDArray[Any], centroids)
+
+
+def train_int8(matrix: NDArray[Any]) -> Dict[str, NDArray[Any]]:
+    """Symmetric per-dimension int8 codes: `row ≈ codes * scale`."""
+    scale = np.maximum(np.abs(matrix).max(axis=0), 1e-12) / 127.0 if len(matrix) else np.ones(matrix.shape[1])
+    codes = np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8)
+    return {"codes": codes, "scale": scale.astype(np.float32)}
+
+
+def train_pq(
+    matrix: NDArray[Any], m: int, ksub: int = 256, sample: int = 65536, seed: int = 0
+) -> Dict[str, NDArray[Any]]:
+    """Product quantization: every row cut in `m` subvectors, each replaced by its closest of `ksub` centroids.
+
+    Returns the codebooks, shaped (m, ksub, dim / m), and the uint8 codes, shaped (rows, m).
+    """
+    rows, dim = matrix.shape
+    if dim % m:
+        raise Exception(f"Embedding dimension {dim} is not a multiple of the {m} PQ subspaces.")
+    sub_dim = dim // m
+    rng = np.random.default_rng(seed)
+    training = matrix[rng.choice(rows, min(sample, rows), replace=False)] if rows > sample else matrix
+    codebooks = np.zeros((m, min(ksub, 256), sub_dim), dtype=np.float32)
+    codes = np.zeros((rows, m), dtype=np.uint8)
+    for j in range(m):
+        columns = slice(j * sub_dim, (j + 1) * sub_dim)
+        centroids = kmeans(training[:, columns], ksub, seed=seed + j)
+        codebooks[j, : len(centroids)] = centroids
+        for start in range(0, rows, BLOCK_ROWS):
+            block = matrix[start : start + BLOCK_ROWS, columns]
+            distances = (centroids**2).sum(axis=1) - 2 * block @ centroids.T
+            codes[start : start + BLOCK_ROWS, j] = np.argmin(distances, axis=1)
+    return {"codebooks": codebooks, "codes": codes}
+
+
+def train(matrix: NDArray[Any], quantization: str, pq_m: int = 64) -> Dict[str, NDArray[Any]]:
+    if quantization == "int8":
+        return train_int8(matrix)
+    if quantization == "pq":
+        return train_pq(matrix, pq_m)
+    raise Exception(f"Unknown quantization: {quantization}")
+
+
+def scores(
+    quantized: Dict[str, NDArray[Any]], vector: NDArray[Any], rows: Optional[NDArray[Any]] = None
+) -> NDArray[Any]:
+    """Approximate inner products of the float32 query with the quantized rows (all rows by default)."""
+    codes = quantized["codes"] if rows is None else quantized["codes"][rows]
+    if "scale" in quantized:
+        weights = (vector * quantized["scale"]).astype(np.float32)
+        blocks = [
+            codes[start : start + BLOCK_ROWS].astype(np.float32) @ weights for start in range(0, len(codes), BLOCK_ROWS)
+        ]
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    codebooks = quantized["codebooks"]
+    m, _, sub_dim = codebooks.shape
+    # lookup table of the inner product of every query subvector with every centroid of its subspace.
+    table = np.einsum("jkd,jd->jk", codebooks, vector.reshape(m, sub_dim))
+    result = np.zeros(len(codes), dtype=np.float32)
+    for j in range(m):
+        result += table[j, codes[:, j]]
+    return result
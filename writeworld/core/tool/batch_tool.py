@@ -0,0 +1,148 @@
+# mypy: disable-error-code=import-not-found
+import asyncio
+import concurrent.futures
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+
+
+@dataclass
+class ToolResult:
+    """Outcome of one call of a batch: the output, or the error which failed or timed out the call."""
+
+    output: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_batch(
+    execute: Callable[[Any], Any],
+    items: Sequence[Any],
+    max_concurrency: int = 8,
+    timeout: Optional[float] = None,
+    key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+) -> List[ToolResult]:
+    """Call `execute` on every item on a thread pool, the results in the order of the items.
+
+    Items with the same non-None `key` are executed once and share the result. A call failing or
+    running longer than `timeout` seconds from its start gets a ToolResult with the error, the other
+    calls are not affected. A timed out call is abandoned, not interrupted: its thread runs on, and
+    the queued items start on new threads, so hung calls never hold up the rest of the batch.
+    """
+    owners: List[int] = []
+    jobs: List[Any] = []
+    job_of_key: Dict[Hashable, int] = {}
+    for item in items:
+        item_key = key(item) if key else None
+        if item_key is None or item_key not in job_of_key:
+            jobs.append(item)
+            if item_key is not None:
+                job_of_key[item_key] = len(jobs) - 1
+        owners.append(job_of_key[item_key] if item_key is not None else len(jobs) - 1)
+    if not jobs:
+        return []
+
+    started: Dict[int, float] = {}
+    results: List[Optional[ToolResult]] = [None] * len(jobs)
+
+    def run(index: int) -> ToolResult:
+        start = time.monotonic()
+        try:
+            return ToolResult(output=execute(jobs[index]), elapsed=time.monotonic() - start)
+        except Exception as e:
+            return ToolResult(error=e, elapsed=time.monotonic() - start)
+
+    size = max(1, min(max_concurrency, len(jobs)))
+    executor = ThreadPoolExecutor(max_workers=size)
+    queued = list(range(len(jobs)))
+    futures: Dict[Future[ToolResult], int] = {}
+    pending: Set[Future[ToolResult]] = set()
+    try:
+        while queued or pending:
+            # an item is submitted only when a thread is free, so it starts right away.
+            while queued and len(pending) < size:
+                index = queued.pop(0)
+                started[index] = time.monotonic()
+                future = executor.submit(run, index)
+                futures[future] = index
+                pending.add(future)
+            wait_seconds = None
+            if timeout is not None:
+                wait_seconds = max(min(started[futures[f]] for f in pending) + timeout - time.monotonic(), 0)
+            done, pending = concurrent.futures.wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            if timeout is not None:
+                now = time.monotonic()
+                expired = [f for f in pending if now - started[futures[f]] >= timeout]
+                for future in expired:
+                    pending.discard(future)
+                    error = TimeoutError(f"Tool call timed out after {timeout}s.")
+                    results[futures[future]] = ToolResult(error=error, elapsed=now - started[futures[future]])
+                if expired and queued:
+                    # the threads of the timed out calls stay busy, the queued items go to fresh ones.
+                    executor.shutdown(wait=False)
+                    executor = ThreadPoolExecutor(max_workers=size)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [results[owner] for owner in owners]  # type: ignore[misc]
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion from sync code, also when the caller runs in an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+class BatchTool(Tool):
+    """A tool executing a batch of independent inputs in one call.
+
+    `execute_many` runs the inputs concurrently and returns one ToolResult per input, in order, so a
+    step issuing several calls of the same tool waits for the slowest one instead of their sum. This
+    base runs `execute` on a thread pool; tools with a native batch path override `execute_many`.
+
+    Attributes:
+        max_concurrency (int): Calls of a batch in flight at once.
+    """
+
+    max_concurrency: int = 8
+
+    def batch_key(self, tool_input: ToolInput) -> Optional[Hashable]:
+        """Inputs of a batch with the same key are executed once, None executes every input."""
+        return None
+
+    def execute_many(
+        self, tool_inputs: List[ToolInput], max_concurrency: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[ToolResult]:
+        """Execute the inputs concurrently, with `timeout` seconds per input, failures are returned per input."""
+        return run_batch(self.execute, tool_inputs, max_concurrency or self.max_concurrency, timeout, self.batch_key)
+
+
+def execute_many(
+    tool: Tool, tool_inputs: List[ToolInput], max_concurrency: int = 8, timeout: Optional[float] = None
+) -> List[ToolResult]:
+    """Batch execution of any tool: the native path of a BatchTool, a thread pool for the others."""
+    if isinstance(tool, BatchTool):
+        return tool.execute_many(tool_inputs, max_concurrency, timeout)
+    return run_batch(tool.execute, tool_inputs, max_concurrency, timeout)
@@ -5,17 +5,34 @@
 # @Author  : wangchongshi
 # @Email   : wangchongshi.wcs@antgroup.com
 # @FileName: bing_search_tool.py
-from typing import Optional
+from typing import Any, Dict, List, Optional, cast
 
-from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+from agentuniverse.agent.action.tool.tool import ToolInput
 from agentuniverse.base.util.env_util import get_from_env
 from langchain_community.utilities import BingSearchAPIWrapper
 from pydantic import Field
 
 from writeworld.core.tool.mock_search_tool import MockSearchTool
+from writeworld.core.tool.search_cache import CachedSearchTool
+from writeworld.util.http_client import HttpClient
 
 
-class BingSearchTool(Tool):
+class PooledBingSearchAPIWrapper(BingSearchAPIWrapper):
+    """BingSearchAPIWrapper sending its requests through the pooled HTTP client."""
+
+    http_client: Any = None
+
+    def _bing_search_results(self, search_term: str, count: int) -> List[Dict[str, Any]]:
+        client: HttpClient = self.http_client
+        params = {"q": search_term, "count": count, "textDecorations": True, "textFormat": "HTML", **self.search_kwargs}
+        response = client.get(
+            self.bing_search_url, headers={"Ocp-Apim-Subscription-Key": self.bing_subscription_key}, params=params
+        )
+        response.raise_for_status()
+        return cast(List[Dict[str, Any]], response.json().get("webPages", {}).get("value", []))
+
+
+class BingSearchTool(CachedSearchTool):
     """The demo bing search tool.
 
     Implement the execute method of demo bing search tool, using the `BingSearchAPIWrapper` to implement a simple Bing search.
@@ -23,13 +40,26 @@ class BingSearchTool(Tool):
 
     bing_subscription_key: Optional[str] = Field(default_factory=lambda: get_from_env("BING_SUBSCRIPTION_KEY"))
     bing_search_url: Optional[str] = Field(default="https://api.bing.microsoft.com/v7.0/search")
+    k: int = 5
+    search_wrapper: Optional[PooledBingSearchAPIWrapper] = None
+
+    def _load_api_wrapper(self) -> PooledBingSearchAPIWrapper:
+        if self.search_wrapper is None:
+            self.search_wrapper = PooledBingSearchAPIWrapper(
+                bing_subscription_key=cast(str, self.bing_subscription_key),
+                k=self.k,
+                bing_search_url=self.bing_search_url,
+                http_client=self.http_client,
+            )
+        return self.search_wrapper
 
     def execute(self, tool_input: ToolInput):
         if self.bing_subscription_key is None:
             return MockSearchTool().execute(tool_input)
         query = tool_input.get_data("input")
         # get top5 results from Bing search.
-        search = BingSearchAPIWrapper(
-            bing_subscription_key=self.bing_subscription_key, k=5, bing_search_url=self.bing_search_url
-        )
-        return search.run(query=query)
+        search = self._load_api_wrapper()
+        return self.cached_search(query, self.engine_params(tool_input), lambda: search.run(query=query))
+
+    def engine_params(self, tool_input: ToolInput) -> Dict[str, Any]:
+        return {"k": self.k, "bing_search_url": self.bing_search_url}
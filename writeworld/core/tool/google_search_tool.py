@@ -4,20 +4,62 @@
 # @Author  : wangchongshi
 # @Email   : wangchongshi.wcs@antgroup.com
 # @FileName: google_search_tool.py
-from typing import Optional
+from typing import Any, Dict, List, Optional, cast
 
-from agentuniverse.agent.action.tool.tool import Tool, ToolInput
-from agentuniverse.base.config.component_configer.configers.tool_configer import (
-    ToolConfiger,
-)
+from agentuniverse.agent.action.tool.tool import ToolInput
 from agentuniverse.base.util.env_util import get_from_env
 from langchain_community.utilities.google_serper import GoogleSerperAPIWrapper
 from pydantic import Field
 
+from writeworld.core.tool.batch_tool import ToolResult, run_batch
 from writeworld.core.tool.mock_search_tool import MockSearchTool
+from writeworld.core.tool.search_cache import CachedSearchTool, SearchCache
+from writeworld.util.http_client import HttpClient
 
+# queries serper.dev accepts in one batch request.
+SERPER_BATCH_SIZE = 100
 
-class GoogleSearchTool(Tool):
+
+class PooledGoogleSerperAPIWrapper(GoogleSerperAPIWrapper):
+    """GoogleSerperAPIWrapper sending its requests through the pooled HTTP client."""
+
+    http_client: Any = None
+
+    def _request(self, search_term: str, search_type: str, **kwargs: Any) -> Dict[str, Any]:
+        return {
+            "url": f"https://google.serper.dev/{search_type}",
+            "headers": {"X-API-KEY": self.serper_api_key or "", "Content-Type": "application/json"},
+            "params": {"q": search_term, **{key: value for key, value in kwargs.items() if value is not None}},
+        }
+
+    def _google_serper_api_results(
+        self, search_term: str, search_type: str = "search", **kwargs: Any
+    ) -> Dict[str, Any]:
+        client: HttpClient = self.http_client
+        response = client.post(**self._request(search_term, search_type, **kwargs))
+        response.raise_for_status()
+        return cast(Dict[str, Any], response.json())
+
+    async def _async_google_serper_search_results(
+        self, search_term: str, search_type: str = "search", **kwargs: Any
+    ) -> Dict[str, Any]:
+        client: HttpClient = self.http_client
+        response = await client.async_client.post(**self._request(search_term, search_type, **kwargs))
+        response.raise_for_status()
+        return cast(Dict[str, Any], await response.json())
+
+    def run_many(self, queries: List[str], timeout: Optional[float] = None) -> List[str]:
+        """The parsed results of the queries, searched by one batch request."""
+        client: HttpClient = self.http_client
+        request = self._request("", self.type, gl=self.gl, hl=self.hl, num=self.k, tbs=self.tbs)
+        body = [{**request["params"], "q": query} for query in queries]
+        kwargs = {"timeout": (client.timeout[0], timeout)} if timeout else {}
+        response = client.post(request["url"], headers=request["headers"], json=body, **kwargs)
+        response.raise_for_status()
+        return [self._parse_results(results) for results in response.json()]
+
+
+class GoogleSearchTool(CachedSearchTool):
     """The demo google search tool.
 
     Implement the execute method of demo google search tool, using the `GoogleSerperAPIWrapper` to implement a simple Google search.
@@ -27,11 +69,68 @@ class GoogleSearchTool(Tool):
     """
 
     serper_api_key: Optional[str] = Field(default_factory=lambda: get_from_env("SERPER_API_KEY"))
+    k: int = 10
+    gl: str = "us"
+    hl: str = "en"
+    search_wrapper: Optional[PooledGoogleSerperAPIWrapper] = None
+
+    def _load_api_wrapper(self) -> PooledGoogleSerperAPIWrapper:
+        if self.search_wrapper is None:
+            self.search_wrapper = PooledGoogleSerperAPIWrapper(
+                serper_api_key=self.serper_api_key,
+                k=self.k,
+                gl=self.gl,
+                hl=self.hl,
+                type="search",
+                http_client=self.http_client,
+            )
+        return self.search_wrapper
 
     def execute(self, tool_input: ToolInput):
         input = tool_input.get_data("input")
         if self.serper_api_key is None:
             return MockSearchTool().execute(tool_input=tool_input)
         # get top10 results from Google search.
-        search = GoogleSerperAPIWrapper(serper_api_key=self.serper_api_key, k=10, gl="us", hl="en", type="search")
-        return search.run(query=input)
+        search = self._load_api_wrapper()
+        return self.cached_search(input, self.engine_params(tool_input), lambda: search.run(query=input))
+
+    def engine_params(self, tool_input: ToolInput) -> Dict[str, Any]:
+        return {"k": self.k, "gl": self.gl, "hl": self.hl}
+
+    def execute_many(
+        self, tool_inputs: List[ToolInput], max_concurrency: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[ToolResult]:
+        """Answer the cached queries from the cache and search the others in batch requests of serper.dev."""
+        if self.serper_api_key is None:
+            return super().execute_many(tool_inputs, max_concurrency, timeout)
+        queries = [tool_input.get_data("input") for tool_input in tool_inputs]
+        params = self.engine_params(tool_inputs[0]) if tool_inputs else {}
+        results: Dict[str, ToolResult] = {}
+        missing: Dict[str, str] = {}
+        for query in queries:
+            key = SearchCache.cache_key(self.cache_name, query, params)
+            if key in results or key in missing:
+                continue
+            cached = self.search_cache.get(self.cache_name, query, params) if self.search_cache else None
+            if cached is not None:
+                results[key] = ToolResult(output=cached)
+            else:
+                missing[key] = query
+
+        items = list(missing.items())
+        chunks = [items[start : start + SERPER_BATCH_SIZE] for start in range(0, len(items), SERPER_BATCH_SIZE)]
+        wrapper = self._load_api_wrapper()
+        outcomes = run_batch(
+            lambda chunk: wrapper.run_many([query for _, query in chunk], timeout),
+            chunks,
+            max_concurrency or self.max_concurrency,
+        )
+        for chunk, outcome in zip(chunks, outcomes):
+            for index, (key, query) in enumerate(chunk):
+                if not outcome.ok:
+                    results[key] = ToolResult(error=outcome.error, elapsed=outcome.elapsed)
+                    continue
+                results[key] = ToolResult(output=outcome.output[index], elapsed=outcome.elapsed)
+                if self.search_cache:
+                    self.search_cache.put(key, self.cache_name, query, outcome.output[index])
+        return [results[SearchCache.cache_key(self.cache_name, query, params)] for query in queries]
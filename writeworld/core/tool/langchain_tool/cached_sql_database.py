@@ -0,0 +1,237 @@
+# mypy: disable-error-code=import-not-found
+"""A LangChain SQLDatabase caching its schema introspection and the results of its read queries.
+
+`get_table_info` reflects the tables and samples their rows on every call, and the agent tends to
+send the same SELECT several times in a task. The schema text is cached until a DDL statement runs
+through the database, another process changes the SQLite schema, or `schema_ttl` expires. Results of
+read queries are cached by normalized SQL for `result_ttl` seconds and dropped by any write. Read
+queries are streamed and cut at `max_rows`, so a huge result set never reaches the prompt whole.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from langchain_community.utilities.sql_database import SQLDatabase, truncate_word
+from sqlalchemy import MetaData, inspect, text
+
+READ_STATEMENTS = ("SELECT", "WITH", "VALUES", "EXPLAIN", "SHOW", "DESCRIBE")
+DDL_STATEMENTS = ("CREATE", "ALTER", "DROP", "RENAME", "TRUNCATE", "COMMENT")
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|MERGE|UPSERT)\b", re.IGNORECASE)
+COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def normalize_sql(command: str) -> str:
+    """The statement without comments, repeated whitespace and the trailing semicolon."""
+    return re.sub(r"\s+", " ", COMMENTS.sub(" ", command)).strip().rstrip(";").strip()
+
+
+def statement_kind(sql: str) -> str:
+    """ "read", "ddl" or "write" for a normalized statement, several statements are a "write"."""
+    keyword = sql.split(" ", 1)[0].upper()
+    if ";" in sql:
+        return "write"
+    if keyword in DDL_STATEMENTS:
+        return "ddl"
+    if keyword in READ_STATEMENTS and not WRITE_KEYWORDS.search(sql):
+        return "read"
+    return "write"
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """SQLDatabase sharing the engine and settings of another one, with a schema and a result cache.
+
+    Args:
+        schema_ttl (float): Seconds the table info is reused, 0 to cache it until the next DDL.
+        result_ttl (float): Seconds the result of a read query is reused, 0 to disable the cache.
+        max_entries (int): Read query results kept, least recently used ones are dropped first.
+        max_rows (int): Rows of a read query put in its result, 0 for all of them.
+    """
+
+    def __init__(
+        self,
+        database: SQLDatabase,
+        schema_ttl: float = 600,
+        result_ttl: float = 60,
+        max_entries: int = 256,
+        max_rows: int = 200,
+    ) -> None:
+        # no super().__init__: it would reflect the tables once more.
+        self.__dict__.update(database.__dict__)
+        self.schema_ttl = schema_ttl
+        self.result_ttl = result_ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._cache_lock = threading.RLock()
+        self._table_info: Dict[Tuple[str, ...], Tuple[str, float]] = {}
+        self._results: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        # bumped by every invalidation, a read which overlapped a write does not cache its result.
+        self._generation = 0
+        self._schema_version = self._read_schema_version()
+        self.stats: Dict[str, int] = {"schema_hits": 0, "schema_misses": 0, "result_hits": 0, "result_misses": 0}
+
+    def _read_schema_version(self) -> Optional[int]:
+        """The SQLite schema cookie, changed by every DDL of any connection, None for other dialects."""
+        if self.dialect != "sqlite":
+            return None
+        with self._engine.connect() as connection:
+            return connection.exec_driver_sql("PRAGMA schema_version").scalar()
+
+    def invalidate_schema(self) -> None:
+        """Forget the reflected tables, the next table info sees the schema of the database again."""
+        with self._cache_lock:
+            self._schema_version = self._read_schema_version()
+            self._table_info.clear()
+            self._results.clear()
+            self._generation += 1
+            self._inspector = inspect(self._engine)
+            self._all_tables = set(
+                self._inspector.get_table_names(schema=self._schema)
+                + (self._inspector.get_view_names(schema=self._schema) if self._view_support else [])
+            )
+            self._usable_tables = set(self.get_usable_table_names()) or self._all_tables
+            self._metadata = MetaData()
+
+    def invalidate_results(self) -> None:
+        with self._cache_lock:
+            self._results.clear()
+            self._generation += 1
+
+    def _check_schema(self) -> None:
+        if self._schema_version is not None and self._read_schema_version() != self._schema_version:
+            self.invalidate_schema()
+
+    def get_usable_table_names(self) -> Iterable[str]:
+        if "_cache_lock" in self.__dict__:
+            self._check_schema()
+        return super().get_usable_table_names()
+
+    def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        self._check_schema()
+        key = tuple(sorted(table_names)) if table_names else ()
+        with self._cache_lock:
+            cached = self._table_info.get(key)
+            if cached is not None and (not self.schema_ttl or time.monotonic() - cached[1] < self.schema_ttl):
+                self.stats["schema_hits"] += 1
+                return cached[0]
+            self.stats["schema_misses"] += 1
+            info = super().get_table_info(table_names)
+            self._table_info[key] = (info, time.monotonic())
+            return info
+
+    def run(
+        self,
+        command: Any,
+        fetch: Literal["all", "one", "cursor"] = "all",
+        include_columns: bool = False,
+        *,
+        parameters: Optional[Dict[str, Any]] = None,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if not isinstance(command, str) or fetch == "cursor":
+            self.invalidate_results()
+            return super().run(
+                command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+            )
+        sql = normalize_sql(command)
+        kind = statement_kind(sql)
+        if kind != "read":
+            try:
+                return super().run(
+                    command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+                )
+            finally:
+                if kind == "ddl":
+                    self.invalidate_schema()
+                else:
+                    self.invalidate_results()
+        key = (sql, fetch, include_columns, tuple(sorted((parameters or {}).items())))
+        generation = self._generation
+        if self.result_ttl:
+            with self._cache_lock:
+                cached = self._results.get(key)
+                if cached is not None and time.monotonic() - cached[1] < self.result_ttl:
+                    self._results.move_to_end(key)
+                    self.stats["result_hits"] += 1
+                    return cached[0]
+                self.stats["result_misses"] += 1
+        result = self._run_read(command, fetch, include_columns, parameters, execution_options)
+        if self.result_ttl:
+            with self._cache_lock:
+                if generation != self._generation:
+                    return result
+                self._results[key] = (result, time.monotonic())
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        return result
+
+    def _run_read(
+        self,
+        command: str,
+        fetch: Literal["all", "one", "cursor"],
+        include_columns: bool,
+        parameters: Optional[Dict[str, Any]],
+        execution_options: Optional[Dict[str, Any]],
+    ) -> str:
+        """Run a read query fetching at most `max_rows` rows, formatted like `SQLDatabase.run`."""
+        limit = 1 if fetch == "one" else self.max_rows
+        if self._schema is not None:
+            # the schema is set per connection by SQLDatabase._execute, which fetches all the rows.
+            rows = cast(
+                Sequence[Dict[str, Any]],
+                self._execute(command, fetch, parameters=parameters, execution_options=execution_options),
+            )
+            truncated = bool(limit) and len(rows) > limit
+            rows = rows[:limit] if limit else rows
+        else:
+            options = {**(execution_options or {}), "stream_results": True}
+            with self._engine.connect() as connection:
+                cursor = connection.execute(text(command), parameters or {}, execution_options=options)
+                if not cursor.returns_rows:
+                    return ""
+                fetched = cursor.fetchmany(limit + 1) if limit else cursor.fetchall()
+                cursor.close()
+            truncated = bool(limit) and len(fetched) > limit
+            rows = [row._asdict() for row in (fetched[:limit] if limit else fetched)]
+        res: List[Any] = [
+            {column: truncate_word(value, length=self._max_string_length) for column, value in row.items()}
+            for row in rows
+        ]
+        if not include_columns:
+            res = [tuple(row.values()) for row in res]
+        if not res:
+            return ""
+        if truncated and fetch != "one":
+            return f"{res}\n(only the first {limit} rows are shown, add a LIMIT or filter to narrow the query)"
+        return str(res)
+
+
+_databases: Dict[Tuple[Any, ...], CachedSQLDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_cached_database(name: str, database: SQLDatabase, **config: Any) -> CachedSQLDatabase:
+    """The cached database of the process for a db wrapper, configured by its first caller.
+
+    The SQL tools of one db wrapper share it, so a DDL run by the query tool refreshes the schema the
+    info tool returns.
+    """
+    key = (name, os.getpid())
+    with _databases_lock:
+        if key not in _databases or _databases[key]._engine is not database._engine:
+            _databases[key] = CachedSQLDatabase(database, **config)
+        return _databases[key]
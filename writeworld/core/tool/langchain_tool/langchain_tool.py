@@ -2,14 +2,18 @@
 # -*- coding:utf-8 -*-
 import importlib
 import json
-from typing import Optional, Type
+import threading
+from typing import Any, Dict, Optional, Type, cast
 
 from agentuniverse.agent.action.tool.tool import Tool, ToolInput
 from agentuniverse.base.config.component_configer.configers.tool_configer import (
     ToolConfiger,
 )
-from langchain_community.tools import DuckDuckGoSearchResults
 from langchain_core.tools import BaseTool
+from langchain_core.tools import Tool as LangchainTool
+
+from writeworld.core.tool.batch_tool import BatchTool
+from writeworld.util.prewarm import register_prewarm
 
 # @Time    : 2024/6/24 11:42
 # @Author  : weizjajj
@@ -17,30 +21,73 @@ from langchain_core.tools import BaseTool
 # @FileName: langchain_tool.py
 
 
-class LangChainTool(Tool):
+_load_lock = threading.Lock()
+
+
+class LangChainTool(BatchTool):
+    """A tool running a LangChain tool, imported and built on first use.
+
+    Component scanning only records the `langchain` section of the yaml, the LangChain module is
+    imported and the tool constructed by the first `execute`, or by the background warm-up of the
+    worker when the yaml sets `prewarm: true`. `lazy: false` builds it at scanning. The yaml gives the
+    description of the tool, else it is the one of the LangChain tool, built by `as_langchain` to get it.
+
+    Attributes:
+        tool (Optional[BaseTool]): The LangChain tool, None until it is loaded.
+        langchain_info (Optional[dict]): The `langchain` section of the yaml.
+        lazy (bool): Build the tool on first use instead of at scanning.
+        prewarm (bool): Build the tool in the background once the worker serves.
+    """
+
     name: Optional[str] = ""
     description: Optional[str] = ""
     tool: Optional[BaseTool] = None
+    langchain_info: Optional[Dict[str, Any]] = None
+    lazy: bool = True
+    prewarm: bool = False
 
-    def execute(self, tool_input: ToolInput):
+    def execute(self, tool_input: ToolInput) -> Any:
         input = tool_input.get_data("input")
         callbacks = tool_input.get_data("callbacks", None)
-        return self.tool.run(input, callbacks=callbacks)
+        return self.load_tool().run(input, callbacks=callbacks)
+
+    def as_langchain(self) -> LangchainTool:
+        # without a description in the yaml, it is only known once the LangChain tool is built.
+        if not self.description:
+            self.load_tool()
+        return cast(LangchainTool, super().as_langchain())
+
+    def load_tool(self) -> BaseTool:
+        """The LangChain tool, built by the first caller."""
+        if self.tool is None:
+            with _load_lock:
+                if self.tool is None:
+                    tool = self.init_langchain_tool()
+                    if not self.description and tool is not None:
+                        self.description = tool.description
+                    self.tool = tool
+        return cast(BaseTool, self.tool)
 
     def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
         super().initialize_by_component_configer(component_configer)
-        self.tool = self.init_langchain_tool(component_configer)
-        if not component_configer.description and self.tool is not None:
-            self.description = self.tool.description
+        self.langchain_info = component_configer.configer.value.get("langchain")
+        self.lazy = component_configer.configer.value.get("lazy", True)
+        self.prewarm = component_configer.configer.value.get("prewarm", False)
+        if not self.lazy:
+            self.load_tool()
+        elif self.prewarm:
+            register_prewarm(f"tool {self.name}", self.load_tool)
         return self
 
-    def init_langchain_tool(self, component_configer):
-        langchain_info = component_configer.configer.value.get("langchain")
-        module = langchain_info.get("module")
-        class_name = langchain_info.get("class_name")
+    def init_langchain_tool(self) -> Optional[BaseTool]:
+        langchain_info = self.langchain_info
+        if langchain_info is None:
+            raise Exception(f"Tool {self.name} has no langchain section in its yaml.")
+        module = langchain_info["module"]
+        class_name = langchain_info["class_name"]
         module = importlib.import_module(module)
         clz = getattr(module, class_name)
-        init_params = langchain_info.get("init_params")
+        init_params = langchain_info.get("init_params") or {}
         self.get_langchain_tool(init_params, clz)
         return self.tool
 
@@ -6,34 +6,77 @@
 # @Email   : weizhongjie.wzj@antgroup.com
 # @FileName: sql_langchain_tool.py
 
-from typing import Optional, Type
+from typing import Any, Dict, Hashable, List, Optional, Type
 
-from agentuniverse.agent.action.tool.tool import ToolInput
+from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+from agentuniverse.base.config.component_configer.configers.tool_configer import (
+    ToolConfiger,
+)
 from agentuniverse.database.sqldb_wrapper_manager import SQLDBWrapperManager
 from langchain_core.tools import BaseTool
-from langchain_core.tools import Tool as LangchainTool
 
+from writeworld.core.tool.batch_tool import ToolResult, run_batch
+from writeworld.core.tool.langchain_tool.cached_sql_database import (
+    get_cached_database,
+    normalize_sql,
+    statement_kind,
+)
 from writeworld.core.tool.langchain_tool.langchain_tool import LangChainTool
 
 
 class SqlLangchainTool(LangChainTool):
+    """A LangChain SQL database tool on the database of an aU db wrapper.
+
+    Attributes:
+        db_wrapper_name (Optional[str]): The db wrapper, from `init_params.db_wrapper` of the yaml.
+        clz (Type[BaseTool]): The LangChain tool class.
+        sql_cache (Optional[Dict[str, Any]]): Arguments of `CachedSQLDatabase` from the `sql_cache` key
+            of the yaml, None queries the database of the wrapper directly.
+    """
+
     db_wrapper_name: Optional[str] = ""
     clz: Type[BaseTool] = BaseTool
+    sql_cache: Optional[Dict[str, Any]] = None
+
+    def batch_key(self, tool_input: ToolInput) -> Optional[Hashable]:
+        """Reads differing only in whitespace and comments run once per batch, writes run every time."""
+        sql = normalize_sql(str(tool_input.get_data("input")))
+        return sql if statement_kind(sql) == "read" else None
+
+    def execute_many(
+        self, tool_inputs: List[ToolInput], max_concurrency: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[ToolResult]:
+        """Run the distinct statements concurrently, at most one per connection of the engine pool.
+
+        More threads than pooled connections would only wait in the SQLAlchemy pool checkout, and fail
+        with its timeout instead of the per-statement one.
+        """
+        self.load_tool()
+        concurrency = max_concurrency or self.max_concurrency
+        db = getattr(self.tool, "db", None)
+        pool = getattr(getattr(db, "_engine", None), "pool", None)
+        if callable(getattr(pool, "size", None)):
+            concurrency = min(concurrency, pool.size() + max(getattr(pool, "_max_overflow", 0), 0))
+        return run_batch(self.execute, tool_inputs, concurrency, timeout, self.batch_key)
 
-    def execute(self, tool_input: ToolInput):
-        if self.tool is None:
-            self.get_sql_database()
-        return super().execute(tool_input)
+    def init_langchain_tool(self) -> BaseTool:
+        super().init_langchain_tool()
+        return self.get_sql_database()
 
-    def get_sql_database(self):
+    def get_sql_database(self) -> BaseTool:
         db_wrapper = SQLDBWrapperManager().get_instance_obj(self.db_wrapper_name)
-        self.tool = self.clz(db=db_wrapper.sql_database)
+        database = db_wrapper.sql_database
+        if self.sql_cache is not None:
+            database = get_cached_database(self.db_wrapper_name, database, **self.sql_cache)
+        self.tool = self.clz(db=database)
         self.description = self.tool.description
+        return self.tool
 
-    def as_langchain(self) -> LangchainTool:
-        if self.tool is None:
-            self.get_sql_database()
-        return super().as_langchain()
+    def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
+        # before the tool is built, by the super call when the yaml sets `lazy: false`.
+        if "sql_cache" in component_configer.configer.value:
+            self.sql_cache = component_configer.configer.value.get("sql_cache") or {}
+        return super().initialize_by_component_configer(component_configer)
 
     def get_langchain_tool(self, init_params: dict, clz: Type[BaseTool]):
         self.db_wrapper_name = init_params.get("db_wrapper")
@@ -7,13 +7,16 @@
 # @FileName: wikipedia_query.py
 
 
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
+from langchain_core.tools import BaseTool
 
 from writeworld.core.tool.langchain_tool.langchain_tool import LangChainTool
 
 
 class WikipediaTool(LangChainTool):
-    def init_langchain_tool(self, component_configer):
+    def init_langchain_tool(self) -> BaseTool:
+        # imported on first use, the wrapper imports the wikipedia package.
+        from langchain_community.tools import WikipediaQueryRun
+        from langchain_community.utilities import WikipediaAPIWrapper
+
         wrapper = WikipediaAPIWrapper()
         return WikipediaQueryRun(api_wrapper=wrapper)
@@ -7,23 +7,34 @@
 # @FileName: python_repl.py
 
 import re
+from typing import Any, Dict, Optional
 
 from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+from agentuniverse.base.config.component_configer.configers.tool_configer import (
+    ToolConfiger,
+)
 from langchain_community.utilities import PythonREPL
 from pydantic import Field
 
+from writeworld.util.sandbox_pool import SandboxPool, get_sandbox_pool
 
-class PythonREPLTool(Tool):
-    """The mock search tool.
 
-    In this tool, we mocked the search engine's answers to search for information about BYD and Warren Buffett.
+class PythonREPLTool(Tool):
+    """The python code runner tool, returning what the code prints.
 
-    Note:
-        The tool is only suitable for users searching for Buffett or BYD related queries.
-        We recommend that you configure your `SERPER_API_KEY` and use google_search_tool to get information.
+    With a `sandbox` key in the yaml, the code runs in the warm worker processes of a SandboxPool,
+    with its wall-clock, CPU and memory limits, instead of in the serving process where a CPU-heavy
+    snippet would hold the GIL of every other request.
     """
 
     client: PythonREPL = Field(default_factory=lambda: PythonREPL())
+    sandbox: Optional[Dict[str, Any]] = None
+
+    def run_code(self, code: str) -> str:
+        if self.sandbox is None:
+            return self.client.run(code)
+        pool: SandboxPool = get_sandbox_pool(**self.sandbox)
+        return pool.run(code)
 
     def execute(self, tool_input: ToolInput):
         input = tool_input.get_data("input")
@@ -34,9 +45,14 @@ class PythonREPLTool(Tool):
             pattern = re.compile(r"```py(.*?)``", re.DOTALL)
             matches = pattern.findall(input)
         if len(matches) == 0:
-            return self.client.run(input)
-        res = self.client.run(matches[0])
+            return self.run_code(input)
+        res = self.run_code(matches[0])
         if res == "" or res is None:
             return "ERROR: 你的python代码中没有使用print输出任何内容，请参考工具示例"
         else:
             return res
+
+    def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
+        super().initialize_by_component_configer(component_configer)
+        self.sandbox = component_configer.configer.value.get("sandbox")
+        return self
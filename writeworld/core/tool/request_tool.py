@@ -7,23 +7,76 @@
 # @FileName: request_tool.py
 
 
-from typing import Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, List, Optional, cast
 
+import aiohttp
+import requests
 from agentuniverse.agent.action.tool.tool import Tool, ToolInput
 from agentuniverse.base.config.component_configer.configers.tool_configer import (
     ToolConfiger,
 )
 from agentuniverse.base.util.logging.logging_util import LOGGER
-from langchain_community.utilities.requests import GenericRequestsWrapper
+from langchain_community.utilities.requests import GenericRequestsWrapper, Requests
 from langchain_core.utils.json import parse_json_markdown
+from pydantic import Field
 
+from writeworld.core.tool.batch_tool import BatchTool, ToolResult, run_coroutine
+from writeworld.util.http_client import HttpClient, get_http_client
 
-class RequestTool(Tool):
+
+class PooledRequests(Requests):
+    """Requests sending through the pooled HTTP client instead of a new connection per call."""
+
+    http_client: Any = None
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        client: HttpClient = self.http_client
+        return client.request(method, url, headers=self.headers, auth=self.auth, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("GET", url, **kwargs)
+
+    def post(self, url: str, data: Dict[str, Any], **kwargs: Any) -> requests.Response:
+        return self._request("POST", url, json=data, **kwargs)
+
+    def patch(self, url: str, data: Dict[str, Any], **kwargs: Any) -> requests.Response:
+        return self._request("PATCH", url, json=data, **kwargs)
+
+    def put(self, url: str, data: Dict[str, Any], **kwargs: Any) -> requests.Response:
+        return self._request("PUT", url, json=data, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        return self._request("DELETE", url, **kwargs)
+
+    @asynccontextmanager
+    async def _arequest(self, method: str, url: str, **kwargs: Any) -> AsyncGenerator[aiohttp.ClientResponse, None]:
+        client: HttpClient = self.http_client
+        yield await client.async_client.request(method, url, headers=self.headers, auth=self.auth, **kwargs)
+
+
+class PooledRequestsWrapper(GenericRequestsWrapper):
+    """GenericRequestsWrapper whose requests share the keep-alive pools of an `HttpClient`."""
+
+    http_client: Any = None
+
+    @property
+    def requests(self) -> Requests:
+        return PooledRequests(headers=self.headers, auth=self.auth, http_client=self.http_client)
+
+
+class RequestTool(BatchTool):
     method: Optional[str] = "GET"
     headers: Optional[dict] = {}
     response_content_type: Optional[str] = "text"
     requests_wrapper: Optional[GenericRequestsWrapper] = None
     json_parser: Optional[bool] = False
+    http_client: HttpClient = Field(default_factory=get_http_client)
+
+    class Config:
+        arbitrary_types_allowed = True
 
     @staticmethod
     def _clean_url(url: str) -> str:
@@ -55,6 +108,63 @@ class RequestTool(Tool):
         else:
             raise ValueError(f"Unsupported method: {self.method}")
 
+    async def aexecute(self, tool_input: ToolInput) -> Any:
+        input_params: str = tool_input.get_data("input")
+        if self.json_parser:
+            try:
+                parse_data = parse_json_markdown(input_params)
+                return await self.aexecute_by_method(**parse_data)
+            except Exception as e:
+                LOGGER.error(f"execute request error input{input_params} error{e}")
+                return str(e)
+        else:
+            return await self.aexecute_by_method(input_params)
+
+    async def aexecute_by_method(self, url: str, data: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        url = self._clean_url(url)
+        if self.requests_wrapper is None:
+            raise Exception(f"Tool {self.name} is not configured.")
+        if self.method == "GET":
+            return await self.requests_wrapper.aget(url)
+        elif self.method == "POST":
+            return await self.requests_wrapper.apost(url, data=data or {})
+        elif self.method == "PUT":
+            return await self.requests_wrapper.aput(url, data=data or {})
+        elif self.method == "DELETE":
+            return await self.requests_wrapper.adelete(url)
+        else:
+            raise ValueError(f"Unsupported method: {self.method}")
+
+    def execute_many(
+        self, tool_inputs: List[ToolInput], max_concurrency: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[ToolResult]:
+        """Send the requests concurrently on one event loop through the pooled async client."""
+
+        async def run() -> List[ToolResult]:
+            try:
+                return await self.aexecute_many(tool_inputs, max_concurrency or self.max_concurrency, timeout)
+            finally:
+                # the session belongs to the loop of this batch, which ends with it.
+                await self.http_client.async_client.close()
+
+        return cast(List[ToolResult], run_coroutine(run()))
+
+    async def aexecute_many(
+        self, tool_inputs: List[ToolInput], max_concurrency: int, timeout: Optional[float] = None
+    ) -> List[ToolResult]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def execute_one(tool_input: ToolInput) -> ToolResult:
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    output = await asyncio.wait_for(self.aexecute(tool_input), timeout)
+                    return ToolResult(output=output, elapsed=time.monotonic() - start)
+                except Exception as e:
+                    return ToolResult(error=e, elapsed=time.monotonic() - start)
+
+        return list(await asyncio.gather(*(execute_one(tool_input) for tool_input in tool_inputs)))
+
     def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
         """
         :param component_configer:
@@ -65,7 +175,9 @@ class RequestTool(Tool):
         self.response_content_type = component_configer.configer.value.get("response_content_type")
         if "json_parser" in component_configer.configer.value:
             self.json_parser = component_configer.configer.value.get("json_parser")
-        self.requests_wrapper = GenericRequestsWrapper(
-            headers=self.headers, response_content_type=self.response_content_type
+        if component_configer.configer.value.get("http_client"):
+            self.http_client = get_http_client(**component_configer.configer.value.get("http_client"))
+        self.requests_wrapper = PooledRequestsWrapper(
+            headers=self.headers, response_content_type=self.response_content_type, http_client=self.http_client
         )
         return super().initialize_by_component_configer(component_configer)
@@ -1,7 +1,7 @@
 # !/usr/bin/env python3
 # -*- coding:utf-8 -*-
 import os
-from typing import Optional
+from typing import Any, Dict, Optional, cast
 
 from agentuniverse.agent.action.tool.tool import Tool, ToolInput
 from agentuniverse.base.config.component_configer.configers.tool_configer import (
@@ -11,13 +11,34 @@ from agentuniverse.base.util.env_util import get_from_env
 from langchain_community.utilities import SearchApiAPIWrapper
 from pydantic import Field
 
+from writeworld.core.tool.search_cache import CachedSearchTool
+from writeworld.util.http_client import HttpClient
+
 # @Time    : 2024/6/12 09:44
 # @Author  : weizjajj
 # @Email   : weizhongjie.wzj@antgroup.com
 # @FileName: search_api_tool.py
 
 
-class SearchAPITool(Tool):
+class PooledSearchApiAPIWrapper(SearchApiAPIWrapper):
+    """SearchApiAPIWrapper sending its requests through the pooled HTTP client."""
+
+    http_client: Any = None
+
+    def _search_api_results(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        client: HttpClient = self.http_client
+        response = client.get(**self._prepare_request(query, **kwargs))
+        response.raise_for_status()
+        return cast(Dict[str, Any], response.json())
+
+    async def _async_search_api_results(self, query: str, **kwargs: Any) -> Dict[str, Any]:
+        client: HttpClient = self.http_client
+        response = await client.async_client.get(**self._prepare_request(query, **kwargs))
+        response.raise_for_status()
+        return cast(Dict[str, Any], await response.json())
+
+
+class SearchAPITool(CachedSearchTool):
     """
     The demo search tool.
 
@@ -36,28 +57,34 @@ class SearchAPITool(Tool):
     search_api_key: Optional[str] = Field(default_factory=lambda: get_from_env("SEARCHAPI_API_KEY"))
     engine: str = "google"
     search_params: dict = {}
-    search_api_wrapper: Optional[SearchApiAPIWrapper] = None
+    search_api_wrapper: Optional[PooledSearchApiAPIWrapper] = None
     search_type: str = "common"
 
-    def _load_api_wapper(self):
+    def _load_api_wapper(self) -> PooledSearchApiAPIWrapper:
         if not self.search_api_key:
             raise ValueError("Please set the SEARCHAPI_API_KEY environment variable.")
         if not self.search_api_wrapper:
-            self.search_api_wrapper = SearchApiAPIWrapper(searchapi_api_key=self.search_api_key, engine=self.engine)
+            self.search_api_wrapper = PooledSearchApiAPIWrapper(
+                searchapi_api_key=self.search_api_key, engine=self.engine, http_client=self.http_client
+            )
         return self.search_api_wrapper
 
     def execute(self, tool_input: ToolInput):
-        self._load_api_wapper()
+        search_api_wrapper = self._load_api_wapper()
+        params = self.engine_params(tool_input)
+        search_params = params["search_params"]
+        input = tool_input.get_data("input")
+        search = search_api_wrapper.results if self.search_type == "json" else search_api_wrapper.run
+        return self.cached_search(input, params, lambda: search(query=input, **search_params))
+
+    def engine_params(self, tool_input: ToolInput) -> Dict[str, Any]:
         search_params = {}
         for k, v in self.search_params.items():
             if k in tool_input.to_dict():
                 search_params[k] = tool_input.get_data(k)
                 continue
             search_params[k] = v
-        input = tool_input.get_data("input")
-        if self.search_type == "json":
-            return self.search_api_wrapper.results(query=input, **search_params)
-        return self.search_api_wrapper.run(query=input, **search_params)
+        return {"engine": self.engine, "search_type": self.search_type, "search_params": search_params}
 
     def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
         """Initialize the tool by the component configer."""
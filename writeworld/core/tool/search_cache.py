@@ -0,0 +1,229 @@
+# mypy: disable-error-code=import-not-found
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+from agentuniverse.base.config.component_configer.configers.tool_configer import (
+    ToolConfiger,
+)
+from agentuniverse.base.util.logging.logging_util import LOGGER
+from pydantic import Field
+
+from writeworld.core.knowledge.retrieval_cache import normalize_query
+from writeworld.core.tool.batch_tool import BatchTool
+from writeworld.util.http_client import HttpClient, get_http_client
+from writeworld.util.sqlite_pool import get_pool
+
+# searches are read-only, so the POST of an engine like serper.dev is safe to retry.
+SEARCH_HTTP_CLIENT: Dict[str, Any] = {"retry_methods": ("GET", "POST")}
+
+
+class SearchCache:
+    """TTL and LRU cache of search engine results, shared by the search tools.
+
+    Entries are keyed on the tool, the normalized query and the engine parameters (`k`, `gl`, `hl`,
+    `search_params`, ...). The memory tier is a per-process LRU, the SQLite tier is shared by all
+    workers; both drop entries older than `ttl` seconds. Concurrent misses of one key are coalesced:
+    the first caller searches and the others wait for its result instead of calling the API again.
+
+    Args:
+        db_path (str): SQLite file of the shared tier.
+        ttl (float): Seconds a result stays fresh.
+        max_entries (int): LRU size of each tier.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 3600, max_entries: int = 1024) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self._inflight: Dict[str, Future[Any]] = {}
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.pool = get_pool(db_path)
+        with self.pool.write() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, tool TEXT, query TEXT, result TEXT, created_at REAL, accessed_at REAL)"
+            )
+
+    @staticmethod
+    def cache_key(tool: str, query: str, params: Dict[str, Any]) -> str:
+        raw = json.dumps([tool, normalize_query(query), params], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def search(self, tool: str, query: str, params: Dict[str, Any], search: Callable[[], Any]) -> Any:
+        """The cached result of the query, calling `search` once on a miss however many callers wait."""
+        key = self.cache_key(tool, query, params)
+        with self._lock:
+            result = self._memory_get(key)
+            future = self._inflight.get(key) if result is None else None
+            leader = result is None and future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if result is not None:
+            return self._hit(tool, "hits", result[0])
+        if not leader:
+            return self._hit(tool, "coalesced", future.result())  # type: ignore[union-attr]
+
+        try:
+            result = self._disk_get(key)
+            if result is not None:
+                with self._lock:
+                    self._memory_put(key, result)
+                value = self._hit(tool, "hits", result[0])
+            else:
+                self._count(tool, "misses")
+                value = search()
+                self.put(key, tool, query, value)
+            future.set_result(value)  # type: ignore[union-attr]
+            return value
+        except BaseException as e:
+            future.set_exception(e)  # type: ignore[union-attr]
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, tool: str, query: str, params: Dict[str, Any]) -> Optional[Any]:
+        """The fresh cached result of the query, None on a miss, without searching."""
+        key = self.cache_key(tool, query, params)
+        with self._lock:
+            result = self._memory_get(key)
+        if result is None:
+            result = self._disk_get(key)
+            if result is not None:
+                with self._lock:
+                    self._memory_put(key, result)
+        if result is None:
+            self._count(tool, "misses")
+            return None
+        return self._hit(tool, "hits", result[0])
+
+    def put(self, key: str, tool: str, query: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, (value, now))
+        with self.pool.write() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, tool, query, result, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool, query, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM search_cache WHERE key NOT IN "
+                "(SELECT key FROM search_cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def hit_rate(self, tool: str) -> float:
+        counter = self.counters.get(tool, {})
+        total = sum(counter.values())
+        return (counter.get("hits", 0) + counter.get("coalesced", 0)) / total if total else 0.0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hits, coalesced waits, misses and hit rate of every tool."""
+        return {tool: {**counter, "hit_rate": self.hit_rate(tool)} for tool, counter in self.counters.items()}
+
+    def _count(self, tool: str, name: str) -> None:
+        with self._lock:
+            counter = self.counters.setdefault(tool, {"hits": 0, "coalesced": 0, "misses": 0})
+            counter[name] += 1
+
+    def _hit(self, tool: str, name: str, value: Any) -> Any:
+        self._count(tool, name)
+        LOGGER.info(f"Search cache hit ({name}) for {tool}, hit rate {self.hit_rate(tool):.2%}.")
+        return value
+
+    def _memory_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key: str, entry: Tuple[Any, float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self.pool.read() as conn:
+            row = conn.execute(
+                "SELECT result, created_at FROM search_cache WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        with self.pool.write() as conn:
+            conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+
+_caches: Dict[Tuple[str, int], SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(db_path: str, ttl: float = 3600, max_entries: int = 1024) -> SearchCache:
+    """The search cache of a database file, shared by the search tools of the process."""
+    key = (os.path.abspath(db_path), os.getpid())
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = SearchCache(db_path, ttl, max_entries)
+        return _caches[key]
+
+
+class CachedSearchTool(BatchTool):
+    """A search tool whose remote searches go through the shared search cache and HTTP client.
+
+    The cache is configured by the `search_cache: {db_path, ttl, max_entries}` key of the tool yaml,
+    tools without it search every time. The `http_client` key overrides the timeouts and retries of
+    the pooled HTTP client. A batch searches every distinct query of its inputs once.
+
+    Attributes:
+        search_cache (Optional[SearchCache]): The shared cache of the search results.
+        http_client (HttpClient): The keep-alive HTTP client of the engine API.
+    """
+
+    search_cache: Optional[SearchCache] = None
+    http_client: HttpClient = Field(default_factory=lambda: get_http_client(**SEARCH_HTTP_CLIENT))
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def cache_name(self) -> str:
+        return self.name or type(self).__name__
+
+    def engine_params(self, tool_input: ToolInput) -> Dict[str, Any]:
+        """The engine parameters of a search, part of its cache key."""
+        return {}
+
+    def batch_key(self, tool_input: ToolInput) -> Optional[Hashable]:
+        return SearchCache.cache_key(self.cache_name, tool_input.get_data("input"), self.engine_params(tool_input))
+
+    def cached_search(self, query: str, params: Dict[str, Any], search: Callable[[], Any]) -> Any:
+        if self.search_cache is None:
+            return search()
+        return self.search_cache.search(self.cache_name, query, params, search)
+
+    def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
+        super().initialize_by_component_configer(component_configer)
+        search_cache = component_configer.configer.value.get("search_cache")
+        if search_cache:
+            self.search_cache = get_search_cache(**search_cache)
+        http_client = component_configer.configer.value.get("http_client")
+        if http_client:
+            self.http_client = get_http_client(**{**SEARCH_HTTP_CLIENT, **http_client})
+        return self
@@ -0,0 +1,60 @@
+# mypy: disable-error-code=import-not-found
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+
+from agentuniverse.agent.action.tool.tool import Tool, ToolInput
+from agentuniverse.base.config.component_configer.configers.tool_configer import (
+    ToolConfiger,
+)
+from pydantic import Field
+
+from writeworld.core.tool.search_cache import CachedSearchTool
+from writeworld.util.latency_model import LatencyModel
+
+_attempts_lock = threading.Lock()
+
+
+class StubSearchTool(CachedSearchTool):
+    """A local stand-in of a search engine, with the response time and failures of a real one.
+
+    Unlike `MockSearchTool`, which answers every query at once with the same text, the stub answers
+    after the `ttft` of its latency model plus the transfer of the result tokens, fails `error_rate`
+    of the searches, and returns results which depend only on the seed and the query. Configured by
+    the `stub` key of the yaml, with the `search_cache` key of the real search tools if wanted.
+
+    Attributes:
+        stub (Dict[str, Any]): Arguments of `LatencyModel`, plus `results` and `result_tokens`.
+    """
+
+    stub: Dict[str, Any] = Field(default_factory=dict)
+    attempts: Counter[str] = Field(default_factory=Counter)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def execute(self, tool_input: ToolInput) -> Any:
+        query = tool_input.get_data("input")
+        return self.cached_search(query, self.engine_params(tool_input), lambda: self.search(query))
+
+    def search(self, query: str) -> str:
+        config = dict(self.stub)
+        results, result_tokens = config.pop("results", 5), config.pop("result_tokens", 60)
+        model = LatencyModel(**config)
+        with _attempts_lock:
+            attempt = self.attempts[query]
+            self.attempts[query] += 1
+        attempt_rng, text_rng = model.rng(f"{query}\x00{attempt}"), model.rng(query)
+        delay = model.first_token_delay(attempt_rng)
+        if model.fails(attempt_rng):
+            time.sleep(delay)
+            raise Exception(f"Simulated search engine error for query {query}.")
+        snippets = [f"{query}：{''.join(model.tokens(text_rng, result_tokens))}" for _ in range(results)]
+        time.sleep(delay + sum(model.token_delay(attempt_rng) for _ in range(results * result_tokens)))
+        return "\n".join(snippets)
+
+    def initialize_by_component_configer(self, component_configer: ToolConfiger) -> "Tool":
+        super().initialize_by_component_configer(component_configer)
+        self.stub = component_configer.configer.value.get("stub") or {}
+        return self
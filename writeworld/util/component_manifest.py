@@ -0,0 +1,216 @@
+# mypy: disable-error-code=import-not-found
+# mypy: disable-error-code=import-untyped
+"""A manifest of the component yaml files, so a start does not parse them all again.
+
+`AgentUniverse.start` scans the packages of every component type: it walks the package directories and
+parses every yaml file it finds, once per component type, so the yaml of `writeworld.core` are parsed
+about twenty times per process. The manifest records, per package, its directories with their mtimes
+and its yaml files with their mtime, size, component type and parsed content. A start with the
+manifest installed stats these paths instead: a package whose directories and files did not change is
+served from the manifest, any other is scanned again and its entry rewritten. Placeholders such as
+`${ENV}` are resolved at every start, the manifest only keeps the raw yaml.
+
+Build it at deploy time with `python -m writeworld.util.component_manifest [config/config.toml]`.
+"""
+import importlib.util
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+import yaml
+from agentuniverse.base.agentuniverse import AgentUniverse
+from agentuniverse.base.component.component_enum import ComponentEnum
+from agentuniverse.base.config.component_configer.component_configer import (
+    ComponentConfiger,
+)
+from agentuniverse.base.config.config_type_enum import ConfigTypeEnum
+from agentuniverse.base.config.configer import Configer, PlaceholderResolver
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+MANIFEST_VERSION = 1
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _package_path(package_name: str) -> str:
+    spec = importlib.util.find_spec(package_name)
+    if spec is None:
+        raise ImportError(f"Can not find {package_name}")
+    return spec.submodule_search_locations[0] if spec.submodule_search_locations else cast(str, spec.origin)
+
+
+class ComponentManifest:
+    """The yaml files of the component packages, kept valid by the mtimes of their paths.
+
+    Args:
+        path (str): The json file of the manifest.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.packages: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.checked: Dict[str, bool] = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "scans": 0}
+
+    def load(self) -> "ComponentManifest":
+        """Read the manifest file, a missing or outdated one is an empty manifest."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == MANIFEST_VERSION:
+            self.packages, self.files = data["packages"], data["files"]
+        return self
+
+    def save(self) -> None:
+        """Write the manifest if a package was scanned, atomically for the concurrent starts of workers."""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {"version": MANIFEST_VERSION, "packages": self.packages, "files": self.files}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def _unchanged(self, package_name: str) -> bool:
+        package = self.packages.get(package_name)
+        if package is None or package["path"] != _package_path(package_name):
+            return False
+        try:
+            for directory, mtime_ns in package["dirs"].items():
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    return False
+            for file in package["files"]:
+                stat = os.stat(file)
+                if [stat.st_mtime_ns, stat.st_size] != [self.files[file]["mtime_ns"], self.files[file]["size"]]:
+                    return False
+        except (OSError, KeyError):
+            return False
+        return True
+
+    def _scan_package(self, package_name: str, suffix: str) -> None:
+        package_path = _package_path(package_name)
+        dirs: Dict[str, int] = {}
+        files = []
+        for root, dirnames, filenames in os.walk(package_path):
+            # the bytecode caches change at every import, and hold no config.
+            dirnames[:] = sorted(name for name in dirnames if name != "__pycache__")
+            dirs[root] = os.stat(root).st_mtime_ns
+            for name in sorted(filenames):
+                if name.endswith(f".{suffix}"):
+                    file = os.path.join(root, name)
+                    self._parse(file)
+                    files.append(file)
+        self.packages[package_name] = {"path": package_path, "dirs": dirs, "files": files}
+        self.dirty = True
+
+    def _parse(self, file: str) -> None:
+        stat = os.stat(file)
+        entry = self.files.get(file)
+        if entry is not None and [entry["mtime_ns"], entry["size"]] == [stat.st_mtime_ns, stat.st_size]:
+            return
+        with open(file, encoding="utf-8") as f:
+            value = yaml.load(f, Loader=YAML_LOADER)
+        metadata = value.get("metadata") if isinstance(value, dict) else None
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "type": metadata.get("type") if isinstance(metadata, dict) else None,
+            "value": value,
+        }
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            # e.g. a yaml date, the file is parsed at every start instead.
+            entry["value"] = None
+        self.files[file] = entry
+
+    def package_files(self, package_name: str, suffix: str = ConfigTypeEnum.YAML.value) -> List[str]:
+        """The config files of a package, scanning it if it changed since the manifest was written."""
+        with self.lock:
+            if package_name not in self.checked:
+                unchanged = self._unchanged(package_name)
+                if not unchanged:
+                    self._scan_package(package_name, suffix)
+                self.stats["hits" if unchanged else "scans"] += 1
+                self.checked[package_name] = unchanged
+            return list(self.packages[package_name]["files"])
+
+    def configer(self, file: str) -> Configer:
+        """The loaded Configer of a file, the placeholders of its yaml resolved now."""
+        value = self.files[file]["value"]
+        if value is None:
+            return Configer(path=file).load()
+        configer = Configer(path=file)
+        # resolve() builds new dicts and lists, the component does not share them with the manifest.
+        configer.value = PlaceholderResolver().resolve(value)
+        return configer
+
+    def scan(
+        self, package_list: List[str], config_type_enum: ConfigTypeEnum, component_enum: ComponentEnum
+    ) -> List[ComponentConfiger]:
+        """`AgentUniverse.scan` on the manifest: the component configers of one type in the packages."""
+        if config_type_enum != ConfigTypeEnum.YAML:
+            return _original_scan(package_list, config_type_enum, component_enum)
+        component_configer_list = []
+        for package_name in package_list:
+            for file in self.package_files(package_name):
+                if self.files[file]["type"] != component_enum.value:
+                    continue
+                component_configer_list.append(ComponentConfiger().load_by_configer(self.configer(file)))
+        return component_configer_list
+
+
+def _original_scan(
+    package_list: List[str], config_type_enum: ConfigTypeEnum, component_enum: ComponentEnum
+) -> List[ComponentConfiger]:
+    return cast(
+        List[ComponentConfiger],
+        type(AgentUniverse()).scan(AgentUniverse(), package_list, config_type_enum, component_enum),
+    )
+
+
+def install_manifest(path: str) -> ComponentManifest:
+    """Make the component scanning of `AgentUniverse().start` use the manifest at `path`.
+
+    Call it before the start, and `save()` the returned manifest after it to record what was scanned.
+    """
+    manifest = ComponentManifest(path).load()
+    # the instance attribute shadows the method the start calls as `self.scan`.
+    AgentUniverse().scan = manifest.scan
+    return manifest
+
+
+def uninstall_manifest() -> None:
+    AgentUniverse().__dict__.pop("scan", None)
+
+
+def build_manifest(config_path: str, path: Optional[str] = None) -> ComponentManifest:
+    """Scan the packages of the `[CORE_PACKAGE]` section of an application config into a new manifest."""
+    core_packages = Configer(path=config_path).load().value.get("CORE_PACKAGE", {})
+    manifest = ComponentManifest(path or default_manifest_path(config_path))
+    for package_list in core_packages.values():
+        for package_name in package_list:
+            manifest.package_files(package_name)
+    manifest.save()
+    return manifest
+
+
+def default_manifest_path(config_path: str) -> str:
+    """`DB/component_manifest.json` of the project of a config file."""
+    return str(Path(config_path).resolve().parent.parent / "DB" / "component_manifest.json")
+
+
+if __name__ == "__main__":
+    config = sys.argv[1] if len(sys.argv) > 1 else "config/config.toml"
+    built = build_manifest(config)
+    LOGGER.info(f"component manifest {built.path}: {len(built.packages)} packages, {len(built.files)} files")
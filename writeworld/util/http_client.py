@@ -0,0 +1,194 @@
+# mypy: disable-error-code=import-not-found
+"""Pooled HTTP clients shared by the writeworld tools.
+
+A client keeps one requests session, and so one keep-alive connection pool per host, for the whole
+process: the tools of an agent loop reuse the TCP and TLS connections of the previous calls instead of
+opening new ones. Requests get connect and read timeouts, and failed connections and retryable status
+codes are retried with a jittered exponential backoff. `AsyncHttpClient` is the aiohttp equivalent, used
+by the async paths of the LangChain API wrappers.
+"""
+import asyncio
+import inspect
+import os
+import random
+import threading
+import weakref
+from typing import Any, Collection, Dict, Optional, Tuple, cast
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """A keep-alive requests session with timeouts and jittered retries.
+
+    Args:
+        connect_timeout (float): Seconds to open a connection.
+        read_timeout (float): Seconds to wait for the response after the request is sent.
+        retries (int): Retries of a failed connection or a retryable status.
+        backoff_factor (float): Backoff of the nth retry is `backoff_factor * 2 ** (n - 1)` seconds.
+        backoff_jitter (float): Up to this many seconds added at random to every backoff.
+        pool_maxsize (int): Kept-alive connections per host.
+        retry_methods (Optional[Collection[str]]): Methods safe to retry, the idempotent ones by default.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        pool_maxsize: int = 16,
+        retry_methods: Optional[Collection[str]] = None,
+    ) -> None:
+        self.config = {
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+            "retries": retries,
+            "backoff_factor": backoff_factor,
+            "backoff_jitter": backoff_jitter,
+            "pool_maxsize": pool_maxsize,
+            "retry_methods": retry_methods,
+        }
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(retry_methods or Retry.DEFAULT_ALLOWED_METHODS),
+            raise_on_status=False,
+        )
+        self.pool_maxsize = pool_maxsize
+        self._session: Optional[requests.Session] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The session of the process, a session opened before a fork is not reused by the child."""
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize, max_retries=self.retry)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session, self._pid = session, os.getpid()
+            return self._session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    @property
+    def async_client(self) -> "AsyncHttpClient":
+        """The shared async client configured like this one."""
+        return get_async_http_client(**self.config)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class AsyncHttpClient:
+    """The aiohttp equivalent of `HttpClient`, one session per event loop.
+
+    Args:
+        Same as `HttpClient`.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        backoff_jitter: float = 0.5,
+        pool_maxsize: int = 16,
+        retry_methods: Optional[Collection[str]] = None,
+    ) -> None:
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.pool_maxsize = pool_maxsize
+        self.retry_methods = frozenset(retry_methods or Retry.DEFAULT_ALLOWED_METHODS)
+        self._sessions: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_maxsize)
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return session
+
+    def backoff(self, attempt: int) -> float:
+        return self.backoff_factor * 2.0 ** (attempt - 1) + random.uniform(0, self.backoff_jitter)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
+        """Send the request and read the body, so `text()` and `json()` work after the connection is released."""
+        attempts = self.retries + 1 if method.upper() in self.retry_methods else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    await response.read()
+                if response.status not in RETRY_STATUSES or attempt == attempts:
+                    return response
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == attempts:
+                    raise
+            await asyncio.sleep(self.backoff(attempt))
+        raise Exception(f"No attempt left for {method} {url}.")
+
+    async def get(self, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self) -> None:
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+_clients: Dict[Tuple[Any, ...], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _shared(client_class: type, config: Dict[str, Any]) -> Any:
+    arguments = inspect.signature(client_class).bind(**config)
+    arguments.apply_defaults()
+    key = (client_class, os.getpid(), tuple((k, str(v)) for k, v in arguments.arguments.items()))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = client_class(**config)
+        return _clients[key]
+
+
+def get_http_client(**config: Any) -> HttpClient:
+    """The client of the process for a configuration, shared by the tools configured alike."""
+    return cast(HttpClient, _shared(HttpClient, config))
+
+
+def get_async_http_client(**config: Any) -> AsyncHttpClient:
+    """The async client of the process for a configuration."""
+    return cast(AsyncHttpClient, _shared(AsyncHttpClient, config))
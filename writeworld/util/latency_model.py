@@ -0,0 +1,67 @@
+# mypy: disable-error-code=import-not-found
+"""Timing and output of the local stand-ins for the LLM and search providers.
+
+A stand-in answers after a time to first token, then produces tokens at a given rate, both varied by
+a jitter, and fails a given share of its calls. Everything random is drawn from a generator seeded by
+the seed of the model and the request, so the same request gets the same text, delays and failure in
+every run, and a load test is repeatable.
+"""
+import hashlib
+import random
+from typing import List, Sequence
+
+# the words of the generated text, a mix of CJK and ASCII like the prompts and answers of the agents.
+VOCABULARY = (
+    "根据 《民法典》 第 条 规定 ， 当事人 应当 按照 约定 全面 履行 自己 的 义务 。 合同 违约 责任 "
+    "赔偿 损失 法院 认为 本案 争议 焦点 在于 the court held that contract parties shall perform "
+    "obligations according to agreement liability damages article law"
+).split()
+
+
+class LatencyModel:
+    """Seeded timing, failures and text of a simulated provider call.
+
+    Args:
+        ttft (float): Seconds to the first token, the response time of a search.
+        tokens_per_second (float): Tokens produced per second after the first one, 0 for no delay.
+        jitter (float): Relative variation of every delay, 0.2 draws them within ±20%.
+        error_rate (float): Share of the calls which fail, from 0 to 1.
+        seed (int): Seed of the generators, combined with the request.
+    """
+
+    def __init__(
+        self,
+        ttft: float = 0.5,
+        tokens_per_second: float = 50,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def rng(self, request: str) -> random.Random:
+        """The generator of one request, the same for the same seed and request."""
+        digest = hashlib.sha1(f"{self.seed}\x00{request}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _vary(self, rng: random.Random, seconds: float) -> float:
+        return max(seconds * (1 + rng.uniform(-self.jitter, self.jitter)), 0.0)
+
+    def first_token_delay(self, rng: random.Random) -> float:
+        return self._vary(rng, self.ttft)
+
+    def token_delay(self, rng: random.Random) -> float:
+        return self._vary(rng, 1 / self.tokens_per_second) if self.tokens_per_second > 0 else 0.0
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+    @staticmethod
+    def tokens(rng: random.Random, count: int, vocabulary: Sequence[str] = VOCABULARY) -> List[str]:
+        """`count` tokens of text, the ASCII words separated by spaces."""
+        words = [rng.choice(vocabulary) for _ in range(count)]
+        return [f" {word}" if word.isascii() and i else word for i, word in enumerate(words)]
@@ -0,0 +1,144 @@
+# mypy: disable-error-code=import-not-found
+"""Warm-up of the shared state before the workers fork, and of lazily initialized components after.
+
+Preload: state which is read-only once loaded and safe to inherit through `fork()` (dictionaries, index
+arrays, memory-mapped matrices, tokenizers) registers a loader with `register_preload`, and the server
+runs them in the master with `preload()` before gunicorn forks its workers. The workers then share the
+pages copy-on-write instead of loading a private copy each. State holding connections, sockets or
+threads (SQLite connections, HTTP clients, Chroma clients) stays in the post-fork queue.
+
+Prewarm: lazy components import and build their heavy parts on first use, so the server starts without
+them. A component configured with `prewarm: true` registers its loader here, and the loaders run in a
+daemon thread of every worker shortly after it forked and started accepting traffic, so usually the
+first request does not pay for them either. A loader which fails is logged and left to its first use.
+
+`warm_status()` reports both phases and the memory of the process, for the readiness endpoint.
+"""
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agentuniverse.agent_serve.web.post_fork_queue import add_post_fork
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+# seconds a worker serves before the warm-up starts competing with its first requests.
+PREWARM_DELAY = 1.0
+
+_loaders: List[Tuple[str, Callable[[], object]]] = []
+_preloaders: List[Tuple[str, Callable[[], object]]] = []
+_loaders_lock = threading.Lock()
+# per phase: whether it ran, the seconds of each loaded name, the error of each failed one.
+_status: Dict[str, Dict[str, Any]] = {
+    "preload": {"done": False, "pid": None, "loaded": {}, "failed": {}},
+    "prewarm": {"done": False, "pid": None, "loaded": {}, "failed": {}},
+}
+
+
+def register_prewarm(name: str, loader: Callable[[], object]) -> None:
+    """Run `loader` in the background warm-up of every worker."""
+    with _loaders_lock:
+        if not _loaders:
+            add_post_fork(start_prewarm)
+        _loaders.append((name, loader))
+
+
+def register_preload(name: str, loader: Callable[[], object]) -> None:
+    """Run `loader` in the master before the workers fork, it must leave no connection or thread behind."""
+    with _loaders_lock:
+        _preloaders.append((name, loader))
+
+
+def _run(phase: str, loaders: List[Tuple[str, Callable[[], object]]]) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    failed: Dict[str, str] = {}
+    for name, loader in loaders:
+        start = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            LOGGER.warn(f"{phase} of {name} failed, it loads on first use: {e}")
+            failed[name] = str(e)
+            continue
+        timings[name] = time.perf_counter() - start
+    _status[phase] = {"done": True, "pid": os.getpid(), "loaded": timings, "failed": failed}
+    LOGGER.info(f"{phase}ed {len(timings)}/{len(loaders)} components in {sum(timings.values()):.3f}s")
+    return timings
+
+
+def prewarm() -> Dict[str, float]:
+    """Run the registered loaders, the seconds each took, the failed ones are left out."""
+    with _loaders_lock:
+        loaders = list(_loaders)
+    return _run("prewarm", loaders)
+
+
+def preload(freeze: bool = True) -> Dict[str, float]:
+    """Run the preload loaders in this process, the master, the seconds each took.
+
+    With `freeze`, the objects alive afterwards are moved out of the reach of the garbage collector:
+    a collection in a worker would otherwise write to the header of every tracked object it visits,
+    and copy most of the shared pages into the worker.
+    """
+    with _loaders_lock:
+        loaders = list(_preloaders)
+    timings = _run("preload", loaders)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return timings
+
+
+def start_prewarm(delay: Optional[float] = None) -> threading.Thread:
+    """Start the warm-up thread of this process, `delay` seconds from now."""
+
+    def run() -> None:
+        time.sleep(PREWARM_DELAY if delay is None else delay)
+        prewarm()
+
+    thread = threading.Thread(target=run, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def memory_usage() -> Dict[str, int]:
+    """Memory of this process in kB: `rss`, and on Linux `pss` and the shared and private parts of the rss.
+
+    `pss` divides each shared page between the processes mapping it, so the sum of the `pss` of the
+    workers is what they cost together, where the sum of their `rss` counts the shared pages in each.
+    """
+    fields = {
+        "Rss": "rss",
+        "Pss": "pss",
+        "Shared_Clean": "shared_clean",
+        "Shared_Dirty": "shared_dirty",
+        "Private_Clean": "private_clean",
+        "Private_Dirty": "private_dirty",
+    }
+    usage: Dict[str, int] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = int(value.split()[0])
+    except OSError:
+        import resource
+
+        # the peak rss, in kB on Linux and in bytes on macOS.
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def warm_status() -> Dict[str, Any]:
+    """Both warm-up phases of this process, ready when every phase with loaders ran."""
+    with _loaders_lock:
+        registered = {"preload": len(_preloaders), "prewarm": len(_loaders)}
+    phases = {phase: {**status, "registered": registered[phase]} for phase, status in _status.items()}
+    return {
+        "ready": all(status["done"] or not status["registered"] for status in phases.values()),
+        "pid": os.getpid(),
+        **phases,
+        "memory": memory_usage(),
+    }
@@ -0,0 +1,219 @@
+# mypy: disable-error-code=import-not-found
+"""Request rate and concurrency limits shared by every worker and thread of a host.
+
+Each limited key (an LLM provider and model) has a token bucket, refilled at `requests_per_minute`
+up to `burst` tokens, and a number of concurrency slots. A call takes a token and a slot before it
+starts and gives the slot back when it ends. Both live in a SQLite file opened by all the gunicorn
+workers, and each attempt is one `BEGIN IMMEDIATE` transaction, so the processes never hand out more
+than the limits between them.
+
+A call which finds no token or no free slot queues: it sleeps until the next token is due, or polls
+for a slot, waking early when a thread of its own process releases one, and fails with `TimeoutError`
+once it waited `max_wait` seconds, or as soon as the next token is due later than that. A 429 of the
+provider puts the bucket in debt for its cooldown, so all the workers back off together instead of
+retrying at once. Slots are leases: the slot of a process which died, or held longer than `lease`
+seconds, is taken back.
+
+The throttled calls and the seconds they waited, including the waits which timed out, are counted per
+key in the same file, for all the workers; `stats()` reads them.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from agentuniverse.base.util.logging.logging_util import LOGGER
+
+from writeworld.util.sqlite_pool import get_pool
+
+# seconds between two checks of a caller waiting for a slot of another process.
+POLL_INTERVAL = 0.05
+
+STATS_COLUMNS = ("acquired", "throttled", "throttled_seconds", "timeouts", "penalties")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Lease:
+    """A concurrency slot taken by `RateLimiter.acquire`, release it once the call ended."""
+
+    def __init__(self, limiter: "RateLimiter", key: str, holder: Optional[str]) -> None:
+        self.limiter = limiter
+        self.key = key
+        self.holder = holder
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.limiter.release(self)
+
+
+class RateLimiter:
+    """Token buckets and concurrency slots of the limited keys, in a SQLite file shared by the processes.
+
+    Args:
+        db_path (str): SQLite file of the limits, opened by every worker.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self._released = threading.Condition()
+        with self.pool.write() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets (key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_slots "
+                "(holder TEXT PRIMARY KEY, key TEXT, pid INTEGER, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_stats (key TEXT PRIMARY KEY, acquired INTEGER DEFAULT 0, "
+                "throttled INTEGER DEFAULT 0, throttled_seconds REAL DEFAULT 0, timeouts INTEGER DEFAULT 0, "
+                "penalties INTEGER DEFAULT 0)"
+            )
+
+    @staticmethod
+    def _tokens(conn: Any, key: str, rate: float, burst: float, now: float) -> float:
+        row = conn.execute("SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+        return burst if row is None else min(burst, float(row[0] + (now - row[1]) * rate))
+
+    @staticmethod
+    def _count(conn: Any, key: str, **increments: float) -> None:
+        conn.execute("INSERT OR IGNORE INTO rate_limit_stats (key) VALUES (?)", (key,))
+        assignments = ", ".join(f"{column} = {column} + ?" for column in increments)
+        conn.execute(f"UPDATE rate_limit_stats SET {assignments} WHERE key = ?", (*increments.values(), key))
+
+    def _in_flight(self, conn: Any, key: str, now: float) -> int:
+        conn.execute("DELETE FROM rate_limit_slots WHERE key = ? AND expires_at < ?", (key, now))
+        rows = conn.execute("SELECT pid, COUNT(*) FROM rate_limit_slots WHERE key = ? GROUP BY pid", (key,)).fetchall()
+        in_flight = 0
+        for pid, count in rows:
+            if pid != os.getpid() and not _alive(pid):
+                # a worker killed in a call, e.g. by the gunicorn timeout.
+                conn.execute("DELETE FROM rate_limit_slots WHERE key = ? AND pid = ?", (key, pid))
+                continue
+            in_flight += count
+        return in_flight
+
+    def try_acquire(
+        self,
+        key: str,
+        requests_per_minute: float = 0,
+        burst: Optional[float] = None,
+        max_concurrency: int = 0,
+        lease: float = 600,
+        waited: float = 0,
+    ) -> Tuple[Optional[Lease], float]:
+        """One attempt: a lease, or None and the seconds after which a new attempt may succeed.
+
+        A zero `requests_per_minute` or `max_concurrency` leaves that limit out; `burst` defaults to
+        one second of requests, at least one. `waited` is counted as throttled time on success.
+        """
+        rate = requests_per_minute / 60
+        burst = burst or max(1.0, rate)
+        now = time.time()
+        with self.pool.write() as conn:
+            if max_concurrency and self._in_flight(conn, key, now) >= max_concurrency:
+                return None, POLL_INTERVAL
+            tokens = self._tokens(conn, key, rate, burst, now) if rate else 0.0
+            if rate and tokens < 1:
+                return None, (1 - tokens) / rate
+            holder = uuid.uuid4().hex
+            if rate:
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens - 1, now),
+                )
+            if max_concurrency:
+                conn.execute(
+                    "INSERT INTO rate_limit_slots (holder, key, pid, expires_at) VALUES (?, ?, ?, ?)",
+                    (holder, key, os.getpid(), now + lease),
+                )
+            self._count(conn, key, acquired=1, throttled=1 if waited else 0, throttled_seconds=waited)
+        return Lease(self, key, holder if max_concurrency else None), 0.0
+
+    def _next_wait(self, key: str, wait: float, start: float, max_wait: float) -> float:
+        remaining = start + max_wait - time.monotonic()
+        if wait > remaining:
+            with self.pool.write() as conn:
+                self._count(conn, key, timeouts=1, throttled_seconds=time.monotonic() - start)
+            raise TimeoutError(f"No {key} request allowed within {max_wait}s, try again later.")
+        # spread the processes woken for the same token.
+        return min(wait * random.uniform(1, 1.1), remaining)
+
+    def acquire(self, key: str, max_wait: float = 10, **limits: Any) -> Lease:
+        """A lease on `key`, queueing up to `max_wait` seconds; the limits are those of `try_acquire`."""
+        start, waited = time.monotonic(), 0.0
+        while True:
+            lease, wait = self.try_acquire(key, waited=waited, **limits)
+            if lease is not None:
+                return lease
+            wait = self._next_wait(key, wait, start, max_wait)
+            with self._released:
+                self._released.wait(wait)
+            waited = time.monotonic() - start
+
+    async def acquire_async(self, key: str, max_wait: float = 10, **limits: Any) -> Lease:
+        """`acquire` for the event loop, the attempts run in a thread and the waits in the loop."""
+        start, waited = time.monotonic(), 0.0
+        while True:
+            lease, wait = await asyncio.to_thread(self.try_acquire, key, waited=waited, **limits)
+            if lease is not None:
+                return lease
+            await asyncio.sleep(self._next_wait(key, wait, start, max_wait))
+            waited = time.monotonic() - start
+
+    def release(self, lease: Lease) -> None:
+        if lease.holder is None:
+            return
+        with self.pool.write() as conn:
+            conn.execute("DELETE FROM rate_limit_slots WHERE holder = ?", (lease.holder,))
+        with self._released:
+            self._released.notify_all()
+
+    def penalize(self, key: str, seconds: float, requests_per_minute: float = 0, **limits: Any) -> None:
+        """Stop granting tokens of `key` for `seconds`, after the provider answered 429."""
+        rate = requests_per_minute / 60
+        with self.pool.write() as conn:
+            if rate:
+                now = time.time()
+                tokens = min(self._tokens(conn, key, rate, limits.get("burst") or max(1.0, rate), now), 0.0)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens - seconds * rate, now),
+                )
+            self._count(conn, key, penalties=1)
+        LOGGER.warn(f"Rate limited by the provider of {key}, holding its requests for {seconds}s.")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Acquired, throttled, timed out and penalized calls of every key, and the seconds they waited."""
+        with self.pool.read() as conn:
+            rows = conn.execute(f"SELECT key, {', '.join(STATS_COLUMNS)} FROM rate_limit_stats").fetchall()
+            in_flight = dict(conn.execute("SELECT key, COUNT(*) FROM rate_limit_slots GROUP BY key").fetchall())
+        return {row[0]: {**dict(zip(STATS_COLUMNS, row[1:])), "in_flight": in_flight.get(row[0], 0)} for row in rows}
+
+
+_limiters: Dict[Tuple[str, int], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(db_path: str) -> RateLimiter:
+    """The limiter of a SQLite file, shared by the components of the process."""
+    key = (os.path.abspath(db_path), os.getpid())
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(db_path)
+        return _limiters[key]
@@ -0,0 +1,191 @@
+# mypy: disable-error-code=import-not-found
+"""A pool of warm worker processes running untrusted Python snippets.
+
+The workers are forked by a multiprocessing forkserver which imported the preloaded modules once, so a
+new worker starts in milliseconds with them already in memory, and never inherits the threads, sockets
+or LLM clients of the serving process. A snippet runs in a worker with fresh globals and its stdout
+captured, under a wall-clock timeout enforced by the caller, a CPU time limit (RLIMIT_CPU, the kernel
+kills the worker) and an address space limit (RLIMIT_AS, the snippet gets a MemoryError). A worker
+which timed out or died is replaced, and every worker is recycled after `max_runs` snippets.
+
+This module imports the standard library only, the forkserver and the workers import it.
+"""
+import contextlib
+import io
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource limits are POSIX only.
+    resource = None  # type: ignore[assignment]
+
+MB = 1024 * 1024
+
+
+def _address_space() -> int:
+    """Bytes of address space the process maps, 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _run_snippet(code: str) -> Tuple[str, str]:
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            exec(code, {"__name__": "__main__", "__builtins__": __builtins__})
+    except MemoryError:
+        return "error", "MemoryError: the code exceeded the memory limit of the sandbox."
+    except Exception as e:
+        return "ok", output.getvalue() + repr(e)
+    return "ok", output.getvalue()
+
+
+def _worker_main(conn: Connection, preload: Sequence[str], cpu_seconds: float, memory_mb: int) -> None:
+    for module in preload:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+    if resource is not None and memory_mb:
+        # on top of what the interpreter and the preloaded modules already map.
+        limit = _address_space() + memory_mb * MB
+        resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+    while True:
+        try:
+            code = conn.recv()
+        except EOFError:
+            return
+        if resource is not None and cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+        try:
+            conn.send(_run_snippet(code))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, context: Any, preload: Sequence[str], cpu_seconds: float, memory_mb: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, tuple(preload), cpu_seconds, memory_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+
+    def kill(self) -> None:
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+
+class SandboxPool:
+    """Warm worker processes executing Python snippets with time, CPU and memory limits.
+
+    Args:
+        size (int): Worker processes, also the snippets running at once.
+        preload (Sequence[str]): Modules imported by the forkserver and every worker up front.
+        timeout (float): Wall-clock seconds of a snippet, including the wait for an idle worker.
+        cpu_seconds (float): CPU seconds of a snippet, 0 for no limit.
+        memory_mb (int): Megabytes a snippet may allocate, 0 for no limit.
+        max_runs (int): Snippets a worker runs before it is replaced by a fresh one.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        preload: Sequence[str] = ("json", "math", "re", "datetime", "collections"),
+        timeout: float = 10,
+        cpu_seconds: float = 10,
+        memory_mb: int = 512,
+        max_runs: int = 50,
+    ) -> None:
+        self.size = size
+        self.preload = list(preload)
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_runs = max_runs
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            self.context.set_forkserver_preload([__name__, *self.preload])
+        self.idle: "queue.Queue[_Worker]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"runs": 0, "timeouts": 0, "crashes": 0, "recycled": 0}
+        for _ in range(size):
+            self.idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.context, self.preload, self.cpu_seconds, self.memory_mb)
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    def _replace(self, worker: _Worker, reason: str) -> None:
+        worker.kill()
+        self._count(reason)
+        self.idle.put(self._spawn())
+
+    def run(self, code: str, timeout: Optional[float] = None) -> str:
+        """The stdout of the snippet, followed by the repr of the exception which ended it if any."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return f"TimeoutError: no idle sandbox worker within {timeout}s."
+        self._count("runs")
+        try:
+            worker.conn.send(code)
+            if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                self._replace(worker, "timeouts")
+                return f"TimeoutError: the code ran longer than {timeout}s and was stopped."
+            status, output = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker, "crashes")
+            return "Error: the sandbox worker was killed, the code exceeded its CPU time or memory limit."
+        worker.runs += 1
+        if status == "error" or worker.runs >= self.max_runs:
+            self._replace(worker, "recycled")
+        else:
+            self.idle.put(worker)
+        return cast(str, output)
+
+    def close(self) -> None:
+        workers: List[_Worker] = []
+        while True:
+            try:
+                workers.append(self.idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in workers:
+            worker.kill()
+
+
+_pools: Dict[Tuple[Any, ...], SandboxPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_pool(**config: Any) -> SandboxPool:
+    """The pool of the process for a configuration, started on first use, after the server forks."""
+    key = (os.getpid(), tuple(sorted((k, str(v)) for k, v in config.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SandboxPool(**config)
+        return _pools[key]
@@ -0,0 +1,125 @@
+# mypy: disable-error-code=import-not-found
+"""Shared access to the SQLite files of the writeworld components.
+
+Every thread reads through its own connection, so readers never wait on each other, and writes of a
+process go through one writer connection behind a lock. The database is switched to WAL, where readers
+keep reading the last committed snapshot while the writer appends, and the connections are tuned with
+a large page cache and memory-mapped reads. Connections are never shared across the gunicorn fork: a
+pool opened before it is reopened in the worker.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    # negative sizes are KiB: a 64 MiB page cache per connection.
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+def apply_pragmas(conn: Any, pragmas: Dict[str, Any]) -> None:
+    """Apply the pragmas to a sqlite3 connection or a DBAPI connection of SQLAlchemy."""
+    cursor = conn.cursor()
+    for key, value in pragmas.items():
+        cursor.execute(f"PRAGMA {key}={value}")
+    cursor.close()
+
+
+class SQLitePool:
+    """Per-thread read connections and a single serialized writer on one SQLite file.
+
+    Args:
+        db_path (str): The database file, its directory is created when missing.
+        pragmas (Optional[Dict[str, Any]]): Overrides of `DEFAULT_PRAGMAS`.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None) -> None:
+        self.db_path = db_path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.write_lock = threading.RLock()
+        self._local = threading.local()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._pid = os.getpid()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            self._local = threading.local()
+            self._writer = None
+            self.write_lock = threading.RLock()
+            self._pid = os.getpid()
+
+    @property
+    def writer(self) -> sqlite3.Connection:
+        """The writer connection, hold `write_lock` while using it."""
+        self._check_fork()
+        if self._writer is None:
+            self._writer = self.connect()
+        return self._writer
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """The connection of the calling thread, which sees the last committed snapshot."""
+        self._check_fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+            conn.execute("PRAGMA query_only=ON")
+        yield conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """A transaction of the writer connection, committed on exit and rolled back on error.
+
+        `BEGIN IMMEDIATE` takes the database write lock up front, so writers of other processes wait
+        `busy_timeout` instead of failing when the transaction upgrades.
+        """
+        with self.write_lock:
+            conn = self.writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            # code written for plain sqlite3 connections may have committed with `with conn:` already.
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self.write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pools: Dict[Tuple[str, int], SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, pragmas: Optional[Dict[str, Any]] = None) -> SQLitePool:
+    """The pool of a database file, shared by the components of the process."""
+    key = (os.path.abspath(db_path), os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SQLitePool(db_path, pragmas)
+        return _pools[key]